@@ -0,0 +1,60 @@
+import os
+
+from flask import Flask
+
+from config import perfil_activo
+
+
+# -----------------------------------------------------
+# FÁBRICA DE LA APLICACIÓN
+# -----------------------------------------------------
+# Importar el paquete no crea nada: la app, los motores de base de datos y las
+# cachés nacen en create_app(). gunicorn con preload_app la crea una vez en el
+# proceso maestro (ver gunicorn.conf.py) y los workers la heredan por fork,
+# compartiendo las páginas de memoria de módulos, plantillas y mapeos.
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def create_app(config=None):
+    """Crea la aplicación con el perfil de PERFIL; `config` pisa claves sueltas (p. ej. la base de pruebas)."""
+    from .analisis import cache_analisis
+    from .catalogo import cache_codigos, cache_versiones, canal_stock
+    from .extensions import db, incluir_en_migraciones, login_manager
+    from .listados import cache_fragmentos, firma_plantillas
+    from .vistas import BLUEPRINTS
+    from . import bd, metricas
+
+    app = Flask(__name__, template_folder=os.path.join(RAIZ, 'templates'), static_folder=os.path.join(RAIZ, 'static'))
+    # Perfil de ejecución (PERFIL=dev|prod|bench, ver config.py): pool, caché de sentencias y PRAGMA de SQLite
+    perfil = perfil_activo()
+    app.config.from_object(perfil)
+    app.config.update(config or {})
+    app.config['PERFIL'] = os.getenv('PERFIL', 'dev')
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = perfil.opciones_motor(app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config['ARCHIVO_DIR'] = app.config['ARCHIVO_DIR'] or os.path.join(app.instance_path, 'archivo')
+    app.config['TAREAS_DIR'] = app.config['TAREAS_DIR'] or os.path.join(app.instance_path, 'tareas')
+
+    db.init_app(app)
+    bd.init_app(app)
+    login_manager.init_app(app)
+    if os.getenv('FLASK_RUN_FROM_CLI'):
+        # Flask-Migrate arrastra alembic: solo hace falta para `flask db`, nunca en los workers
+        from flask_migrate import Migrate
+        Migrate(app, db, include_object=incluir_en_migraciones)
+
+    cache_codigos.configurar(app.config['CACHE_CODIGOS_MAX'], ttl=app.config['CACHE_CODIGOS_TTL'])
+    cache_versiones.configurar(1000, ttl=app.config['CACHE_VERSIONES_TTL'])
+    cache_fragmentos.configurar(app.config['CACHE_FRAGMENTOS_MAX'])
+    cache_analisis.configurar(app.config['ANALISIS_CACHE_MAX'], ttl=app.config['ANALISIS_CACHE_TTL'])
+    app.config['FIRMA_PLANTILLAS'] = firma_plantillas(app)
+    canal_stock.init_app(app)
+    metricas.init_app(app)
+
+    for bp in BLUEPRINTS: app.register_blueprint(bp)
+    return app
+
+def precargar(app):
+    """Hace antes del fork el trabajo que cada worker haría en sus primeras peticiones: mapeos del ORM y plantillas compiladas."""
+    from sqlalchemy.orm import configure_mappers
+    configure_mappers()
+    for plantilla in app.jinja_env.list_templates():
+        app.jinja_env.get_template(plantilla)
@@ -0,0 +1,8 @@
+from . import create_app
+
+
+# -----------------------------------------------------
+# EJECUCIÓN LOCAL (python -m app)
+# -----------------------------------------------------
+if __name__ == '__main__':
+    create_app().run(host='0.0.0.0', port=5000, debug=True)
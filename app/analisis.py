@@ -0,0 +1,199 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, case, event, extract, func, or_, select
+
+from .archivo import mes_siguiente, meses_archivados, recibos_archivados
+from .cache import CacheLRU
+from .extensions import db
+from .models import Inventario, Recibo, ResumenDiario, Venta, casino_por_defecto, id_casino
+
+
+# -----------------------------------------------------
+# ANÁLISIS: COMPARATIVOS, RANKINGS Y MAPA DE CALOR
+# -----------------------------------------------------
+# /analisis solo dibuja filtros y contenedores; los datos salen de /api/analisis,
+# que resuelve cada bloque con una consulta agregada sobre todos los periodos a
+# la vez (SUM(CASE ...) por periodo, RANK() OVER para los rankings): totales del
+# resumen diario, serie diaria, top de productos, ventas por vendedor y mapa de
+# calor hora x día de la semana. Los periodos de comparación son el mismo rango
+# una semana antes y 52 semanas antes (mismos días de la semana).
+#
+# El resultado se guarda por (casino, rango, top) en cache_analisis. Toda
+# escritura que cambia estos números pasa por acumular_resumen, que anota el
+# (casino, día): al confirmar se descartan las entradas de ese casino cuyo algún
+# periodo incluye el día. ANALISIS_CACHE_TTL acota lo que ven otros workers.
+PERIODOS_COMPARACION = {'semana_anterior': timedelta(days=7), 'anio_anterior': timedelta(days=364)}
+CAMPOS_RESUMEN = ('ingresos', 'compras', 'gastos', 'inversiones', 'refrigerios', 'costo_ventas')
+DIAS_SEMANA = ['Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom']
+cache_analisis = CacheLRU()  # ANALISIS_CACHE_MAX entradas, ANALISIS_CACHE_TTL segundos
+
+def rango_analisis(args):
+    """(casino, inicio, fin) de los filtros de /analisis; `fin` es exclusivo. Por defecto los últimos 30 días."""
+    hoy = datetime.utcnow()
+    inicio = datetime.strptime(args.get('fecha_inicio', (hoy - timedelta(days=30)).strftime('%Y-%m-%d')), '%Y-%m-%d')
+    fin = datetime.strptime(args.get('fecha_fin', hoy.strftime('%Y-%m-%d')), '%Y-%m-%d') + timedelta(days=1)
+    return args.get('casino', casino_por_defecto()), inicio, fin
+
+def margenes_por_producto(casino, inicio, fin):
+    """Unidades, ventas, costo de ventas y margen por producto, con el costo congelado en cada línea.
+
+    Las líneas sin costo (NULL) se cuentan en `sin_costo` y quedan fuera del
+    margen: no se toman como vendidas a costo cero.
+    """
+    filas = defaultdict(lambda: {'cantidad': 0, 'ingresos': 0, 'costo': 0, 'sin_costo': 0, 'ingresos_sin_costo': 0})
+    consulta = (db.session.query(Venta.producto_id, func.sum(Venta.cantidad), func.sum(Venta.total), func.sum(Venta.cantidad * Venta.costo_unitario),
+                                 func.count(Venta.id) - func.count(Venta.costo_unitario), func.sum(case((Venta.costo_unitario.is_(None), Venta.total), else_=0)))
+                .filter(Venta.casino == casino, Venta.fecha >= inicio, Venta.fecha < fin).group_by(Venta.producto_id))
+    for producto_id, cantidad, ingresos, costo, sin_costo, ingresos_sin_costo in consulta:
+        fila = filas[producto_id]; fila['cantidad'] += cantidad or 0; fila['ingresos'] += ingresos or 0; fila['costo'] += costo or 0
+        fila['sin_costo'] += sin_costo; fila['ingresos_sin_costo'] += ingresos_sin_costo or 0
+    for recibo in recibos_archivados('ventas', casino, inicio, fin):
+        for linea in recibo['lineas']:
+            fila = filas[linea['producto_id']]; fila['cantidad'] += linea['cantidad']; fila['ingresos'] += linea['total']
+            if linea.get('costo_unitario') is None: fila['sin_costo'] += 1; fila['ingresos_sin_costo'] += linea['total']
+            else: fila['costo'] += linea['cantidad'] * linea['costo_unitario']
+    productos = {p.id: p for p in Inventario.query.filter(Inventario.id.in_(list(filas)))} if filas else {}
+    reporte = []
+    for producto_id, fila in filas.items():
+        producto = productos.get(producto_id); costeados = fila['ingresos'] - fila['ingresos_sin_costo']; margen = costeados - fila['costo']
+        reporte.append(dict(fila, producto_id=producto_id, nombre=producto.nombre if producto else f'#{producto_id}', unidad=producto.unidad if producto else '',
+                            margen=margen, margen_pct=margen / costeados * 100 if costeados else None,
+                            costo_actual=(producto.costo_promedio or None) if producto else None, precio_actual=producto.precio if producto else None))
+    return sorted(reporte, key=lambda r: r['margen'], reverse=True)
+
+def periodos_analisis(inicio, fin):
+    return {'actual': (inicio, fin), **{nombre: (inicio - desfase, fin - desfase) for nombre, desfase in PERIODOS_COMPARACION.items()}}
+
+def _en_periodo(columna, periodo, por_dia=False):
+    desde, hasta = periodo
+    if por_dia: desde, hasta = desde.date(), hasta.date()
+    return and_(columna >= desde, columna < hasta)
+
+def _variacion(actual, anterior):
+    return round((actual - anterior) / abs(anterior) * 100, 1) if anterior else None
+
+def _dia_semana_y_hora(columna):
+    """(día de la semana 0=domingo, hora) de un DateTime en SQL, según el motor."""
+    dialecto = db.engine.dialect.name
+    if dialecto == 'sqlite': return func.strftime('%w', columna), func.strftime('%H', columna)
+    if dialecto == 'postgresql': return extract('dow', columna), extract('hour', columna)
+    return func.dayofweek(columna) - 1, func.hour(columna)  # MySQL: DAYOFWEEK empieza en 1 = domingo
+
+def _totales_por_periodo(casino, periodos):
+    condiciones = {p: _en_periodo(ResumenDiario.dia, rango, por_dia=True) for p, rango in periodos.items()}
+    fila = (db.session.query(*[func.sum(case((condiciones[p], getattr(ResumenDiario, campo)), else_=0)) for p in periodos for campo in CAMPOS_RESUMEN])
+            .filter(ResumenDiario.casino == casino, or_(*condiciones.values())).one())
+    valores = iter(fila); totales = {}
+    for p in periodos:
+        t = {campo: float(next(valores) or 0) for campo in CAMPOS_RESUMEN}
+        t.update(costos=t['compras'] + t['gastos'] + t['inversiones'], ganancia_bruta=t['ingresos'] - t['costo_ventas'])
+        t['margen_bruto'] = round(t['ganancia_bruta'] / t['ingresos'] * 100, 1) if t['ingresos'] else None
+        totales[p] = t
+    return totales
+
+def _serie_diaria(casino, periodos):
+    """Ingresos por día del rango y, alineados por día de la semana, los de 52 semanas antes."""
+    (inicio, fin), desfase = periodos['actual'], PERIODOS_COMPARACION['anio_anterior']
+    filas = dict(db.session.query(ResumenDiario.dia, ResumenDiario.ingresos).filter(
+        ResumenDiario.casino == casino, or_(_en_periodo(ResumenDiario.dia, periodos['actual'], True), _en_periodo(ResumenDiario.dia, periodos['anio_anterior'], True))))
+    dias = [inicio.date() + timedelta(days=i) for i in range((fin - inicio).days)]
+    return {'labels': [d.strftime('%d/%m') for d in dias], 'actual': [float(filas.get(d) or 0) for d in dias],
+            'anio_anterior': [float(filas.get(d - desfase) or 0) for d in dias]}
+
+def _top_productos(casino, periodos, limite):
+    """Ventas por producto en cada periodo con su puesto por ingresos y por cantidad en el actual; limite=None trae todos."""
+    condiciones = {p: _en_periodo(Venta.fecha, rango) for p, rango in periodos.items()}
+    ingresos = {p: func.sum(case((condiciones[p], Venta.total), else_=0)) for p in periodos}
+    cantidad = func.sum(case((condiciones['actual'], Venta.cantidad), else_=0))
+    agregado = (select(Venta.producto_id, cantidad.label('cantidad'), *[ingresos[p].label(f'ingresos_{p}') for p in periodos],
+                       func.rank().over(order_by=ingresos['actual'].desc()).label('puesto_ingresos'),
+                       func.rank().over(order_by=cantidad.desc()).label('puesto_cantidad'))
+                .where(Venta.casino == casino, or_(*condiciones.values())).group_by(Venta.producto_id).subquery())
+    consulta = (select(agregado, Inventario.nombre, Inventario.unidad).join(Inventario, Inventario.id == agregado.c.producto_id)
+                .where(or_(agregado.c.ingresos_actual > 0, agregado.c.cantidad > 0)))
+    if limite: consulta = consulta.where(or_(agregado.c.puesto_ingresos <= limite, agregado.c.puesto_cantidad <= limite))
+    return {f.producto_id: dict(f._mapping) for f in db.session.execute(consulta)}
+
+def _ventas_por_vendedor(casino, periodos):
+    condiciones = {p: _en_periodo(Recibo.fecha, rango) for p, rango in periodos.items()}
+    consulta = (db.session.query(Recibo.vendedor, func.sum(case((condiciones['actual'], 1), else_=0)).label('recibos'),
+                                 *[func.sum(case((condiciones[p], Recibo.total), else_=0)).label(f'ingresos_{p}') for p in periodos])
+                .filter(Recibo.casino == casino, or_(*condiciones.values())).group_by(Recibo.vendedor))
+    return {f.vendedor: dict(f._mapping) for f in consulta}
+
+def _mapa_calor(casino, periodo):
+    """{(día 0=domingo, hora): [ingresos, recibos]} del periodo, en hora UTC."""
+    dia_semana, hora = _dia_semana_y_hora(Venta.fecha)
+    consulta = (db.session.query(dia_semana, hora, func.sum(Venta.total), func.count(func.distinct(Venta.recibo_id)))
+                .filter(Venta.casino == casino, _en_periodo(Venta.fecha, periodo)).group_by(dia_semana, hora))
+    return {(int(d), int(h)): [float(total or 0), recibos] for d, h, total, recibos in consulta}
+
+def analisis_multiperiodo(casino, inicio, fin, top):
+    periodos = periodos_analisis(inicio, fin)
+    # Los meses archivados no están en venta/recibo: si algún periodo los toca se suman desde los archivos
+    meses = meses_archivados('ventas', id_casino(casino))
+    archivados = {p: list(recibos_archivados('ventas', casino, *rango)) for p, rango in periodos.items()
+                  if any(mes < rango[1].date() and mes_siguiente(mes) > rango[0].date() for mes in meses)}
+
+    productos = _top_productos(casino, periodos, None if archivados else top)
+    vendedores = _ventas_por_vendedor(casino, periodos)
+    celdas = _mapa_calor(casino, periodos['actual'])
+    for p, recibos in archivados.items():
+        for recibo in recibos:
+            fila = vendedores.setdefault(recibo['vendedor'], dict({f'ingresos_{q}': 0 for q in periodos}, vendedor=recibo['vendedor'], recibos=0))
+            fila[f'ingresos_{p}'] += recibo['total']
+            if p == 'actual':
+                fila['recibos'] += 1
+                celda = celdas.setdefault((int(recibo['fecha'].strftime('%w')), recibo['fecha'].hour), [0, 0]); celda[0] += recibo['total']; celda[1] += 1
+            for linea in recibo['lineas']:
+                producto = productos.setdefault(linea['producto_id'], dict({f'ingresos_{q}': 0 for q in periodos}, producto_id=linea['producto_id'], nombre=linea['producto'], unidad=linea.get('unidad'), cantidad=0))
+                producto[f'ingresos_{p}'] += linea['total']
+                if p == 'actual': producto['cantidad'] += linea['cantidad']
+    # Los archivos anteriores a guardar `unidad` no la traen: se toma del inventario
+    sin_unidad = [pid for pid, f in productos.items() if f['unidad'] is None]
+    if sin_unidad:
+        unidades = dict(db.session.query(Inventario.id, Inventario.unidad).filter(Inventario.id.in_(sin_unidad)))
+        for pid in sin_unidad: productos[pid]['unidad'] = unidades.get(pid, '')
+
+    def fila_producto(f):
+        return {'producto_id': f['producto_id'], 'nombre': f['nombre'], 'unidad': f['unidad'], 'cantidad': float(f['cantidad'] or 0),
+                **{f'ingresos_{p}': round(float(f[f'ingresos_{p}'] or 0), 2) for p in periodos}}
+    vigentes = [f for f in productos.values() if f['ingresos_actual'] or f['cantidad']]
+    # Mapa de calor en hora local: la grilla de 7 x 24 se rota ANALISIS_UTC_OFFSET horas; filas de lunes a domingo
+    desfase = current_app.config['ANALISIS_UTC_OFFSET']; ingresos_calor = [[0.0] * 24 for _ in range(7)]; recibos_calor = [[0] * 24 for _ in range(7)]
+    for (dia, hora), (total, recibos) in celdas.items():
+        local = (dia * 24 + hora + desfase) % 168; fila = (local // 24 - 1) % 7
+        ingresos_calor[fila][local % 24] += round(total, 2); recibos_calor[fila][local % 24] += recibos
+    totales = _totales_por_periodo(casino, periodos)
+    return {
+        'casino': casino,
+        'periodos': {p: {'desde': a.strftime('%Y-%m-%d'), 'hasta': (b - timedelta(days=1)).strftime('%Y-%m-%d')} for p, (a, b) in periodos.items()},
+        'totales': totales,
+        'variacion': {p: {c: _variacion(totales['actual'][c], totales[p][c]) for c in ('ingresos', 'ganancia_bruta', 'costos', 'refrigerios')} for p in PERIODOS_COMPARACION},
+        'ventas_por_dia': _serie_diaria(casino, periodos),
+        'top_productos': {
+            'por_ingresos': [fila_producto(f) for f in sorted(vigentes, key=lambda f: f['ingresos_actual'], reverse=True)[:top]],
+            'por_cantidad': [fila_producto(f) for f in sorted(vigentes, key=lambda f: f['cantidad'], reverse=True)[:top]],
+        },
+        'vendedores': sorted(({'vendedor': v['vendedor'], 'recibos': int(v['recibos'] or 0),
+                               'ticket_promedio': round(float(v['ingresos_actual']) / v['recibos'], 2) if v['recibos'] else None,
+                               **{f'ingresos_{p}': round(float(v[f'ingresos_{p}'] or 0), 2) for p in periodos}} for v in vendedores.values()),
+                             key=lambda v: v['ingresos_actual'], reverse=True),
+        'mapa_calor': {'dias': DIAS_SEMANA, 'horas': list(range(24)), 'ingresos': ingresos_calor, 'recibos': recibos_calor, 'utc_offset': desfase},
+        'incluye_archivo': bool(archivados),
+    }
+
+def _periodos_afectados(clave, casino, dia):
+    casino_clave, inicio, fin, _ = clave
+    return casino_clave == casino and any(a.date() <= dia < b.date() for a, b in periodos_analisis(inicio, fin).values())
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidar_analisis_en_commit(session):
+    for casino, dia in session.info.pop('dias_resumen', ()):
+        cache_analisis.invalidar_si(lambda clave: _periodos_afectados(clave, casino, dia))
+
+@event.listens_for(db.session, 'after_rollback')
+def _descartar_dias_resumen(session):
+    session.info.pop('dias_resumen', None)
@@ -0,0 +1,133 @@
+import glob
+import gzip
+import json
+import os
+import shutil
+from collections import defaultdict
+from datetime import date, datetime
+
+from flask import current_app
+from sqlalchemy import exists, func
+
+from .extensions import db
+from .models import Compra, Inventario, Recibo, ReciboCompra, ResumenDiario, Venta, id_casino, nombre_casino
+
+
+# -----------------------------------------------------
+# ARCHIVO DE MESES CERRADOS
+# -----------------------------------------------------
+# `flask archivar-meses` saca de la base los recibos (y sus líneas) de ventas y
+# compras de los meses anteriores a ARCHIVO_MESES_ACTIVOS y los guarda en
+# ARCHIVO_DIR/<entidad>/<casino_id>/<AAAA-MM>.jsonl.gz, un recibo por línea.
+# Antes de borrar se fijan en ResumenDiario los totales de cada día del mes, así
+# /analisis no cambia; las exportaciones, el pronóstico y la reconstrucción de
+# resúmenes leen los archivos cuando el rango llega a esos meses. Si después
+# llegan recibos de un mes ya archivado (POS sin conexión), se vuelve a archivar
+# y se anexa otro miembro gzip al archivo, sin reescribir lo que ya tenía.
+ARCHIVABLES = {
+    # entidad: (cabecera, línea, columna del recibo en la línea, campo del resumen, campos de cabecera, campos de línea)
+    'ventas': (Recibo, Venta, Venta.recibo_id, 'ingresos', ('uuid', 'total', 'pago', 'cambio', 'vendedor'), ('producto_id', 'cantidad', 'total', 'costo_unitario')),
+    'compras': (ReciboCompra, Compra, Compra.recibo_compra_id, 'compras', ('uuid', 'total', 'proveedor', 'comprador'), ('producto_id', 'cantidad', 'costo_unitario')),
+}
+RECIBOS_POR_LOTE_ARCHIVO = 500
+
+def mes_siguiente(mes):
+    return date(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+
+def ruta_archivo(entidad, casino_id, mes):
+    return os.path.join(current_app.config['ARCHIVO_DIR'], entidad, str(casino_id), f'{mes:%Y-%m}.jsonl.gz')
+
+def meses_archivados(entidad, casino_id):
+    carpeta = os.path.join(current_app.config['ARCHIVO_DIR'], entidad, str(casino_id))
+    if not os.path.isdir(carpeta): return []
+    return sorted(date.fromisoformat(n[:7] + '-01') for n in os.listdir(carpeta) if n.endswith('.jsonl.gz'))
+
+def leer_archivo(ruta):
+    if not os.path.exists(ruta): return
+    with gzip.open(ruta, 'rt', encoding='utf-8') as f:
+        for linea in f:
+            recibo = json.loads(linea)
+            recibo['fecha'] = datetime.fromisoformat(recibo['fecha'])
+            yield recibo
+
+def recibos_archivados(entidad, casino, desde, hasta):
+    """Recibos archivados (dicts con 'lineas') con desde <= fecha < hasta; casino=None recorre todos."""
+    raiz = os.path.join(current_app.config['ARCHIVO_DIR'], entidad)
+    if casino: casino_ids = [id_casino(casino)]
+    else: casino_ids = [int(c) for c in os.listdir(raiz) if c.isdigit()] if os.path.isdir(raiz) else []
+    for casino_id in casino_ids:
+        for mes in meses_archivados(entidad, casino_id):
+            if mes >= hasta.date() or mes_siguiente(mes) <= desde.date(): continue
+            for recibo in leer_archivo(ruta_archivo(entidad, casino_id, mes)):
+                if desde <= recibo['fecha'] < hasta:
+                    recibo['casino'] = nombre_casino(casino_id)
+                    yield recibo
+
+def _anexar(ruta, segmento, tam):
+    with open(ruta, 'ab') as destino, open(segmento, 'rb') as origen:
+        destino.truncate(tam)  # descarta lo que haya dejado un anexado a medias
+        shutil.copyfileobj(origen, destino); destino.flush(); os.fsync(destino.fileno())
+
+def _reconciliar_segmento(entidad, segmento):
+    ruta, tam, _ = segmento.rsplit('.', 2)
+    try: primero = next(leer_archivo(segmento), None)
+    except (EOFError, OSError): primero = None  # cortado mientras se escribía: el borrado no llegó a confirmarse
+    # Si el primer recibo del segmento ya no está en la base, el borrado se confirmó y falta anexarlo
+    if primero is not None and not db.session.query(exists().where(ARCHIVABLES[entidad][0].uuid == primero['uuid'])).scalar():
+        _anexar(ruta, segmento, int(tam))
+    os.remove(segmento)
+
+def reconciliar_archivos():
+    """Anexa o descarta los segmentos que dejó un archivado interrumpido; devuelve cuántos había."""
+    segmentos = [(entidad, s) for entidad in ARCHIVABLES for s in glob.glob(os.path.join(current_app.config['ARCHIVO_DIR'], entidad, '*', '*.pendiente'))]
+    for entidad, segmento in segmentos: _reconciliar_segmento(entidad, segmento)
+    return len(segmentos)
+
+def archivar_mes(entidad, casino, mes):
+    """Mueve al archivo los recibos de un mes; devuelve cuántos. Fija antes los totales diarios del resumen."""
+    cabecera, linea, columna, campo, campos_cabecera, campos_linea = ARCHIVABLES[entidad]
+    inicio, fin = datetime.combine(mes, datetime.min.time()), datetime.combine(mes_siguiente(mes), datetime.min.time())
+    ruta = ruta_archivo(entidad, id_casino(casino), mes)
+    for segmento in glob.glob(glob.escape(ruta) + '.*.pendiente'): _reconciliar_segmento(entidad, segmento)
+    del_mes = (cabecera.casino == casino, cabecera.fecha >= inicio, cabecera.fecha < fin)
+    ids = [rid for (rid,) in db.session.query(cabecera.id).filter(*del_mes).order_by(cabecera.fecha, cabecera.id)]
+    if not ids: return 0
+
+    # Totales por día de todo el mes: lo que ya estaba archivado más lo que se archiva ahora
+    por_dia = defaultdict(float)
+    for recibo in leer_archivo(ruta): por_dia[recibo['fecha'].date()] += recibo['total']
+    for dia, total in db.session.query(func.date(cabecera.fecha), func.sum(cabecera.total)).filter(*del_mes).group_by(func.date(cabecera.fecha)):
+        por_dia[date.fromisoformat(dia) if isinstance(dia, str) else dia] += total or 0
+    existentes = {r.dia: r for r in ResumenDiario.query.filter(ResumenDiario.casino == casino, ResumenDiario.dia >= mes, ResumenDiario.dia < mes_siguiente(mes))}
+    for dia, resumen in existentes.items(): setattr(resumen, campo, por_dia.get(dia, 0))
+    for dia in por_dia.keys() - existentes.keys():
+        db.session.add(ResumenDiario(casino=casino, dia=dia, **dict({'ingresos': 0, 'compras': 0, 'gastos': 0, 'inversiones': 0, 'refrigerios': 0}, **{campo: por_dia[dia]})))
+
+    # Los recibos se escriben por lotes en un segmento aparte (un miembro gzip
+    # más) que se anexa al archivo después del commit. El nombre lleva el
+    # tamaño previo del archivo: si el proceso se corta, reconciliar_archivos
+    # lo anexa (el borrado se confirmó) o lo descarta (no se confirmó).
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    tam = os.path.getsize(ruta) if os.path.exists(ruta) else 0
+    segmento = f'{ruta}.{tam}.pendiente'
+    try:
+        with open(segmento, 'wb') as bruto:
+            with gzip.GzipFile(fileobj=bruto, mode='wb') as f:
+                for i in range(0, len(ids), RECIBOS_POR_LOTE_ARCHIVO):
+                    lote = ids[i:i + RECIBOS_POR_LOTE_ARCHIVO]
+                    lineas = defaultdict(list)
+                    for rid, *valores, producto, unidad in (db.session.query(columna, *(getattr(linea, c) for c in campos_linea), Inventario.nombre, Inventario.unidad)
+                                                            .join(Inventario, linea.producto_id == Inventario.id).filter(columna.in_(lote)).order_by(linea.id)):
+                        lineas[rid].append(dict(zip(campos_linea, valores), producto=producto, unidad=unidad))
+                    for rid, fecha, *valores in db.session.query(cabecera.id, cabecera.fecha, *(getattr(cabecera, c) for c in campos_cabecera)).filter(cabecera.id.in_(lote)).order_by(cabecera.fecha, cabecera.id):
+                        f.write((json.dumps(dict(zip(campos_cabecera, valores), fecha=fecha.isoformat(), lineas=lineas[rid]), ensure_ascii=False) + '\n').encode('utf-8'))
+                    linea.query.filter(columna.in_(lote)).delete(synchronize_session=False)
+                    cabecera.query.filter(cabecera.id.in_(lote)).delete(synchronize_session=False)
+            bruto.flush(); os.fsync(bruto.fileno())
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        if os.path.exists(segmento): os.remove(segmento)
+        raise
+    _anexar(ruta, segmento, tam); os.remove(segmento)
+    return len(ids)
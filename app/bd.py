@@ -0,0 +1,48 @@
+from flask import g, has_app_context, has_request_context, request
+from sqlalchemy import event
+
+from .extensions import db
+
+
+# -----------------------------------------------------
+# SQLITE: PRAGMA Y TRANSACCIONES DE ESCRITURA
+# -----------------------------------------------------
+# pysqlite abre las transacciones en modo diferido: si una petición lee y luego
+# escribe mientras otro proceso ya escribió, SQLite responde "database is locked"
+# al instante, sin esperar busy_timeout. Por eso las peticiones que modifican
+# (POST, etc.) abren la transacción con BEGIN IMMEDIATE, que toma el bloqueo de
+# escritura al empezar y, si está ocupado, espera. Lo mismo hacen las tareas en
+# segundo plano que escriben (g.tarea_escribe, ver `flask trabajador`). Las
+# lecturas, los comandos y las conexiones marcadas solo_lectura siguen con el
+# modo de pysqlite.
+def init_app(app):
+    # Los motores existen desde db.init_app(); los PRAGMA son los del perfil de esta app
+    pragmas = app.config['SQLITE_PRAGMAS']
+
+    def _pragmas_sqlite(dbapi_conn, registro):
+        cursor = dbapi_conn.cursor()
+        for nombre, valor in pragmas.items():
+            cursor.execute(f'PRAGMA {nombre} = {valor}')
+        cursor.close()
+
+    with app.app_context():
+        for motor in db.engines.values():
+            if motor.dialect.name != 'sqlite': continue
+            event.listen(motor, 'connect', _pragmas_sqlite)
+            event.listen(motor, 'begin', _begin_sqlite)
+
+def _begin_sqlite(conn):
+    if conn.get_execution_options().get('solo_lectura'): return
+    if (has_request_context() and request.method not in ('GET', 'HEAD', 'OPTIONS')) or (has_app_context() and g.get('tarea_escribe')):
+        conn.exec_driver_sql('BEGIN IMMEDIATE')  # pysqlite ve la transacción abierta y no emite su propio BEGIN
+
+def insert_con_conflicto(modelo):
+    """INSERT con soporte de ON CONFLICT según el motor, o None si no lo tiene."""
+    dialecto = db.engine.dialect.name
+    if dialecto == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialecto == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert(modelo)
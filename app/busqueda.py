@@ -0,0 +1,106 @@
+import unicodedata
+
+from sqlalchemy import bindparam, case, column, event, func, literal_column, select, table, text
+from sqlalchemy import inspect as sa_inspect
+
+from .extensions import db
+from .models import CasinoRef, Inventario
+
+
+# -----------------------------------------------------
+# BÚSQUEDA DE PRODUCTOS
+# -----------------------------------------------------
+# Inventario.nombre_busqueda guarda el nombre sin acentos y en minúsculas. En
+# SQLite lo indexa la tabla FTS5 `inventario_fts` (tokenizador trigram,
+# mantenida por triggers); en PostgreSQL un índice GIN con pg_trgm. En ambos
+# casos sirve para buscar cualquier parte del nombre; otros motores usan LIKE.
+SQL_INDICE_BUSQUEDA = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS inventario_fts USING fts5(nombre_busqueda, casino_id UNINDEXED, content='inventario', content_rowid='id', tokenize='trigram')",
+        "CREATE TRIGGER IF NOT EXISTS inventario_fts_ai AFTER INSERT ON inventario BEGIN "
+        "INSERT INTO inventario_fts(rowid, nombre_busqueda, casino_id) VALUES (new.id, new.nombre_busqueda, new.casino_id); END",
+        "CREATE TRIGGER IF NOT EXISTS inventario_fts_ad AFTER DELETE ON inventario BEGIN "
+        "INSERT INTO inventario_fts(inventario_fts, rowid, nombre_busqueda, casino_id) VALUES ('delete', old.id, old.nombre_busqueda, old.casino_id); END",
+        "CREATE TRIGGER IF NOT EXISTS inventario_fts_au AFTER UPDATE OF nombre_busqueda, casino_id ON inventario BEGIN "
+        "INSERT INTO inventario_fts(inventario_fts, rowid, nombre_busqueda, casino_id) VALUES ('delete', old.id, old.nombre_busqueda, old.casino_id); "
+        "INSERT INTO inventario_fts(rowid, nombre_busqueda, casino_id) VALUES (new.id, new.nombre_busqueda, new.casino_id); END",
+        "INSERT INTO inventario_fts(inventario_fts) VALUES ('rebuild')",
+    ],
+    'postgresql': [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX IF NOT EXISTS ix_inventario_nombre_busqueda_trgm ON inventario USING gin (nombre_busqueda gin_trgm_ops)",
+    ],
+}
+_indice_busqueda = {}
+BUSQUEDA_CANDIDATOS = 500
+_fts = table('inventario_fts', column('rowid'), column('nombre_busqueda'), column('casino_id', CasinoRef))
+
+def normalizar_busqueda(texto):
+    texto = unicodedata.normalize('NFKD', texto or '')
+    return ' '.join(''.join(c for c in texto if not unicodedata.combining(c)).lower().split())
+
+def _motor_busqueda():
+    """'fts5', 'trgm' o 'like' según el motor y si existe el índice (se consulta una vez por proceso)."""
+    url = str(db.engine.url)
+    if url not in _indice_busqueda:
+        dialecto = db.engine.dialect.name
+        if dialecto == 'sqlite': _indice_busqueda[url] = 'fts5' if sa_inspect(db.engine).has_table('inventario_fts') else 'like'
+        else: _indice_busqueda[url] = 'trgm' if dialecto == 'postgresql' else 'like'
+    return _indice_busqueda[url]
+
+def _like(texto):
+    return texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def buscar_en_inventario(casino, q, limite=10):
+    """Productos del casino cuyo nombre contiene todas las palabras de `q`.
+
+    Primero los que empiezan por `q` (orden alfabético, por el índice casino+nombre_busqueda); después,
+    si faltan, los que lo contienen: con una palabra que empieza por `q` antes y los nombres cortos antes.
+    Con menos de 3 letras solo se busca por prefijo.
+    """
+    q = normalizar_busqueda(q)
+    nb = Inventario.nombre_busqueda
+    motor = _motor_busqueda()
+    empieza = nb.like(f'{_like(q)}%', escape='\\')
+    prefijo = Inventario.query.filter(Inventario.casino == casino, Inventario.activo, empieza)
+    if motor == 'fts5': prefijo = prefijo.filter(nb >= q, nb < q + '\U0010ffff')  # SQLite compara binario: rango sobre el índice
+    productos = prefijo.order_by(nb).limit(limite).all()
+    if len(productos) >= limite or len(q) < 3: return productos
+
+    palabras = q.split()
+    resto = Inventario.query.filter(Inventario.activo, ~empieza)
+    largas = [p for p in palabras if len(p) >= 3]
+    if motor == 'fts5' and largas:
+        # Cada palabra de 3+ letras es una frase trigram; las más cortas se filtran con LIKE. Todo (casino
+        # incluido) va dentro de la subconsulta para que SQLite recorra solo las coincidencias, y se ordenan
+        # únicamente las primeras BUSQUEDA_CANDIDATOS.
+        patron = ' '.join('"%s"' % p.replace('"', '""') for p in largas)
+        candidatos = select(_fts.c.rowid).where(literal_column('inventario_fts').match(patron), _fts.c.casino_id == casino,
+                                                *[_fts.c.nombre_busqueda.like(f'%{_like(p)}%', escape='\\') for p in palabras if len(p) < 3])
+        resto = resto.filter(Inventario.id.in_(candidatos.limit(BUSQUEDA_CANDIDATOS)))
+        palabras = []
+    else:
+        resto = resto.filter(Inventario.casino == casino)
+    for palabra in palabras:
+        resto = resto.filter(nb.like(f'%{_like(palabra)}%', escape='\\'))
+    orden = [case((nb.like(f'% {_like(q)}%', escape='\\'), 0), else_=1)]
+    if motor == 'trgm': orden.append(func.similarity(nb, q).desc())
+    return productos + resto.order_by(*orden, func.length(nb), nb).limit(limite - len(productos)).all()
+
+@event.listens_for(db.session, 'before_flush')
+def _normalizar_nombres_en_flush(session, flush_context, instances):
+    for obj in (*session.new, *session.dirty):
+        if isinstance(obj, Inventario) and obj.nombre is not None:
+            normalizado = normalizar_busqueda(obj.nombre)
+            if obj.nombre_busqueda != normalizado: obj.nombre_busqueda = normalizado
+
+def reconstruir_indice_busqueda():
+    """Recalcula nombre_busqueda y crea/reconstruye el índice de búsqueda del motor actual; devuelve (productos, motor)."""
+    tabla = Inventario.__table__
+    filas = [{'b_id': pid, 'b_n': normalizar_busqueda(nombre)} for pid, nombre in db.session.query(Inventario.id, Inventario.nombre)]
+    if filas: db.session.execute(tabla.update().where(tabla.c.id == bindparam('b_id')).values(nombre_busqueda=bindparam('b_n')), filas)
+    for sentencia in SQL_INDICE_BUSQUEDA.get(db.engine.dialect.name, []):
+        db.session.execute(text(sentencia))
+    db.session.commit()
+    _indice_busqueda.clear()
+    return len(filas), _motor_busqueda()
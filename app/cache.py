@@ -0,0 +1,66 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+# -----------------------------------------------------
+# CACHÉ LRU EN PROCESO
+# -----------------------------------------------------
+# Las cachés son globales del módulo que las usa y nacen vacías y sin
+# capacidad; create_app() les da tamaño y TTL desde la configuración.
+class CacheLRU:
+    """Caché acotada con expulsión LRU, TTL opcional y contadores de aciertos."""
+    def __init__(self, capacidad=0, ttl=None):
+        self.capacidad = capacidad
+        self.ttl = ttl
+        self.datos = OrderedDict()
+        self.lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def configurar(self, capacidad, ttl=None):
+        with self.lock:
+            self.capacidad, self.ttl = capacidad, ttl
+            self.datos.clear()
+
+    def obtener(self, clave):
+        """Devuelve (encontrado, valor); el valor cacheado puede ser None."""
+        with self.lock:
+            entrada = self.datos.get(clave)
+            if entrada is None or (entrada[0] is not None and entrada[0] < time.monotonic()):
+                if entrada is not None: del self.datos[clave]
+                self.fallos += 1
+                return False, None
+            self.datos.move_to_end(clave)
+            self.aciertos += 1
+            return True, entrada[1]
+
+    def guardar(self, clave, valor):
+        expira = time.monotonic() + self.ttl if self.ttl else None
+        with self.lock:
+            self.datos[clave] = (expira, valor)
+            self.datos.move_to_end(clave)
+            while len(self.datos) > self.capacidad:
+                self.datos.popitem(last=False)
+
+    def invalidar(self, clave):
+        with self.lock:
+            self.datos.pop(clave, None)
+
+    def invalidar_si(self, condicion):
+        """Quita las entradas cuya clave cumple `condicion(clave)`; devuelve cuántas."""
+        with self.lock:
+            claves = [clave for clave in self.datos if condicion(clave)]
+            for clave in claves: del self.datos[clave]
+            return len(claves)
+
+    def limpiar(self):
+        with self.lock:
+            self.datos.clear()
+
+    def exportar(self, nombre):
+        with self.lock:
+            return (f'# TYPE {nombre}_aciertos_total counter\n{nombre}_aciertos_total {self.aciertos}\n'
+                    f'# TYPE {nombre}_fallos_total counter\n{nombre}_fallos_total {self.fallos}\n'
+                    f'# TYPE {nombre}_entradas gauge\n{nombre}_entradas {len(self.datos)}\n'
+                    f'# TYPE {nombre}_capacidad gauge\n{nombre}_capacidad {self.capacidad}\n')
@@ -0,0 +1,209 @@
+import queue
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import event, select
+from sqlalchemy import inspect as sa_inspect
+
+from .bd import insert_con_conflicto
+from .cache import CacheLRU
+from .extensions import db
+from .models import ContadorVersion, Inventario, ProductoEliminado
+
+
+# -----------------------------------------------------
+# CACHÉ DE CÓDIGOS DE BARRAS
+# -----------------------------------------------------
+# Clave (casino, codigo_barras) -> datos del producto, o None si no existe.
+# Cualquier flush que toque un Inventario invalida sus claves (también las
+# anteriores si cambió código o casino) y se vuelve a invalidar tras el commit.
+# El TTL acota lo que puede quedar desactualizado en otros workers.
+cache_codigos = CacheLRU()  # CACHE_CODIGOS_MAX entradas, CACHE_CODIGOS_TTL segundos
+
+def producto_a_dict(producto):
+    return {'id': producto.id, 'nombre': producto.nombre, 'codigo_barras': producto.codigo_barras, 'precio': producto.precio, 'stock': producto.cantidad, 'unidad': producto.unidad}
+
+def claves_cache(producto):
+    estado = sa_inspect(producto)
+    casinos = {producto.casino, *estado.attrs.casino.history.deleted}
+    codigos = {producto.codigo_barras, *estado.attrs.codigo_barras.history.deleted}
+    return {(casino, codigo) for casino in casinos for codigo in codigos if codigo}
+
+def invalidar_codigos(claves):
+    for clave in claves: cache_codigos.invalidar(clave)
+    db.session.info.setdefault('codigos_modificados', set()).update(claves)
+
+@event.listens_for(db.session, 'before_flush')
+def _invalidar_codigos_en_flush(session, flush_context, instances):
+    claves = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Inventario): claves |= claves_cache(obj)
+    if claves: invalidar_codigos(claves)
+
+@event.listens_for(db.session, 'before_flush')
+def _versionar_productos_en_flush(session, flush_context, instances):
+    for obj in (*session.new, *session.dirty):
+        if isinstance(obj, Inventario) and (obj in session.new or session.is_modified(obj)):
+            obj.version = siguiente_version('inventario', obj.casino)
+            # Si cambió de casino, para el casino anterior es una baja
+            for casino_anterior in sa_inspect(obj).attrs.casino.history.deleted:
+                if obj.id and casino_anterior != obj.casino: registrar_baja_producto(obj.id, casino_anterior)
+    for obj in session.deleted:
+        if isinstance(obj, Inventario): registrar_baja_producto(obj.id, obj.casino)
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidar_codigos_en_commit(session):
+    for clave in session.info.pop('codigos_modificados', ()): cache_codigos.invalidar(clave)
+
+@event.listens_for(db.session, 'after_rollback')
+def _descartar_codigos_pendientes(session):
+    session.info.pop('codigos_modificados', None)
+
+# -----------------------------------------------------
+# CATÁLOGO VERSIONADO
+# -----------------------------------------------------
+# Cada casino tiene un contador por tabla que sube una vez por transacción que
+# la modifica; las filas de Inventario guardan la versión en que cambiaron y
+# las bajas quedan en producto_eliminado. El UPDATE del contador bloquea su
+# fila hasta el commit, así las versiones se confirman en orden y un POS que
+# pide `?since=N` no se salta cambios de transacciones que aún no terminaban.
+# (tabla, casino) -> (versión, modificado) de los listados condicionales (ver app/listados.py)
+cache_versiones = CacheLRU()
+
+def siguiente_version(tabla, casino):
+    """Versión asignada a la transacción actual para (tabla, casino)."""
+    versiones = db.session.info.setdefault('versiones', {})
+    if (tabla, casino) not in versiones:
+        conn = db.session.connection(); t = ContadorVersion.__table__; ahora = datetime.utcnow()
+        stmt = insert_con_conflicto(ContadorVersion)
+        if stmt is not None:
+            conn.execute(stmt.values(tabla=tabla, casino_id=casino, version=1, modificado=ahora).on_conflict_do_update(index_elements=[t.c.tabla, t.c.casino_id], set_={'version': t.c.version + 1, 'modificado': ahora}))
+        elif conn.execute(t.update().where(t.c.tabla == tabla, t.c.casino_id == casino).values(version=t.c.version + 1, modificado=ahora)).rowcount == 0:
+            conn.execute(t.insert().values(tabla=tabla, casino_id=casino, version=1, modificado=ahora))
+        versiones[(tabla, casino)] = conn.execute(select(t.c.version).where(t.c.tabla == tabla, t.c.casino_id == casino)).scalar()
+    return versiones[(tabla, casino)]
+
+def version_actual(tabla, casino):
+    return db.session.query(ContadorVersion.version).filter_by(tabla=tabla, casino=casino).scalar() or 0
+
+def versionar_productos(productos):
+    """Marca con la versión de la transacción productos modificados fuera del ORM."""
+    por_casino = defaultdict(list)
+    for producto in productos: por_casino[producto.casino].append(producto.id)
+    tabla = Inventario.__table__
+    for casino, ids in por_casino.items():
+        db.session.execute(tabla.update().where(tabla.c.id.in_(ids)).values(version=siguiente_version('inventario', casino)))
+    for producto in productos: db.session.expire(producto, ['version'])
+
+def registrar_baja_producto(producto_id, casino):
+    db.session.connection().execute(ProductoEliminado.__table__.insert().values(producto_id=producto_id, casino_id=casino, version=siguiente_version('inventario', casino)))
+
+@event.listens_for(db.session, 'after_commit')
+def _olvidar_versiones_confirmadas(session):
+    versiones = session.info.pop('versiones', None)
+    for clave in versiones or (): cache_versiones.invalidar(clave)
+    if versiones and any(tabla == 'inventario' for tabla, _ in versiones): canal_stock.notificar()
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _olvidar_versiones(session, previous_transaction):
+    session.info.pop('versiones', None)
+
+# -----------------------------------------------------
+# STOCK EN VIVO (SERVER-SENT EVENTS)
+# -----------------------------------------------------
+# Un solo hilo publicador por worker revisa el contador de versión del
+# inventario de los casinos con cajas conectadas (una consulta por intervalo,
+# o al instante tras un commit en este mismo worker) y reparte los cambios a
+# las colas en memoria de cada conexión. Las cajas nunca consultan la BD.
+class CanalStock:
+    """Difusión en proceso de cambios de stock y alertas de stock bajo por casino."""
+    def __init__(self, intervalo=1.0, max_conexiones=200, tam_cola=100):
+        self.app = None
+        self.intervalo = intervalo
+        self.max_conexiones = max_conexiones
+        self.tam_cola = tam_cola
+        self.lock = threading.Lock()
+        self.suscriptores = defaultdict(set)
+        self.versiones = {}       # casino -> última versión publicada
+        self.stock_previo = {}    # casino -> {producto_id: stock publicado} (para detectar cruces del mínimo)
+        self.despertar = threading.Event()
+        self.hilo = None
+
+    def init_app(self, app):
+        # El hilo publicador abre su propio contexto de aplicación
+        self.app = app
+        self.intervalo = app.config['STOCK_STREAM_INTERVALO']
+        self.max_conexiones = app.config['STOCK_STREAM_MAX_CONEXIONES']
+
+    def suscribir(self, casino):
+        """Devuelve la cola de eventos de una conexión nueva, o None si se alcanzó el máximo."""
+        with self.lock:
+            if sum(len(c) for c in self.suscriptores.values()) >= self.max_conexiones: return None
+            cola = queue.Queue(maxsize=self.tam_cola)
+            self.suscriptores[casino].add(cola)
+            if self.hilo is None or not self.hilo.is_alive():
+                self.hilo = threading.Thread(target=self._bucle, name='canal-stock', daemon=True)
+                self.hilo.start()
+        return cola
+
+    def desuscribir(self, casino, cola):
+        with self.lock:
+            self.suscriptores[casino].discard(cola)
+            if not self.suscriptores[casino]:
+                del self.suscriptores[casino]
+                self.versiones.pop(casino, None)
+                self.stock_previo.pop(casino, None)
+
+    def notificar(self):
+        self.despertar.set()
+
+    def publicar(self, casino, evento, datos):
+        with self.lock: colas = list(self.suscriptores.get(casino, ()))
+        for cola in colas:
+            try: cola.put_nowait((evento, datos))
+            except queue.Full:
+                # Conexión que no consume: se corta y el navegador se reconecta solo
+                self.desuscribir(casino, cola)
+                try: cola.get_nowait(); cola.put_nowait((None, None))
+                except (queue.Empty, queue.Full): pass
+
+    def _bucle(self):
+        while True:
+            self.despertar.wait(self.intervalo)
+            self.despertar.clear()
+            with self.lock: casinos = list(self.suscriptores)
+            if not casinos: continue
+            try:
+                with self.app.app_context(): self.revisar(casinos)
+            except Exception:
+                self.app.logger.exception('Error al publicar cambios de stock')
+
+    def revisar(self, casinos):
+        versiones = dict(db.session.query(ContadorVersion.casino, ContadorVersion.version).filter(ContadorVersion.tabla == 'inventario', ContadorVersion.casino.in_(casinos)))
+        for casino in casinos:
+            actual = versiones.get(casino, 0); anterior = self.versiones.get(casino)
+            if anterior is not None and actual <= anterior: continue
+            if anterior is None:
+                # Primera revisión desde que se conectó la primera caja: el stock de partida no alerta
+                stock = dict(db.session.query(Inventario.id, Inventario.cantidad).filter(Inventario.casino == casino, Inventario.activo))
+            else:
+                cambiados = Inventario.query.filter(Inventario.casino == casino, Inventario.activo, Inventario.version > anterior).all()
+                eliminados = [pid for (pid,) in db.session.query(ProductoEliminado.producto_id).filter(ProductoEliminado.casino == casino, ProductoEliminado.version > anterior)]
+            alertas = []
+            with self.lock:
+                # Si la última conexión se fue (o volvió) mientras se consultaba, su estado no se toca
+                if casino not in self.suscriptores or self.versiones.get(casino) != anterior: continue
+                self.versiones[casino] = actual
+                if anterior is None:
+                    self.stock_previo[casino] = stock; continue
+                previos = self.stock_previo[casino]
+                for pid in eliminados: previos.pop(pid, None)
+                for p in cambiados:
+                    previo = previos.get(p.id); previos[p.id] = p.cantidad
+                    if p.minimo and p.cantidad < p.minimo and (previo is None or previo >= p.minimo):
+                        alertas.append({'id': p.id, 'nombre': p.nombre, 'stock': p.cantidad, 'minimo': p.minimo, 'unidad': p.unidad})
+            self.publicar(casino, 'stock', {'desde': anterior, 'version': actual, 'completo': False, 'productos': [producto_a_dict(p) for p in cambiados], 'eliminados': eliminados})
+            for alerta in alertas: self.publicar(casino, 'stock_bajo', alerta)
+
+canal_stock = CanalStock()
@@ -0,0 +1,76 @@
+import csv
+import heapq
+import io
+import zlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from .archivo import ARCHIVABLES, recibos_archivados
+from .extensions import db
+from .models import Compra, ConsumoRefrigerio, ConsumoRefrigerioItem, Gasto, Inventario, Inversion, Recibo, ReciboCompra, Venta
+
+
+# -----------------------------------------------------
+# EXPORTACIÓN CSV (STREAMING)
+# -----------------------------------------------------
+# Las filas se leen con un cursor del lado del servidor (yield_per) y se van
+# escribiendo en la respuesta, así la memoria no depende del tamaño del rango.
+FILAS_POR_LOTE_EXPORTACION = 1000
+
+def consulta_exportacion(entidad, casino, desde, hasta):
+    """Devuelve (encabezados, select) para la entidad, o None si no existe."""
+    inicio, fin = datetime.combine(desde, datetime.min.time()), datetime.combine(hasta + timedelta(days=1), datetime.min.time())
+    if entidad == 'ventas':
+        return (['fecha', 'recibo', 'producto', 'cantidad', 'total', 'pago', 'cambio', 'vendedor'],
+                select(Recibo.fecha, Recibo.uuid, Inventario.nombre, Venta.cantidad, Venta.total, Recibo.pago, Recibo.cambio, Recibo.vendedor)
+                .join(Recibo, Venta.recibo_id == Recibo.id).join(Inventario, Venta.producto_id == Inventario.id)
+                .where(Recibo.casino == casino, Recibo.fecha >= inicio, Recibo.fecha < fin).order_by(Recibo.fecha, Recibo.id, Venta.id))
+    if entidad == 'compras':
+        return (['fecha', 'recibo', 'producto', 'cantidad', 'costo_unitario', 'subtotal', 'proveedor', 'comprador'],
+                select(ReciboCompra.fecha, ReciboCompra.uuid, Inventario.nombre, Compra.cantidad, Compra.costo_unitario, Compra.cantidad * Compra.costo_unitario, ReciboCompra.proveedor, ReciboCompra.comprador)
+                .join(ReciboCompra, Compra.recibo_compra_id == ReciboCompra.id).join(Inventario, Compra.producto_id == Inventario.id)
+                .where(ReciboCompra.casino == casino, ReciboCompra.fecha >= inicio, ReciboCompra.fecha < fin).order_by(ReciboCompra.fecha, ReciboCompra.id, Compra.id))
+    if entidad in ('gastos', 'inversiones'):
+        modelo = Gasto if entidad == 'gastos' else Inversion
+        return (['fecha', 'descripcion', 'costo', 'proveedor', 'comprador'],
+                select(modelo.fecha, modelo.descripcion, modelo.costo, modelo.proveedor, modelo.comprador)
+                .where(modelo.casino == casino, modelo.fecha >= inicio, modelo.fecha < fin).order_by(modelo.fecha, modelo.id))
+    if entidad == 'consumos':
+        return (['fecha', 'descripcion', 'refrigerios', 'responsable', 'producto', 'cantidad_consumida'],
+                select(ConsumoRefrigerio.fecha, ConsumoRefrigerio.descripcion, ConsumoRefrigerio.cantidad_total, ConsumoRefrigerio.responsable, Inventario.nombre, ConsumoRefrigerioItem.cantidad_consumida)
+                .outerjoin(ConsumoRefrigerioItem, ConsumoRefrigerioItem.consumo_id == ConsumoRefrigerio.id)
+                .outerjoin(Inventario, ConsumoRefrigerioItem.producto_id == Inventario.id)
+                .where(ConsumoRefrigerio.casino == casino, ConsumoRefrigerio.fecha >= desde, ConsumoRefrigerio.fecha <= hasta)
+                .order_by(ConsumoRefrigerio.fecha, ConsumoRefrigerio.id, ConsumoRefrigerioItem.id))
+    return None
+
+def filas_archivadas_exportacion(entidad, casino, desde, hasta):
+    """Filas de meses archivados con las mismas columnas que consulta_exportacion, en orden de fecha."""
+    if entidad not in ARCHIVABLES: return
+    inicio, fin = datetime.combine(desde, datetime.min.time()), datetime.combine(hasta + timedelta(days=1), datetime.min.time())
+    for r in recibos_archivados(entidad, casino, inicio, fin):
+        for l in r['lineas']:
+            if entidad == 'ventas': yield (r['fecha'], r['uuid'], l['producto'], l['cantidad'], l['total'], r['pago'], r['cambio'], r['vendedor'])
+            else: yield (r['fecha'], r['uuid'], l['producto'], l['cantidad'], l['costo_unitario'], l['cantidad'] * l['costo_unitario'], r['proveedor'], r['comprador'])
+
+def filas_csv(encabezados, consulta, archivadas=()):
+    """Genera el CSV en bloques de texto, leyendo la consulta por lotes e intercalando por fecha las filas archivadas."""
+    buffer = io.StringIO(); escritor = csv.writer(buffer)
+    buffer.write('\ufeff')  # BOM para que Excel detecte UTF-8
+    escritor.writerow(encabezados)
+    resultado = db.session.execute(consulta.execution_options(yield_per=FILAS_POR_LOTE_EXPORTACION))
+    filas = heapq.merge(archivadas, (fila for lote in resultado.partitions() for fila in lote), key=lambda fila: fila[0])
+    for i, fila in enumerate(filas, 1):
+        escritor.writerow(fila)
+        if i % FILAS_POR_LOTE_EXPORTACION == 0:
+            yield buffer.getvalue()
+            buffer.seek(0); buffer.truncate()
+    yield buffer.getvalue()
+
+def comprimir_gzip(bloques):
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: formato gzip
+    for bloque in bloques:
+        datos = compresor.compress(bloque.encode('utf-8'))
+        if datos: yield datos
+    yield compresor.flush()
@@ -0,0 +1,17 @@
+from flask_login import LoginManager
+from flask_sqlalchemy import SQLAlchemy
+
+
+# -----------------------------------------------------
+# EXTENSIONES
+# -----------------------------------------------------
+# Se crean sin app y create_app() las enlaza; así los modelos y los servicios
+# pueden importarlas sin importar la aplicación. Flask-Migrate no está aquí:
+# solo lo necesita `flask db` y lo carga create_app() al correr bajo la CLI.
+db = SQLAlchemy()
+login_manager = LoginManager()
+login_manager.login_view = "principal.dashboard"
+
+def incluir_en_migraciones(obj, nombre, tipo, reflejado, comparado):
+    # Las tablas del índice FTS5 (inventario_fts*) y las particiones de venta (venta_p*) no son modelos: autogenerate no debe borrarlas
+    return not (tipo == 'table' and nombre.startswith(('inventario_fts', 'venta_p')))
@@ -0,0 +1,61 @@
+import json
+import uuid
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, g, jsonify, request
+
+from .extensions import db
+from .models import ClaveIdempotencia
+
+
+# -----------------------------------------------------
+# IDEMPOTENCIA DE REGISTROS
+# -----------------------------------------------------
+# El POS envía `Idempotency-Key` (un UUID por carrito). La respuesta exitosa se
+# guarda en la misma transacción que la venta/compra, así que un reintento con
+# la misma clave devuelve la respuesta original sin volver a descontar stock.
+def es_uuid(valor):
+    try: uuid.UUID(str(valor)); return True
+    except ValueError: return False
+
+def respuesta_previa(clave):
+    """Respuesta guardada para la clave, o None si todavía no se procesó."""
+    registro = db.session.get(ClaveIdempotencia, clave)
+    if not registro: return None
+    if registro.endpoint != request.endpoint:
+        return jsonify({'error': 'La clave de idempotencia ya se usó en otra operación.'}), 422
+    respuesta = jsonify(json.loads(registro.respuesta))
+    respuesta.status_code = registro.estado
+    respuesta.headers['Idempotent-Replayed'] = 'true'
+    return respuesta
+
+def guardar_respuesta_idempotente(cuerpo, estado=200):
+    """Guarda la respuesta de la petición actual; llamar antes del commit."""
+    clave = g.get('clave_idempotencia')
+    if clave:
+        db.session.add(ClaveIdempotencia(clave=clave, endpoint=request.endpoint, estado=estado, respuesta=json.dumps(cuerpo)))
+    return cuerpo
+
+def idempotente(vista):
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        clave = request.headers.get('Idempotency-Key', '').strip()
+        if clave:
+            if len(clave) > 64: return jsonify({'error': 'Idempotency-Key demasiado larga (máx. 64).'}), 400
+            g.clave_idempotencia = clave
+            previa = respuesta_previa(clave)
+            if previa is not None: return previa
+        return vista(*args, **kwargs)
+    return envoltura
+
+def nuevo_recibo_id():
+    # Si el cliente mandó un UUID como clave, se usa también como id del recibo
+    clave = g.get('clave_idempotencia')
+    return clave if clave and es_uuid(clave) else str(uuid.uuid4())
+
+def purgar_claves_idempotencia(horas=None):
+    limite = datetime.utcnow() - timedelta(hours=current_app.config['IDEMPOTENCIA_TTL_HORAS'] if horas is None else horas)
+    eliminadas = ClaveIdempotencia.query.filter(ClaveIdempotencia.creada < limite).delete()
+    db.session.commit()
+    return eliminadas
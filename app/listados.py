@@ -0,0 +1,84 @@
+import os
+import zlib
+from datetime import timezone
+
+from flask import Response, current_app, make_response, render_template, request
+from flask import session as sesion_http
+from markupsafe import Markup
+from sqlalchemy import event
+from sqlalchemy import inspect as sa_inspect
+
+from .cache import CacheLRU
+from .catalogo import cache_versiones, siguiente_version
+from .extensions import db
+from .models import ConsumoRefrigerio, ConsumoRefrigerioItem, ContadorVersion, Gasto, Inversion, id_casino
+
+
+# -----------------------------------------------------
+# LISTADOS CONDICIONALES Y CACHÉ DE FRAGMENTOS
+# -----------------------------------------------------
+# Los listados de inventario, inversiones, gastos y consumos dependen de los
+# contadores de versión de una o más tablas del casino. Con esas versiones se
+# arma el ETag (y con la fecha del último cambio, Last-Modified): si el
+# navegador ya tiene la página responde 304 sin consultar ni renderizar. Si no,
+# la tabla renderizada sale de una caché LRU por (listado, casino, versiones) y
+# solo se renderiza el marco de la página. Las versiones se guardan unos
+# segundos por worker (CACHE_VERSIONES_TTL); un commit en el mismo worker las
+# invalida al instante, y tras un POST con mensaje flash se leen de la BD.
+TABLAS_VERSIONADAS = {Inversion: 'inversion', Gasto: 'gasto', ConsumoRefrigerio: 'consumo'}
+cache_fragmentos = CacheLRU()
+
+def firma_plantillas(app):
+    # Cambia con cada despliegue que toque las plantillas, así un ETag viejo no sirve una página con otro HTML
+    carpeta = os.path.join(app.root_path, app.template_folder)
+    return format(zlib.crc32(''.join(f'{n}:{os.stat(os.path.join(carpeta, n)).st_mtime_ns}' for n in sorted(os.listdir(carpeta))).encode()), 'x')
+
+@event.listens_for(db.session, 'before_flush')
+def _versionar_tablas_en_flush(session, flush_context, instances):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if obj in session.dirty and not session.is_modified(obj): continue
+        if isinstance(obj, ConsumoRefrigerioItem):
+            obj = obj.consumo or (session.get(ConsumoRefrigerio, obj.consumo_id) if obj.consumo_id else None)
+        tabla = TABLAS_VERSIONADAS.get(type(obj))
+        if tabla is None: continue
+        for casino in {obj.casino, *sa_inspect(obj).attrs.casino.history.deleted}:
+            if casino: siguiente_version(tabla, casino)
+
+def versiones_de(tablas, casino):
+    """{tabla: (version, modificado)} del casino; solo consulta las que no están en caché."""
+    resultado, faltan = {}, []
+    for tabla in tablas:
+        encontrado, valor = cache_versiones.obtener((tabla, casino))
+        if encontrado: resultado[tabla] = valor
+        else: faltan.append(tabla)
+    if faltan:
+        filas = {t: (v, m) for t, v, m in db.session.query(ContadorVersion.tabla, ContadorVersion.version, ContadorVersion.modificado)
+                 .filter(ContadorVersion.casino == casino, ContadorVersion.tabla.in_(faltan))}
+        for tabla in faltan:
+            resultado[tabla] = filas.get(tabla, (0, None))
+            cache_versiones.guardar((tabla, casino), resultado[tabla])
+    return resultado
+
+def listado_condicional(plantilla, fragmento, dependencias, casino, consulta):
+    """Página de listado con ETag/Last-Modified; `consulta()` devuelve el contexto del fragmento y solo se llama si no está en caché."""
+    con_mensaje = bool(sesion_http.get('_flashes'))  # tras un POST: mostrar el mensaje y datos recién confirmados
+    if con_mensaje:
+        for tabla in dependencias: cache_versiones.invalidar((tabla, casino))
+    versiones = versiones_de(dependencias, casino)
+    etag = f"{request.endpoint}-{id_casino(casino)}-{current_app.config['FIRMA_PLANTILLAS']}-" + '.'.join(str(versiones[t][0]) for t in dependencias)
+    modificado = max((m for _, m in versiones.values() if m), default=None)
+    modificado = modificado.replace(microsecond=0, tzinfo=timezone.utc) if modificado else None
+    if not con_mensaje and (request.if_none_match.contains(etag) if request.if_none_match else
+                            bool(modificado and request.if_modified_since and request.if_modified_since >= modificado)):
+        respuesta = Response(status=304)
+    else:
+        clave = (fragmento, etag, request.query_string)
+        encontrado, html = cache_fragmentos.obtener(clave)
+        if not encontrado:
+            html = render_template(fragmento, casino=casino, **consulta())
+            cache_fragmentos.guardar(clave, html)
+        respuesta = make_response(render_template(plantilla, tabla=Markup(html), casino=casino))
+    respuesta.set_etag(etag)
+    if modificado: respuesta.last_modified = modificado
+    respuesta.headers['Cache-Control'] = 'private, no-cache'
+    return respuesta
@@ -0,0 +1,135 @@
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# -----------------------------------------------------
+# INSTRUMENTACIÓN SQL Y MÉTRICAS
+# -----------------------------------------------------
+# Los eventos del motor cuentan consultas y tiempo de BD por petición (en `g`).
+# Al terminar la petición se acumulan en contadores e histogramas por endpoint
+# que /metrics expone en formato Prometheus. Las métricas son por proceso.
+UMBRAL_N_MAS_UNO = 5      # repeticiones de la misma sentencia en una petición
+CONSULTAS_LENTAS_MAX = 10 # sentencias más lentas que se conservan
+
+_RE_ESPACIOS = re.compile(r'\s+')
+_RE_LISTA_PARAMS = re.compile(r'\((?:\s*(?:\?|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%\(\w+\)s|:\w+)\s*\)')
+
+def huella_sql(sentencia):
+    """Normaliza una sentencia para agrupar las que solo difieren en parámetros."""
+    return _RE_LISTA_PARAMS.sub('(?)', _RE_ESPACIOS.sub(' ', sentencia).strip())
+
+class Histograma:
+    def __init__(self, limites):
+        self.limites = limites
+        self.conteos = defaultdict(lambda: [0] * len(limites))
+        self.sumas = defaultdict(float)
+        self.totales = defaultdict(int)
+
+    def observar(self, endpoint, valor):
+        conteos = self.conteos[endpoint]
+        for i, limite in enumerate(self.limites):
+            if valor <= limite: conteos[i] += 1
+        self.sumas[endpoint] += valor
+        self.totales[endpoint] += 1
+
+    def exportar(self, nombre):
+        for endpoint, conteos in sorted(self.conteos.items()):
+            for limite, conteo in zip(self.limites, conteos):
+                yield f'{nombre}_bucket{{endpoint="{_etiqueta(endpoint)}",le="{limite}"}} {conteo}'
+            yield f'{nombre}_bucket{{endpoint="{_etiqueta(endpoint)}",le="+Inf"}} {self.totales[endpoint]}'
+            yield f'{nombre}_sum{{endpoint="{_etiqueta(endpoint)}"}} {self.sumas[endpoint]:.6f}'
+            yield f'{nombre}_count{{endpoint="{_etiqueta(endpoint)}"}} {self.totales[endpoint]}'
+
+def _etiqueta(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+class MetricasSQL:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.peticiones = Counter()
+        self.consultas = Counter()
+        self.tiempo_bd = defaultdict(float)
+        self.n_mas_uno = Counter()
+        self.hist_consultas = Histograma((1, 2, 5, 10, 25, 50, 100))
+        self.hist_tiempo = Histograma((0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5))
+        self.lentas = {}  # (endpoint, huella) -> segundos
+
+    def registrar(self, endpoint, stats):
+        with self.lock:
+            self.peticiones[endpoint] += 1
+            self.consultas[endpoint] += stats['consultas']
+            self.tiempo_bd[endpoint] += stats['tiempo']
+            self.hist_consultas.observar(endpoint, stats['consultas'])
+            self.hist_tiempo.observar(endpoint, stats['tiempo'])
+            for huella, veces in stats['huellas'].items():
+                if veces >= UMBRAL_N_MAS_UNO: self.n_mas_uno[endpoint] += 1
+            for duracion, huella in stats['lentas']:
+                clave = (endpoint, huella)
+                if duracion > self.lentas.get(clave, 0): self.lentas[clave] = duracion
+            if len(self.lentas) > CONSULTAS_LENTAS_MAX:
+                self.lentas = dict(sorted(self.lentas.items(), key=lambda kv: kv[1], reverse=True)[:CONSULTAS_LENTAS_MAX])
+
+    def exportar(self):
+        with self.lock:
+            lineas = ['# HELP yosyfood_http_peticiones_total Peticiones atendidas por endpoint.', '# TYPE yosyfood_http_peticiones_total counter']
+            lineas += [f'yosyfood_http_peticiones_total{{endpoint="{_etiqueta(e)}"}} {n}' for e, n in sorted(self.peticiones.items())]
+            lineas += ['# HELP yosyfood_bd_consultas_total Sentencias SQL ejecutadas por endpoint.', '# TYPE yosyfood_bd_consultas_total counter']
+            lineas += [f'yosyfood_bd_consultas_total{{endpoint="{_etiqueta(e)}"}} {n}' for e, n in sorted(self.consultas.items())]
+            lineas += ['# HELP yosyfood_bd_tiempo_segundos_total Tiempo acumulado en la base de datos por endpoint.', '# TYPE yosyfood_bd_tiempo_segundos_total counter']
+            lineas += [f'yosyfood_bd_tiempo_segundos_total{{endpoint="{_etiqueta(e)}"}} {t:.6f}' for e, t in sorted(self.tiempo_bd.items())]
+            lineas += ['# HELP yosyfood_bd_n_mas_uno_total Sentencias repetidas sospechosas de N+1 por endpoint.', '# TYPE yosyfood_bd_n_mas_uno_total counter']
+            lineas += [f'yosyfood_bd_n_mas_uno_total{{endpoint="{_etiqueta(e)}"}} {n}' for e, n in sorted(self.n_mas_uno.items())]
+            lineas += ['# HELP yosyfood_bd_consultas_por_peticion Sentencias SQL por petición.', '# TYPE yosyfood_bd_consultas_por_peticion histogram']
+            lineas += list(self.hist_consultas.exportar('yosyfood_bd_consultas_por_peticion'))
+            lineas += ['# HELP yosyfood_bd_tiempo_por_peticion_segundos Tiempo de base de datos por petición.', '# TYPE yosyfood_bd_tiempo_por_peticion_segundos histogram']
+            lineas += list(self.hist_tiempo.exportar('yosyfood_bd_tiempo_por_peticion_segundos'))
+            lineas += ['# HELP yosyfood_bd_consulta_lenta_segundos Sentencias más lentas observadas.', '# TYPE yosyfood_bd_consulta_lenta_segundos gauge']
+            lineas += [f'yosyfood_bd_consulta_lenta_segundos{{endpoint="{_etiqueta(e)}",sql="{_etiqueta(h[:200])}"}} {t:.6f}'
+                       for (e, h), t in sorted(self.lentas.items(), key=lambda kv: kv[1], reverse=True)]
+        return '\n'.join(lineas) + '\n'
+
+metricas_sql = MetricasSQL()
+
+def init_app(app):
+    app.before_request(_iniciar_stats_sql)
+    app.after_request(_registrar_stats_sql)
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _antes_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    # En el contexto de la sentencia y no en la conexión: si la consulta falla no llega
+    # after_cursor_execute y el inicio se descarta con su contexto
+    if context is not None: context._inicio_consulta = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _despues_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    inicio = getattr(context, '_inicio_consulta', None)
+    if inicio is None or not has_request_context() or 'sql_stats' not in g: return
+    duracion = time.perf_counter() - inicio
+    stats = g.sql_stats
+    huella = huella_sql(statement)
+    stats['consultas'] += 1
+    stats['tiempo'] += duracion
+    stats['huellas'][huella] += 1
+    stats['lentas'] = sorted(stats['lentas'] + [(duracion, huella)], reverse=True)[:3]
+
+def _iniciar_stats_sql():
+    g.sql_stats = {'consultas': 0, 'tiempo': 0.0, 'huellas': Counter(), 'lentas': []}
+
+def _registrar_stats_sql(response):
+    stats = g.pop('sql_stats', None)
+    if stats is None: return response
+    endpoint = request.endpoint or 'desconocido'
+    metricas_sql.registrar(endpoint, stats)
+    for huella, veces in stats['huellas'].items():
+        if veces >= UMBRAL_N_MAS_UNO:
+            current_app.logger.warning('Posible N+1 en %s: %d ejecuciones de %s', endpoint, veces, huella[:200])
+    if current_app.config['SQL_QUERY_HEADER']:
+        response.headers['X-Query-Count'] = str(stats['consultas'])
+        response.headers['X-DB-Time-ms'] = f"{stats['tiempo'] * 1000:.2f}"
+    return response
@@ -0,0 +1,22 @@
+# -----------------------------------------------------
+# MODELOS
+# -----------------------------------------------------
+# Un módulo por dominio; se importan siempre desde aquí (`from app.models import
+# Inventario`) para que todos queden en el mismo metadata que usan las
+# relaciones por nombre y `flask db migrate`.
+from .casinos import Casino, CasinoRef, cargar_casinos, casino_por_defecto, columna_casino, id_casino, nombre_casino, nombres_casinos
+from .usuarios import User
+from .inventario import CapaCosto, ContadorVersion, Inventario, MovimientoStock, ProductoEliminado, PronosticoStock, SnapshotStock
+from .ventas import ClaveIdempotencia, Recibo, Venta
+from .compras import Compra, ReciboCompra
+from .gastos import Gasto, Inversion
+from .consumo import ConsumoRefrigerio, ConsumoRefrigerioItem, RecetaRefrigerio, RecetaRefrigerioItem
+from .analisis import ResumenDiario
+from .tareas import Tarea
+
+__all__ = [
+    'Casino', 'CasinoRef', 'cargar_casinos', 'casino_por_defecto', 'columna_casino', 'id_casino', 'nombre_casino', 'nombres_casinos',
+    'User', 'CapaCosto', 'ContadorVersion', 'Inventario', 'MovimientoStock', 'ProductoEliminado', 'PronosticoStock', 'SnapshotStock',
+    'ClaveIdempotencia', 'Recibo', 'Venta', 'Compra', 'ReciboCompra', 'Gasto', 'Inversion',
+    'ConsumoRefrigerio', 'ConsumoRefrigerioItem', 'RecetaRefrigerio', 'RecetaRefrigerioItem', 'ResumenDiario', 'Tarea',
+]
@@ -0,0 +1,16 @@
+from ..extensions import db
+from .casinos import columna_casino
+
+
+# --- RESUMEN DIARIO POR CASINO (para /analisis) ---
+class ResumenDiario(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    casino = columna_casino()
+    dia = db.Column(db.Date, nullable=False)
+    ingresos = db.Column(db.Float, nullable=False, default=0)
+    compras = db.Column(db.Float, nullable=False, default=0)
+    gastos = db.Column(db.Float, nullable=False, default=0)
+    inversiones = db.Column(db.Float, nullable=False, default=0)
+    refrigerios = db.Column(db.Integer, nullable=False, default=0)
+    costo_ventas = db.Column(db.Float, nullable=False, default=0, server_default='0')
+    __table_args__ = (db.UniqueConstraint('casino_id', 'dia', name='uq_resumen_diario_casino_dia'),)
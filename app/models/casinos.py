@@ -0,0 +1,92 @@
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, select
+
+from ..extensions import db
+
+
+# --- CASINOS: cada tabla guarda casino_id; en Python el atributo `casino` sigue siendo el nombre ---
+class Casino(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    nombre = db.Column(db.String(20), nullable=False, unique=True)
+
+# El mapa nombre <-> id vive en el proceso. CasinoRef solo lo consulta, nunca
+# hace I/O: se carga al empezar una transacción de db.session, con la misma
+# conexión, y se vuelve a leer cada CASINOS_TTL segundos (altas y renombres
+# hechos desde otro worker). Un alta o cambio de Casino en la sesión lo recarga
+# al terminar su flush: desde ahí la transacción lo ve, y el resto del proceso
+# al confirmar. Las filas que lo usan van en un flush posterior.
+_casinos = {'por_nombre': {}, 'por_id': {}, 'cargado': None, 'pendientes': 0}
+
+def _leer_casinos(conn):
+    t = Casino.__table__
+    filas = conn.execute(select(t.c.id, t.c.nombre).order_by(t.c.id)).all()
+    return {'por_nombre': {nombre: cid for cid, nombre in filas}, 'por_id': {cid: nombre for cid, nombre in filas}}
+
+def cargar_casinos():
+    _casinos.update(_leer_casinos(db.session), cargado=time.monotonic())
+
+def _mapa():
+    # Solo se mira la sesión si alguna tiene casinos sin confirmar
+    if _casinos['pendientes'] and has_app_context():
+        return db.session.info.get('casinos', _casinos)
+    return _casinos
+
+@event.listens_for(db.session, 'after_begin')
+def _refrescar_casinos(session, transaction, connection):
+    if _casinos['cargado'] is None or time.monotonic() - _casinos['cargado'] > current_app.config['CASINOS_TTL']:
+        _casinos.update(_leer_casinos(connection), cargado=time.monotonic())
+
+@event.listens_for(db.session, 'after_flush')
+def _casinos_en_flush(session, flush_context):
+    if not any(isinstance(obj, Casino) for obj in (*session.new, *session.dirty, *session.deleted)): return
+    if 'casinos' not in session.info: _casinos['pendientes'] += 1
+    session.info['casinos'] = _leer_casinos(session.connection())
+
+@event.listens_for(db.session, 'after_commit')
+def _publicar_casinos(session):
+    casinos = session.info.pop('casinos', None)
+    if casinos is not None:
+        _casinos.update(casinos, cargado=time.monotonic()); _casinos['pendientes'] -= 1
+
+@event.listens_for(db.session, 'after_rollback')
+def _descartar_casinos(session):
+    if session.info.pop('casinos', None) is not None: _casinos['pendientes'] -= 1
+
+def id_casino(nombre):
+    if nombre not in _mapa()['por_nombre']: cargar_casinos()
+    if nombre not in _mapa()['por_nombre']: raise ValueError(f'Casino desconocido: {nombre}')
+    return _mapa()['por_nombre'][nombre]
+
+def nombre_casino(cid):
+    if cid not in _mapa()['por_id']: cargar_casinos()
+    return _mapa()['por_id'].get(cid)
+
+def nombres_casinos():
+    if _casinos['cargado'] is None: cargar_casinos()
+    return list(_mapa()['por_id'].values())
+
+def casino_por_defecto():
+    nombres = nombres_casinos()
+    return nombres[0] if nombres else None
+
+class CasinoRef(db.TypeDecorator):
+    """Entero (casino.id) en la BD, nombre del casino en Python: filtros, formularios y JSON no cambian."""
+    impl = db.Integer
+    cache_ok = True
+
+    def process_bind_param(self, valor, dialect):
+        if valor is None or isinstance(valor, int): return valor
+        cid = _mapa()['por_nombre'].get(valor)
+        if cid is None: raise ValueError(f'Casino desconocido: {valor}')
+        return cid
+
+    def process_result_value(self, valor, dialect):
+        if valor is None: return None
+        nombre = _mapa()['por_id'].get(valor)
+        if nombre is None: _casinos['cargado'] = None  # creado en otro worker: se relee al empezar la próxima transacción
+        return nombre
+
+def columna_casino(**kwargs):
+    return db.Column('casino_id', CasinoRef, db.ForeignKey('casino.id'), nullable=False, **kwargs)
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from ..extensions import db
+from .casinos import columna_casino
+
+
+class ReciboCompra(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    uuid = db.Column(db.String(50), nullable=False, unique=True)
+    fecha = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    total = db.Column(db.Float, nullable=False)
+    proveedor = db.Column(db.String(100), nullable=False)
+    comprador = db.Column(db.String(100), nullable=False)
+    casino = columna_casino()
+    lineas = db.relationship('Compra', backref='recibo', cascade="all, delete-orphan", order_by='Compra.id')
+    __table_args__ = (db.Index('ix_recibo_compra_casino_fecha', 'casino_id', 'fecha'),)
+
+class Compra(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    recibo_compra_id = db.Column(db.Integer, db.ForeignKey('recibo_compra.id'), nullable=False, index=True)
+    producto_id = db.Column(db.Integer, db.ForeignKey('inventario.id'), nullable=False)
+    cantidad = db.Column(db.Float, nullable=False)
+    costo_unitario = db.Column(db.Float, nullable=False)
+    casino = columna_casino()  # copia de la cabecera, como en Venta
+    fecha = db.Column(db.DateTime, nullable=False)
+    producto = db.relationship('Inventario', backref='compras')
+    __table_args__ = (db.Index('ix_compra_casino_fecha', 'casino_id', 'fecha'),)
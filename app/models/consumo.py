@@ -0,0 +1,38 @@
+from ..extensions import db
+from .casinos import columna_casino
+
+
+# --- NUEVOS MODELOS PARA CONSUMO DE REFRIGERIOS (SISTEMA FLEXIBLE) ---
+class ConsumoRefrigerio(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    fecha = db.Column(db.Date, nullable=False)
+    descripcion = db.Column(db.String(200), nullable=False)
+    cantidad_total = db.Column(db.Integer, nullable=False)
+    responsable = db.Column(db.String(100), nullable=False)
+    casino = columna_casino()
+    receta_id = db.Column(db.Integer, db.ForeignKey('receta_refrigerio.id'), nullable=True)  # plantilla usada, si hubo
+    items = db.relationship('ConsumoRefrigerioItem', backref='consumo', cascade="all, delete-orphan")
+    receta = db.relationship('RecetaRefrigerio')
+    __table_args__ = (db.Index('ix_consumo_refrigerio_casino_fecha', 'casino_id', 'fecha'),)
+
+class ConsumoRefrigerioItem(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    consumo_id = db.Column(db.Integer, db.ForeignKey('consumo_refrigerio.id'), nullable=False)
+    producto_id = db.Column(db.Integer, db.ForeignKey('inventario.id'), nullable=False)
+    cantidad_consumida = db.Column(db.Float, nullable=False)
+    producto = db.relationship('Inventario')
+
+# --- RECETAS DE REFRIGERIO (qué lleva cada porción) ---
+class RecetaRefrigerio(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    nombre = db.Column(db.String(100), nullable=False)
+    casino = columna_casino()
+    items = db.relationship('RecetaRefrigerioItem', backref='receta', cascade="all, delete-orphan", order_by='RecetaRefrigerioItem.id')
+    __table_args__ = (db.UniqueConstraint('nombre', 'casino_id', name='uq_receta_refrigerio_nombre_casino'),)
+
+class RecetaRefrigerioItem(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    receta_id = db.Column(db.Integer, db.ForeignKey('receta_refrigerio.id'), nullable=False, index=True)
+    producto_id = db.Column(db.Integer, db.ForeignKey('inventario.id'), nullable=False)
+    cantidad_por_unidad = db.Column(db.Float, nullable=False)
+    producto = db.relationship('Inventario')
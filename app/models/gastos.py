@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from ..extensions import db
+from .casinos import columna_casino
+
+
+class Inversion(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    fecha = db.Column(db.DateTime, default=datetime.utcnow)
+    descripcion = db.Column(db.String(200), nullable=False)
+    costo = db.Column(db.Float, nullable=False)
+    proveedor = db.Column(db.String(100), nullable=False)
+    comprador = db.Column(db.String(100), nullable=False)
+    casino = columna_casino()
+    __table_args__ = (db.Index('ix_inversion_casino_fecha', 'casino_id', 'fecha'),)
+
+class Gasto(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    fecha = db.Column(db.DateTime, default=datetime.utcnow)
+    descripcion = db.Column(db.String(200), nullable=False)
+    costo = db.Column(db.Float, nullable=False)
+    proveedor = db.Column(db.String(100), nullable=False)
+    comprador = db.Column(db.String(100), nullable=False)
+    casino = columna_casino()
+    __table_args__ = (db.Index('ix_gasto_casino_fecha', 'casino_id', 'fecha'),)
@@ -0,0 +1,74 @@
+from datetime import datetime
+
+from ..extensions import db
+from .casinos import columna_casino
+
+
+class Inventario(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    codigo_barras = db.Column(db.String(50), nullable=True)
+    nombre = db.Column(db.String(100), nullable=False)
+    cantidad = db.Column(db.Float, nullable=False)
+    unidad = db.Column(db.String(20), nullable=False)
+    minimo = db.Column(db.Float, default=0)
+    precio = db.Column(db.Float, default=0)
+    casino = columna_casino()
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # versión del catálogo en que cambió por última vez
+    nombre_busqueda = db.Column(db.String(100), nullable=False, default='', server_default='')  # nombre sin acentos y en minúsculas (índice de búsqueda)
+    costo_promedio = db.Column(db.Float, nullable=False, default=0, server_default='0')  # costo unitario de las existencias (0: aún sin compras)
+    activo = db.Column(db.Boolean, nullable=False, default=True, server_default=db.true())  # False: dado de baja, su historial sigue en el libro
+    __table_args__ = (db.UniqueConstraint('codigo_barras', 'casino_id', name='uq_inventario_codigo_casino'),
+                      db.Index('ix_inventario_casino_version', 'casino_id', 'version'),
+                      db.Index('ix_inventario_casino_nombre_busqueda', 'casino_id', 'nombre_busqueda'))
+
+# --- VERSIONES POR (TABLA, CASINO) Y BAJAS DEL CATÁLOGO ---
+class ContadorVersion(db.Model):
+    tabla = db.Column(db.String(30), primary_key=True)
+    casino = columna_casino(primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    modificado = db.Column(db.DateTime, nullable=True)  # commit que subió la versión (Last-Modified de los listados)
+
+class ProductoEliminado(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    producto_id = db.Column(db.Integer, nullable=False)
+    casino = columna_casino()
+    version = db.Column(db.Integer, nullable=False)
+    __table_args__ = (db.Index('ix_producto_eliminado_casino_version', 'casino_id', 'version'),)
+
+# --- LIBRO DE MOVIMIENTOS DE STOCK (solo inserción) Y SALDOS DIARIOS ---
+class MovimientoStock(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    producto_id = db.Column(db.Integer, db.ForeignKey('inventario.id'), nullable=False)
+    fecha = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    delta = db.Column(db.Float, nullable=False)
+    tipo = db.Column(db.String(20), nullable=False)
+    referencia = db.Column(db.String(50), nullable=True)
+    __table_args__ = (db.Index('ix_movimiento_stock_producto_fecha', 'producto_id', 'fecha'),)
+
+class SnapshotStock(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    producto_id = db.Column(db.Integer, db.ForeignKey('inventario.id'), nullable=False)
+    corte = db.Column(db.DateTime, nullable=False)  # saldo con todos los movimientos anteriores a este instante
+    cantidad = db.Column(db.Float, nullable=False)
+    __table_args__ = (db.UniqueConstraint('producto_id', 'corte', name='uq_snapshot_stock_producto_corte'),)
+
+# --- PRONÓSTICO DE DEMANDA (lo escribe `flask pronosticar-stock`) ---
+class PronosticoStock(db.Model):
+    producto_id = db.Column(db.Integer, db.ForeignKey('inventario.id'), primary_key=True)
+    calculado = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    dias_historia = db.Column(db.Integer, nullable=False)  # días con datos desde el primer consumo
+    consumo_diario = db.Column(db.Float, nullable=False)  # nivel suavizado, sin estacionalidad
+    desviacion = db.Column(db.Float, nullable=False)  # desviación diaria del error del ajuste
+    demanda_entrega = db.Column(db.Float, nullable=False)  # pronóstico para los días de entrega
+    punto_reorden = db.Column(db.Float, nullable=False)
+    cantidad_sugerida = db.Column(db.Float, nullable=False)  # cuánto pedir hoy (0 si no toca)
+    producto = db.relationship('Inventario', backref=db.backref('pronostico', uselist=False))
+
+# --- CAPAS DE COSTO (solo con COSTO_METODO=fifo): lo que queda de cada entrada y a qué costo ---
+class CapaCosto(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    producto_id = db.Column(db.Integer, db.ForeignKey('inventario.id'), nullable=False)
+    fecha = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    cantidad = db.Column(db.Float, nullable=False)
+    costo_unitario = db.Column(db.Float, nullable=False)
+    __table_args__ = (db.Index('ix_capa_costo_producto_id', 'producto_id', 'id'),)
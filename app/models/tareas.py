@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from ..extensions import db
+
+
+# --- TAREAS EN SEGUNDO PLANO (las ejecuta `flask trabajador`) ---
+class Tarea(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    uuid = db.Column(db.String(36), nullable=False, unique=True)  # id público para consultar y descargar
+    tipo = db.Column(db.String(40), nullable=False)
+    parametros = db.Column(db.Text, nullable=False, default='{}')  # JSON
+    estado = db.Column(db.String(12), nullable=False, default='pendiente')  # pendiente | en_curso | terminada | fallida
+    progreso = db.Column(db.Float, nullable=False, default=0)  # 0..1
+    mensaje = db.Column(db.String(200))
+    creada = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    disponible = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # no se ejecuta antes (reintentos y programadas)
+    iniciada = db.Column(db.DateTime)
+    terminada = db.Column(db.DateTime)
+    latido = db.Column(db.DateTime)  # lo renueva el trabajador mientras la tarea corre
+    intentos = db.Column(db.Integer, nullable=False, default=0)
+    max_intentos = db.Column(db.Integer, nullable=False, default=1)
+    trabajador = db.Column(db.String(100))
+    resultado = db.Column(db.Text)  # JSON
+    error = db.Column(db.Text)
+    archivo = db.Column(db.String(255))  # ruta del resultado descargable
+    programa = db.Column(db.String(40))  # nombre en TAREAS_PROGRAMA si la creó el programador
+    programada = db.Column(db.DateTime)  # minuto del programa que la creó
+    __table_args__ = (db.Index('ix_tarea_estado_disponible', 'estado', 'disponible'),
+                      db.UniqueConstraint('programa', 'programada', name='uq_tarea_programa_programada'))
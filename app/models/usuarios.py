@@ -0,0 +1,8 @@
+from flask_login import UserMixin
+
+from ..extensions import db
+
+
+class User(UserMixin, db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(50), unique=True, nullable=False)
@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from ..extensions import db
+from .casinos import columna_casino
+
+
+# --- RECIBOS: la cabecera guarda los datos comunes y los totales; las líneas solo producto/cantidad ---
+class Recibo(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    uuid = db.Column(db.String(50), nullable=False, unique=True)
+    fecha = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    total = db.Column(db.Float, nullable=False)
+    pago = db.Column(db.Float, nullable=False)
+    cambio = db.Column(db.Float, nullable=False)
+    vendedor = db.Column(db.String(100), nullable=False)
+    casino = columna_casino()
+    lineas = db.relationship('Venta', backref='recibo', cascade="all, delete-orphan", order_by='Venta.id')
+    __table_args__ = (db.Index('ix_recibo_casino_fecha', 'casino_id', 'fecha'),)
+
+class Venta(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    recibo_id = db.Column(db.Integer, db.ForeignKey('recibo.id'), nullable=False, index=True)
+    producto_id = db.Column(db.Integer, db.ForeignKey('inventario.id'), nullable=False)
+    cantidad = db.Column(db.Float, nullable=False)
+    total = db.Column(db.Float, nullable=False)
+    # Copia de la cabecera: clave de partición y filtros de análisis sin JOIN
+    casino = columna_casino()
+    fecha = db.Column(db.DateTime, nullable=False)
+    costo_unitario = db.Column(db.Float, nullable=True)  # costo del producto al venderse (NULL: venta anterior al costeo)
+    producto = db.relationship('Inventario', backref='ventas')
+    __table_args__ = (db.Index('ix_venta_casino_fecha', 'casino_id', 'fecha'),)
+
+# --- CLAVES DE IDEMPOTENCIA (reintentos del POS) ---
+class ClaveIdempotencia(db.Model):
+    clave = db.Column(db.String(64), primary_key=True)
+    endpoint = db.Column(db.String(100), nullable=False)
+    estado = db.Column(db.Integer, nullable=False)
+    respuesta = db.Column(db.Text, nullable=False)
+    creada = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
@@ -0,0 +1,52 @@
+import base64
+import binascii
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+
+# -----------------------------------------------------
+# PAGINACIÓN DE RECIBOS (KEYSET)
+# -----------------------------------------------------
+# Los historiales de ventas y compras leen solo las cabeceras de recibo y se
+# paginan por cursor sobre (fecha, id), en orden descendente.
+RECIBOS_POR_PAGINA = 25
+
+def codificar_cursor(fecha, recibo_id):
+    return base64.urlsafe_b64encode(f"{fecha.isoformat()}|{recibo_id}".encode()).decode()
+
+def decodificar_cursor(cursor):
+    try:
+        fecha_str, recibo_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|', 1)
+        return datetime.fromisoformat(fecha_str), int(recibo_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+
+def paginar_recibos(query, modelo, cursor=None, direccion='next', por_pagina=RECIBOS_POR_PAGINA):
+    """Pagina una consulta de cabeceras (Recibo o ReciboCompra) por (fecha, id).
+
+    Devuelve (filas, cursor_anterior, cursor_siguiente); los cursores son None
+    cuando no hay más páginas en esa dirección.
+    """
+    posicion = decodificar_cursor(cursor) if cursor else None
+    hacia_atras = direccion == 'prev' and posicion is not None
+    if posicion:
+        fecha, recibo_id = posicion
+        if hacia_atras:
+            query = query.filter(or_(modelo.fecha > fecha, and_(modelo.fecha == fecha, modelo.id > recibo_id)))
+        else:
+            query = query.filter(or_(modelo.fecha < fecha, and_(modelo.fecha == fecha, modelo.id < recibo_id)))
+    orden = [modelo.fecha.asc(), modelo.id.asc()] if hacia_atras else [modelo.fecha.desc(), modelo.id.desc()]
+    filas = query.order_by(*orden).limit(por_pagina + 1).all()
+    hay_mas = len(filas) > por_pagina
+    filas = filas[:por_pagina]
+    if hacia_atras:
+        filas.reverse()
+        hay_anterior, hay_siguiente = hay_mas, True
+    else:
+        hay_anterior, hay_siguiente = posicion is not None, hay_mas
+    if not filas:
+        return filas, None, None
+    cursor_anterior = codificar_cursor(filas[0].fecha, filas[0].id) if hay_anterior else None
+    cursor_siguiente = codificar_cursor(filas[-1].fecha, filas[-1].id) if hay_siguiente else None
+    return filas, cursor_anterior, cursor_siguiente
@@ -0,0 +1,58 @@
+from datetime import date, datetime
+
+from sqlalchemy import text
+
+
+# -----------------------------------------------------
+# CASINOS Y PARTICIONES DE VENTA (POSTGRESQL)
+# -----------------------------------------------------
+# Un casino nuevo se da de alta con `flask crear-casino "Casino 3"`; las vistas
+# toman la lista de la tabla casino. En PostgreSQL, `flask particionar-ventas`
+# convierte venta en una tabla particionada por casino (LIST) y mes (RANGE) y,
+# en las siguientes ejecuciones, solo crea las particiones que falten. Conviene
+# correrlo cada mes: los meses sin partición propia caen en la partición por
+# defecto del casino y ya no se pueden separar sin mover esas filas.
+def venta_particionada(conn):
+    return conn.dialect.name == 'postgresql' and conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = 'venta'")).first() is not None
+
+def _meses(desde, hasta):
+    mes = date(desde.year, desde.month, 1)
+    while mes <= hasta:
+        siguiente = date(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+        yield mes, siguiente
+        mes = siguiente
+
+def crear_particiones_venta(conn, meses_adelante=3):
+    """Crea (si faltan) la partición de cada casino y sus meses hasta `meses_adelante` desde hoy. Devuelve cuántas tablas revisó."""
+    inicio = conn.execute(text("SELECT MIN(fecha) FROM venta")).scalar() or datetime.utcnow()
+    hoy = date.today()
+    fin = date(hoy.year + (hoy.month - 1 + meses_adelante) // 12, (hoy.month - 1 + meses_adelante) % 12 + 1, 1)
+    sentencias = ["CREATE TABLE IF NOT EXISTS venta_p_default PARTITION OF venta DEFAULT"]
+    for (cid,) in conn.execute(text("SELECT id FROM casino ORDER BY id")):
+        sentencias.append(f"CREATE TABLE IF NOT EXISTS venta_p{cid} PARTITION OF venta FOR VALUES IN ({cid}) PARTITION BY RANGE (fecha)")
+        sentencias += [f"CREATE TABLE IF NOT EXISTS venta_p{cid}_{mes:%Y%m} PARTITION OF venta_p{cid} FOR VALUES FROM ('{mes}') TO ('{siguiente}')"
+                       for mes, siguiente in _meses(inicio, fin)]
+        sentencias.append(f"CREATE TABLE IF NOT EXISTS venta_p{cid}_default PARTITION OF venta_p{cid} DEFAULT")
+    for sentencia in sentencias: conn.execute(text(sentencia))
+    return len(sentencias)
+
+def particionar_venta(conn, meses_adelante=3):
+    """Reemplaza venta por una tabla particionada con las mismas columnas, filas, índices y claves foráneas."""
+    secuencia = conn.execute(text("SELECT pg_get_serial_sequence('venta', 'id')")).scalar()
+    for sentencia in [
+        "ALTER TABLE venta RENAME TO venta_sin_particion",
+        "CREATE TABLE venta (LIKE venta_sin_particion INCLUDING DEFAULTS) PARTITION BY LIST (casino_id)",
+        "ALTER TABLE venta ADD PRIMARY KEY (id, casino_id, fecha)",  # la clave debe incluir las columnas de partición
+        f"ALTER SEQUENCE {secuencia} OWNED BY venta.id",
+    ]: conn.execute(text(sentencia))
+    crear_particiones_venta(conn, meses_adelante)
+    for sentencia in [
+        "INSERT INTO venta SELECT * FROM venta_sin_particion",
+        "DROP TABLE venta_sin_particion",
+        "CREATE INDEX ix_venta_recibo_id ON venta (recibo_id)",
+        "CREATE INDEX ix_venta_casino_fecha ON venta (casino_id, fecha)",
+        "ALTER TABLE venta ADD CONSTRAINT fk_venta_recibo_id_recibo FOREIGN KEY (recibo_id) REFERENCES recibo (id)",
+        "ALTER TABLE venta ADD CONSTRAINT venta_producto_id_fkey FOREIGN KEY (producto_id) REFERENCES inventario (id)",
+        "ALTER TABLE venta ADD CONSTRAINT fk_venta_casino_id_casino FOREIGN KEY (casino_id) REFERENCES casino (id)",
+    ]: conn.execute(text(sentencia))
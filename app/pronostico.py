@@ -0,0 +1,108 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func, insert, select
+
+from .archivo import recibos_archivados
+from .catalogo import siguiente_version
+from .extensions import db
+from .models import ConsumoRefrigerio, ConsumoRefrigerioItem, Inventario, PronosticoStock, Recibo, Venta, nombres_casinos
+from .resumenes import como_fecha
+
+
+# -----------------------------------------------------
+# PRONÓSTICO DE DEMANDA Y PUNTO DE REORDEN
+# -----------------------------------------------------
+# Un proceso por lotes (`flask pronosticar-stock`, o el botón de la compra
+# sugerida) lee de una vez el uso diario de cada producto (ventas + consumos
+# de refrigerio) y arma la matriz productos × días. Sobre ella, con NumPy:
+#   - factores por día de la semana, suavizados hacia 1 cuando hay pocos datos;
+#   - nivel diario con suavizado exponencial sobre la serie desestacionalizada
+#     (los pesos alfa·(1-alfa)^k se aplican como un producto matricial);
+#   - stock de seguridad = z · desviación del error · √(días de entrega).
+# Punto de reorden = demanda pronosticada en la entrega + seguridad. Si el stock
+# está en o bajo ese punto, se sugiere pedir hasta cubrir además los días de
+# cobertura. El resultado queda en PronosticoStock para las vistas.
+SUAVIZADO_ESTACIONAL = 2  # semanas "ficticias" con factor 1 que se suman a cada día de la semana
+
+def _uso_diario(desde, hasta, casino=None):
+    """[(producto_id, dia, cantidad)] de ventas y consumos entre desde (incluido) y hasta (excluido)."""
+    ventas = (db.session.query(Venta.producto_id, func.date(Recibo.fecha), func.sum(Venta.cantidad))
+              .join(Recibo, Venta.recibo_id == Recibo.id)
+              .filter(Recibo.fecha >= datetime.combine(desde, datetime.min.time()), Recibo.fecha < datetime.combine(hasta, datetime.min.time())))
+    consumos = (db.session.query(ConsumoRefrigerioItem.producto_id, ConsumoRefrigerio.fecha, func.sum(ConsumoRefrigerioItem.cantidad_consumida))
+                .join(ConsumoRefrigerio, ConsumoRefrigerioItem.consumo_id == ConsumoRefrigerio.id)
+                .filter(ConsumoRefrigerio.fecha >= desde, ConsumoRefrigerio.fecha < hasta))
+    if casino:
+        ventas, consumos = ventas.filter(Recibo.casino == casino), consumos.filter(ConsumoRefrigerio.casino == casino)
+    ventas = ventas.group_by(Venta.producto_id, func.date(Recibo.fecha))
+    consumos = consumos.group_by(ConsumoRefrigerioItem.producto_id, ConsumoRefrigerio.fecha)
+    archivadas = defaultdict(float)  # solo si la historia llega a meses archivados
+    for recibo in recibos_archivados('ventas', casino, datetime.combine(desde, datetime.min.time()), datetime.combine(hasta, datetime.min.time())):
+        for linea in recibo['lineas']: archivadas[(linea['producto_id'], recibo['fecha'].date())] += linea['cantidad']
+    return [(pid, como_fecha(dia), cantidad or 0) for query in (ventas, consumos) for pid, dia, cantidad in query] + [(pid, dia, cantidad) for (pid, dia), cantidad in archivadas.items()]
+
+def calcular_pronosticos(casino=None, hoy=None):
+    """Recalcula y guarda PronosticoStock de todos los productos (del casino, si se indica). Devuelve cuántos."""
+    import numpy as np  # solo lo necesita el proceso por lotes
+
+    cfg = current_app.config
+    hoy = hoy or date.today()
+    dias = cfg['PRONOSTICO_DIAS_HISTORIA']
+    desde = hoy - timedelta(days=dias)
+    query = db.session.query(Inventario.id, Inventario.cantidad).filter(Inventario.activo)
+    if casino: query = query.filter(Inventario.casino == casino)
+    productos = query.order_by(Inventario.id).all()
+    fila = {pid: i for i, (pid, _) in enumerate(productos)}
+    stock = np.array([cantidad for _, cantidad in productos], dtype=float)
+
+    # Uso por producto y día (día 0 = desde, el día de hoy no entra porque está incompleto)
+    uso = np.zeros((len(productos), dias))
+    registros = [(fila[pid], (dia - desde).days, cantidad) for pid, dia, cantidad in _uso_diario(desde, hoy, casino) if pid in fila]
+    if registros:
+        filas, columnas, cantidades = map(np.array, zip(*registros))
+        np.add.at(uso, (filas, columnas), cantidades)
+
+    # Cada producto cuenta desde su primer día con uso
+    usado = uso > 0
+    inicio = np.where(usado.any(axis=1), usado.argmax(axis=1), dias)
+    activo = np.arange(dias)[None, :] >= inicio[:, None]
+    n = activo.sum(axis=1)
+    media = np.divide(uso.sum(axis=1), n, out=np.zeros(len(productos)), where=n > 0)
+
+    # Estacionalidad semanal: promedio de cada día de la semana / promedio general
+    dia_semana = (desde.weekday() + np.arange(dias)) % 7
+    semana = np.eye(7)[dia_semana]  # dias × 7
+    suma, veces = uso @ semana, activo @ semana
+    base = media[:, None] * (veces + SUAVIZADO_ESTACIONAL)
+    factor = np.divide(suma + SUAVIZADO_ESTACIONAL * media[:, None], base, out=np.ones((len(productos), 7)), where=base > 0)
+    factor /= factor.mean(axis=1, keepdims=True)
+
+    # Suavizado exponencial del uso desestacionalizado, solo sobre los días activos
+    alfa = cfg['PRONOSTICO_ALFA']
+    pesos = activo * (alfa * (1 - alfa) ** np.arange(dias - 1, -1, -1))
+    total_pesos = pesos.sum(axis=1)
+    nivel = np.divide((uso / factor[:, dia_semana] * pesos).sum(axis=1), total_pesos, out=np.zeros(len(productos)), where=total_pesos > 0)
+    error = (uso - nivel[:, None] * factor[:, dia_semana]) * activo
+    desviacion = np.sqrt((error ** 2).sum(axis=1) / np.maximum(n - 1, 1))
+
+    entrega, cobertura = cfg['PRONOSTICO_DIAS_ENTREGA'], cfg['PRONOSTICO_DIAS_COBERTURA']
+    proximos = (hoy.weekday() + np.arange(entrega + cobertura)) % 7
+    demanda_entrega = nivel * factor[:, proximos[:entrega]].sum(axis=1)
+    demanda_cobertura = nivel * factor[:, proximos[entrega:]].sum(axis=1)
+    punto_reorden = demanda_entrega + cfg['PRONOSTICO_Z'] * desviacion * np.sqrt(entrega)
+    sugerida = np.where(stock <= punto_reorden, np.maximum(punto_reorden + demanda_cobertura - stock, 0), 0)
+
+    calculado = datetime.utcnow()
+    filas = [{'producto_id': pid, 'calculado': calculado, 'dias_historia': int(n[i]),
+              'consumo_diario': round(float(nivel[i]), 4), 'desviacion': round(float(desviacion[i]), 4),
+              'demanda_entrega': round(float(demanda_entrega[i]), 4), 'punto_reorden': round(float(punto_reorden[i]), 2),
+              'cantidad_sugerida': round(float(sugerida[i]), 2)} for i, (pid, _) in enumerate(productos)]
+    borrar = PronosticoStock.query
+    if casino: borrar = borrar.filter(PronosticoStock.producto_id.in_(select(Inventario.id).where(Inventario.casino == casino)))
+    borrar.delete(synchronize_session=False)
+    if filas: db.session.execute(insert(PronosticoStock), filas)
+    for c in ([casino] if casino else nombres_casinos()): siguiente_version('pronostico', c)
+    db.session.commit()
+    return len(filas)
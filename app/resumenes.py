@@ -0,0 +1,84 @@
+from datetime import date, datetime
+
+from sqlalchemy import bindparam, func
+
+from .archivo import ARCHIVABLES, recibos_archivados
+from .bd import insert_con_conflicto
+from .extensions import db
+from .models import ConsumoRefrigerio, Gasto, Inversion, Recibo, ReciboCompra, ResumenDiario, Venta
+
+
+# -----------------------------------------------------
+# RESÚMENES DIARIOS
+# -----------------------------------------------------
+# Cada ruta que escribe ventas, compras, gastos, inversiones o consumos suma
+# (o resta) su importe en la fila (casino, día) dentro de la misma transacción.
+def acumular_resumen(casino, dia, **deltas):
+    """Suma los deltas (ingresos, compras, gastos, inversiones, refrigerios, costo_ventas) al día."""
+    acumular_resumenes(casino, {dia.date() if isinstance(dia, datetime) else dia: deltas})
+
+def acumular_resumenes(casino, deltas_por_dia):
+    """Como acumular_resumen para varios días del casino ({día: {campo: delta}}), en un solo upsert multi-fila."""
+    if not deltas_por_dia: return
+    db.session.info.setdefault('dias_resumen', set()).update((casino, dia) for dia in deltas_por_dia)  # invalida /api/analisis al confirmar
+    campos = sorted({campo for deltas in deltas_por_dia.values() for campo in deltas})
+    stmt = insert_con_conflicto(ResumenDiario)
+    if stmt is not None:
+        # Días en orden: dos lotes concurrentes bloquean las filas en el mismo orden
+        stmt = stmt.values([dict({campo: deltas.get(campo, 0) for campo in campos}, casino=casino, dia=dia) for dia, deltas in sorted(deltas_por_dia.items())])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ResumenDiario.__table__.c.casino_id, ResumenDiario.__table__.c.dia],
+            set_={campo: getattr(ResumenDiario, campo) + stmt.excluded[campo] for campo in campos}
+        )
+        db.session.execute(stmt)
+        return
+    for dia, deltas in sorted(deltas_por_dia.items()):
+        resumen = ResumenDiario.query.filter_by(casino=casino, dia=dia).with_for_update().first()
+        if not resumen:
+            resumen = ResumenDiario(casino=casino, dia=dia, ingresos=0, compras=0, gastos=0, inversiones=0, refrigerios=0)
+            db.session.add(resumen)
+            db.session.flush()
+        for campo, delta in deltas.items():
+            setattr(resumen, campo, getattr(ResumenDiario, campo) + delta)
+
+def recalcular_costo_ventas(dias):
+    """Vuelve a sumar costo_ventas desde las ventas en esos (casino, día), p. ej. tras rehacer_costos."""
+    if not dias: return
+    dia = func.date(Venta.fecha)
+    costos = db.session.query(Venta.casino, dia, func.sum(Venta.cantidad * Venta.costo_unitario)).group_by(Venta.casino, dia)
+    casinos = {casino for casino, _ in dias}
+    if len(casinos) == 1: costos = costos.filter(Venta.casino == next(iter(casinos)))
+    filas = [{'b_casino': casino, 'b_dia': como_fecha(d), 'b_costo': total or 0} for casino, d, total in costos if (casino, como_fecha(d)) in dias]
+    tabla = ResumenDiario.__table__
+    if filas: db.session.execute(tabla.update().where(tabla.c.casino_id == bindparam('b_casino'), tabla.c.dia == bindparam('b_dia')).values(costo_ventas=bindparam('b_costo')), filas)
+    db.session.info.setdefault('dias_resumen', set()).update(dias)  # invalida /api/analisis al confirmar
+
+def como_fecha(valor):
+    # func.date() devuelve texto en SQLite y date en PostgreSQL
+    return date.fromisoformat(valor) if isinstance(valor, str) else valor
+
+def reconstruir_tabla_resumenes():
+    """Recalcula desde cero la tabla de resúmenes diarios; devuelve cuántos días quedaron."""
+    fuentes = [
+        ('ingresos', db.session.query(Recibo.casino, func.date(Recibo.fecha), func.sum(Recibo.total)).group_by(Recibo.casino, func.date(Recibo.fecha))),
+        ('compras', db.session.query(ReciboCompra.casino, func.date(ReciboCompra.fecha), func.sum(ReciboCompra.total)).group_by(ReciboCompra.casino, func.date(ReciboCompra.fecha))),
+        ('gastos', db.session.query(Gasto.casino, func.date(Gasto.fecha), func.sum(Gasto.costo)).group_by(Gasto.casino, func.date(Gasto.fecha))),
+        ('inversiones', db.session.query(Inversion.casino, func.date(Inversion.fecha), func.sum(Inversion.costo)).group_by(Inversion.casino, func.date(Inversion.fecha))),
+        ('refrigerios', db.session.query(ConsumoRefrigerio.casino, ConsumoRefrigerio.fecha, func.sum(ConsumoRefrigerio.cantidad_total)).group_by(ConsumoRefrigerio.casino, ConsumoRefrigerio.fecha)),
+        ('costo_ventas', db.session.query(Venta.casino, func.date(Venta.fecha), func.sum(Venta.cantidad * Venta.costo_unitario)).group_by(Venta.casino, func.date(Venta.fecha))),
+    ]
+    resumenes = {}
+    for campo, query in fuentes:
+        for casino, dia, total in query:
+            fila = resumenes.setdefault((casino, como_fecha(dia)), {'ingresos': 0, 'compras': 0, 'gastos': 0, 'inversiones': 0, 'refrigerios': 0, 'costo_ventas': 0})
+            fila[campo] += total or 0
+    # Los meses archivados ya no están en la base: sus totales salen de los archivos
+    for entidad, (_, _, _, campo, _, _) in ARCHIVABLES.items():
+        for recibo in recibos_archivados(entidad, None, datetime.min, datetime.max):
+            fila = resumenes.setdefault((recibo['casino'], recibo['fecha'].date()), {'ingresos': 0, 'compras': 0, 'gastos': 0, 'inversiones': 0, 'refrigerios': 0, 'costo_ventas': 0})
+            fila[campo] += recibo['total']
+            if entidad == 'ventas': fila['costo_ventas'] += sum(l['cantidad'] * (l.get('costo_unitario') or 0) for l in recibo['lineas'])
+    ResumenDiario.query.delete()
+    db.session.bulk_insert_mappings(ResumenDiario, [dict(casino=casino, dia=dia, **fila) for (casino, dia), fila in resumenes.items()])
+    db.session.commit()
+    return len(resumenes)
@@ -0,0 +1,273 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+from flask import current_app
+from sqlalchemy import and_, bindparam, func, insert, or_, select
+
+from .archivo import recibos_archivados
+from .catalogo import claves_cache, invalidar_codigos, versionar_productos
+from .exportacion import FILAS_POR_LOTE_EXPORTACION
+from .extensions import db
+from .models import CapaCosto, Compra, Inventario, MovimientoStock, Recibo, ReciboCompra, SnapshotStock, Venta
+from .resumenes import como_fecha, recalcular_costo_ventas
+
+
+# -----------------------------------------------------
+# COSTO DE LAS EXISTENCIAS (PROMEDIO PONDERADO O FIFO)
+# -----------------------------------------------------
+# Inventario.costo_promedio es el costo unitario de lo que hay en stock de cada
+# producto (y cada producto es de un casino). aplicar_movimientos_stock lo
+# actualiza en la misma transacción que el stock:
+#  - promedio: una entrada con costo lo lleva a
+#    (stock x promedio + cantidad x costo) / (stock + cantidad); las salidas
+#    salen al promedio y no lo cambian.
+#  - fifo: cada entrada deja una CapaCosto y las salidas consumen primero las
+#    capas más antiguas; costo_promedio queda como el promedio de lo que resta.
+# Las compras entran a su costo y las ventas anuladas al costo con que salieron;
+# las devoluciones de consumo y los ajustes, al costo actual (en fifo, un ajuste
+# a la baja consume las capas más antiguas). Altas e importaciones no pasan por
+# aquí: ese stock no tiene costo conocido, no diluye la primera compra y, en
+# fifo, lo que sale sin capa que lo cubra sale al promedio.
+# Un producto que nunca tuvo compras no tiene costo (promedio 0): sus
+# movimientos devuelven None y sus ventas quedan con costo_unitario NULL.
+# Cada línea de venta congela su costo_unitario y ResumenDiario acumula
+# costo_ventas (solo de las líneas con costo), así los reportes no recorren el
+# historial de compras.
+# `flask recalcular-costos` rehace todo desde el libro de movimientos (ventas
+# anteriores al costeo o cambio de COSTO_METODO).
+def _promedio_de_capas(capas, anterior):
+    existencia = sum(c.cantidad for c in capas)
+    return sum(c.cantidad * c.costo_unitario for c in capas) / existencia if existencia > 1e-9 else anterior
+
+def _mover_costo(producto, capas, delta, costo=None, fecha=None):
+    """Aplica `delta` al costo de `producto` (con su `cantidad` previa) y a sus capas; devuelve el costo unitario del movimiento (None si no se conoce)."""
+    promedio = producto.costo_promedio or 0
+    fifo = current_app.config['COSTO_METODO'] == 'fifo'
+    if delta > 0:
+        costo = (promedio or None) if costo is None else costo
+        if costo is None: return None
+        if fifo:
+            capas.append(CapaCosto(producto_id=producto.id, fecha=fecha or datetime.utcnow(), cantidad=delta, costo_unitario=costo))
+            producto.costo_promedio = _promedio_de_capas(capas, costo)
+        elif promedio <= 0 or producto.cantidad <= 0: producto.costo_promedio = costo
+        else: producto.costo_promedio = (producto.cantidad * promedio + delta * costo) / (producto.cantidad + delta)
+        return costo
+    if not fifo: return promedio or None
+    pendiente = -delta; total = 0
+    for capa in capas:
+        tomada = min(capa.cantidad, pendiente)
+        capa.cantidad -= tomada; pendiente -= tomada; total += tomada * capa.costo_unitario
+        if pendiente <= 1e-9: break
+    capas[:] = [c for c in capas if c.cantidad > 1e-9]
+    producto.costo_promedio = _promedio_de_capas(capas, promedio)
+    cubierta = -delta - max(pendiente, 0)
+    # Lo que no cubre ninguna capa sale al promedio; sin promedio, al costo de lo cubierto
+    if promedio > 0: return (total + max(pendiente, 0) * promedio) / -delta
+    return total / cubierta if cubierta > 1e-9 else None
+
+def valorar_movimientos(productos, movimientos, costos=None):
+    """Actualiza el costo de los productos por {producto_id: delta}; devuelve {producto_id: costo unitario} de cada movimiento.
+
+    `costos` ({producto_id: costo unitario}) fija el costo de las entradas; sin él
+    entran al costo actual. El costo es None si el producto aún no tiene costo
+    (nunca tuvo compras). `productos` debe tener cargado el stock previo.
+    """
+    ids = sorted(pid for pid, delta in movimientos.items() if delta)
+    capas = defaultdict(list); anteriores = set()
+    if current_app.config['COSTO_METODO'] == 'fifo' and ids:
+        for capa in CapaCosto.query.filter(CapaCosto.producto_id.in_(ids)).order_by(CapaCosto.id).with_for_update():
+            capas[capa.producto_id].append(capa); anteriores.add(capa)
+    unitarios = {pid: _mover_costo(productos[pid], capas[pid], movimientos[pid], (costos or {}).get(pid)) for pid in ids}
+    if capas:
+        vigentes = {c for lista in capas.values() for c in lista}
+        for capa in anteriores - vigentes: db.session.delete(capa)
+        db.session.add_all(vigentes - anteriores)
+    return unitarios
+
+def rehacer_costos(casino=None):
+    """Rehace costo_promedio, las capas FIFO y el costo de cada venta desde el libro de movimientos; devuelve (productos, líneas de venta).
+
+    El costo_ventas de los resúmenes diarios se vuelve a sumar en los días de
+    esas ventas, en la misma transacción. Los meses archivados conservan el
+    costo con que se archivaron (sus ventas ya no están en la base).
+    """
+    productos = {p.id: p for p in (Inventario.query.filter_by(casino=casino) if casino else Inventario.query)}
+    # Costo de cada compra por (recibo, producto), también de los meses archivados
+    importes = defaultdict(lambda: [0.0, 0.0])
+    compras = (db.session.query(ReciboCompra.uuid, Compra.producto_id, Compra.cantidad, Compra.costo_unitario).join(ReciboCompra, Compra.recibo_compra_id == ReciboCompra.id))
+    archivadas = ((r['uuid'], l['producto_id'], l['cantidad'], l['costo_unitario']) for r in recibos_archivados('compras', casino, datetime.min, datetime.max) for l in r['lineas'])
+    for uuid_recibo, pid, cantidad, costo in (*compras, *archivadas):
+        importes[(uuid_recibo, pid)][0] += cantidad * costo; importes[(uuid_recibo, pid)][1] += cantidad
+    costos_compra = {clave: importe / cantidad for clave, (importe, cantidad) in importes.items() if cantidad}
+
+    estado = {pid: SimpleNamespace(id=pid, cantidad=0.0, costo_promedio=0.0) for pid in productos}
+    capas = defaultdict(list); costos_venta = {}
+    movimientos = select(MovimientoStock.producto_id, MovimientoStock.delta, MovimientoStock.tipo, MovimientoStock.referencia, MovimientoStock.fecha)
+    if casino: movimientos = movimientos.join(Inventario, MovimientoStock.producto_id == Inventario.id).where(Inventario.casino == casino)
+    movimientos = movimientos.order_by(MovimientoStock.fecha, MovimientoStock.id).execution_options(yield_per=FILAS_POR_LOTE_EXPORTACION)
+    for pid, delta, tipo, referencia, fecha in db.session.execute(movimientos):
+        if pid not in estado: continue
+        producto = estado[pid]
+        if tipo not in ('alta', 'importacion') and delta:
+            costo = costos_compra.get((referencia, pid)) if tipo == 'compra' else costos_venta.get((referencia, pid)) if tipo == 'venta_anulada' else None
+            unitario = _mover_costo(producto, capas[pid], delta, costo, fecha)
+            if tipo == 'venta': costos_venta[(referencia, pid)] = unitario
+        producto.cantidad += delta
+
+    for pid, p in productos.items(): p.costo_promedio = estado[pid].costo_promedio
+    CapaCosto.query.filter(CapaCosto.producto_id.in_(productos)).delete(synchronize_session=False)
+    if current_app.config['COSTO_METODO'] == 'fifo': db.session.add_all(c for lista in capas.values() for c in lista)
+    recibos = {uuid_recibo: (rid, casino_recibo, como_fecha(dia)) for uuid_recibo, rid, casino_recibo, dia in db.session.query(Recibo.uuid, Recibo.id, Recibo.casino, func.date(Recibo.fecha)).filter(Recibo.uuid.in_({r for r, _ in costos_venta}))} if costos_venta else {}
+    filas = [{'b_recibo': recibos[r][0], 'b_producto': pid, 'b_costo': costo} for (r, pid), costo in costos_venta.items() if r in recibos]
+    tabla = Venta.__table__
+    if filas: db.session.execute(tabla.update().where(tabla.c.recibo_id == bindparam('b_recibo'), tabla.c.producto_id == bindparam('b_producto')).values(costo_unitario=bindparam('b_costo')), filas)
+    recalcular_costo_ventas({(casino_recibo, dia) for _, casino_recibo, dia in recibos.values()})
+    db.session.commit()
+    return len(productos), len(filas)
+
+# -----------------------------------------------------
+# MOVIMIENTOS DE STOCK (ATÓMICOS)
+# -----------------------------------------------------
+class StockInsuficiente(ValueError):
+    pass
+
+def registrar_movimientos(movimientos, tipo, referencia=None):
+    """Asienta {producto_id: delta} en el libro de movimientos (los deltas en cero se omiten)."""
+    registrar_asientos([(movimientos, referencia)], tipo)
+
+def registrar_asientos(asientos, tipo):
+    """Asienta varios [({producto_id: delta}, referencia)] del mismo tipo con una sola inserción (p. ej. un lote de recibos)."""
+    ahora = datetime.utcnow()
+    filas = [{'producto_id': pid, 'fecha': ahora, 'delta': delta, 'tipo': tipo, 'referencia': str(referencia)[:50] if referencia is not None else None}
+             for movimientos, referencia in asientos for pid, delta in movimientos.items() if delta]
+    if filas: db.session.execute(insert(MovimientoStock), filas)
+
+def cargar_productos(ids):
+    """Carga los productos en una sola consulta, bloqueando sus filas donde el motor lo soporta."""
+    ids = sorted({int(i) for i in ids})
+    if not ids: return {}
+    query = Inventario.query.filter(Inventario.id.in_(ids)).order_by(Inventario.id).populate_existing().with_for_update()
+    return {p.id: p for p in query}
+
+def aplicar_movimientos_stock(productos, movimientos, tipo, referencia=None, costos=None):
+    """Aplica {producto_id: delta} sobre Inventario.cantidad con UPDATE atómicos.
+
+    Las salidas (delta < 0) solo se aplican si en ese instante queda stock
+    suficiente (`cantidad >= :q`), de modo que dos cajas vendiendo las últimas
+    unidades no pueden dejar el stock en negativo. Lanza ValueError si alguna
+    salida no se pudo aplicar; el llamador debe revertir la transacción.
+    Con `tipo` los movimientos se asientan en el libro; con tipo=None el
+    llamador los registra por su cuenta (p. ej. con registrar_asientos, uno
+    por recibo de un lote).
+    También actualiza el costo de las existencias (ver valorar_movimientos, que
+    recibe `costos`) y devuelve el costo unitario de cada movimiento.
+    """
+    unitarios = valorar_movimientos(productos, movimientos, costos)
+    tabla = Inventario.__table__
+    salidas = [{'b_id': pid, 'b_q': -delta} for pid, delta in movimientos.items() if delta < 0]
+    entradas = [{'b_id': pid, 'b_q': delta} for pid, delta in movimientos.items() if delta > 0]
+    if salidas:
+        stmt = tabla.update().where(tabla.c.id == bindparam('b_id'), tabla.c.cantidad >= bindparam('b_q')).values(cantidad=tabla.c.cantidad - bindparam('b_q'))
+        if len(salidas) > 1 and db.engine.dialect.supports_sane_multi_rowcount:
+            aplicadas = db.session.execute(stmt, salidas).rowcount
+            fallidas = [] if aplicadas == len(salidas) else [s for s in salidas if productos[s['b_id']].cantidad < s['b_q']] or salidas
+        else:
+            fallidas = [s for s in salidas if db.session.execute(stmt, s).rowcount != 1]
+        if fallidas:
+            nombres = ', '.join(f"'{productos[s['b_id']].nombre}'" for s in fallidas)
+            raise StockInsuficiente(f'Stock insuficiente para {nombres}. Otro registro acaba de usar las últimas unidades.')
+    if entradas:
+        stmt = tabla.update().where(tabla.c.id == bindparam('b_id')).values(cantidad=tabla.c.cantidad + bindparam('b_q'))
+        db.session.execute(stmt, entradas)
+    if tipo: registrar_movimientos(movimientos, tipo, referencia)
+    versionar_productos([productos[pid] for pid in movimientos])
+    # Los UPDATE no pasan por el ORM: se recarga `cantidad` al leerla y se invalida la caché
+    for pid in movimientos:
+        invalidar_codigos(claves_cache(productos[pid]))
+        db.session.expire(productos[pid], ['cantidad'])
+    return unitarios
+
+def calcular_venta(carrito, pago, productos, disponible):
+    """Valida un carrito contra `disponible` ({producto_id: stock}) y reserva ahí lo vendido.
+
+    Devuelve (lineas, salidas, total, cambio). Lanza StockInsuficiente si falta
+    stock y ValueError si los datos o el pago no son válidos.
+    """
+    lineas = []; salidas = defaultdict(float); total = 0
+    for item in carrito:
+        producto_id = int(item['id']); producto = productos.get(producto_id); cantidad = float(item['cantidad'])
+        if cantidad <= 0: raise ValueError(f"Cantidad inválida para '{item.get('nombre', producto_id)}'")
+        salidas[producto_id] -= cantidad
+        if not producto or disponible.get(producto_id, 0) < -salidas[producto_id]:
+            raise StockInsuficiente(f"No hay stock para '{item.get('nombre', producto.nombre if producto else producto_id)}'")
+        total_item = producto.precio * cantidad; total += total_item
+        lineas.append({'producto_id': producto_id, 'cantidad': cantidad, 'total': total_item})
+    cambio = pago - total
+    if cambio < 0: raise ValueError(f'Pago insuficiente. Faltan ${abs(cambio):.2f}.')
+    for producto_id, delta in salidas.items(): disponible[producto_id] += delta
+    return lineas, salidas, total, cambio
+
+# -----------------------------------------------------
+# LIBRO DE STOCK: SALDOS DIARIOS Y STOCK HISTÓRICO
+# -----------------------------------------------------
+# `movimiento_stock` es solo de inserción: cada cambio de Inventario.cantidad
+# deja ahí su delta con la hora del servidor. `flask snapshot-stock` (cron
+# diario) guarda el saldo al cierre del día de los productos que se movieron,
+# así el stock en cualquier instante es el último saldo anterior más los
+# movimientos posteriores, sin recorrer todo el historial.
+def stock_en(momento, producto_ids=None):
+    """Stock por producto en `momento` (movimientos anteriores a ese instante): {producto_id: cantidad}."""
+    S, M = SnapshotStock, MovimientoStock
+    ultimo = db.session.query(S.producto_id, func.max(S.corte).label('corte')).filter(S.corte <= momento)
+    if producto_ids is not None: ultimo = ultimo.filter(S.producto_id.in_(producto_ids))
+    ultimo = ultimo.group_by(S.producto_id).subquery()
+    saldos = defaultdict(float)
+    for pid, cantidad in db.session.query(S.producto_id, S.cantidad).join(ultimo, and_(S.producto_id == ultimo.c.producto_id, S.corte == ultimo.c.corte)):
+        saldos[pid] = cantidad
+    deltas = db.session.query(M.producto_id, func.sum(M.delta)).outerjoin(ultimo, M.producto_id == ultimo.c.producto_id) \
+        .filter(M.fecha < momento, or_(ultimo.c.corte.is_(None), M.fecha >= ultimo.c.corte))
+    if producto_ids is not None: deltas = deltas.filter(M.producto_id.in_(producto_ids))
+    for pid, delta in deltas.group_by(M.producto_id):
+        saldos[pid] += delta or 0
+    return dict(saldos)
+
+def tomar_snapshots(dia):
+    """Guarda el saldo al cierre de `dia` de los productos con movimientos ese día."""
+    inicio = datetime.combine(dia, datetime.min.time()); corte = inicio + timedelta(days=1)
+    movidos = [pid for (pid,) in db.session.query(MovimientoStock.producto_id).filter(MovimientoStock.fecha >= inicio, MovimientoStock.fecha < corte).distinct()]
+    if not movidos: return 0
+    SnapshotStock.query.filter(SnapshotStock.corte == corte, SnapshotStock.producto_id.in_(movidos)).delete(synchronize_session=False)
+    saldos = stock_en(corte, movidos)
+    db.session.execute(insert(SnapshotStock), [{'producto_id': pid, 'corte': corte, 'cantidad': saldos.get(pid, 0)} for pid in movidos])
+    return len(movidos)
+
+def snapshots_pendientes(dia=None, avance=None):
+    """Cierra `dia` (YYYY-MM-DD) o todos los días pendientes hasta ayer; devuelve (saldos, días)."""
+    if dia:
+        dias = [date.fromisoformat(dia)]
+    else:
+        ultimo_corte = db.session.query(func.max(SnapshotStock.corte)).scalar()
+        primero = ultimo_corte.date() if ultimo_corte else (db.session.query(func.min(MovimientoStock.fecha)).scalar() or datetime.utcnow()).date()
+        ayer = datetime.utcnow().date() - timedelta(days=1)
+        dias = [primero + timedelta(days=i) for i in range((ayer - primero).days + 1)]
+    total = 0
+    for i, d in enumerate(dias, 1):
+        total += tomar_snapshots(d)
+        db.session.commit()
+        if avance: avance(i / len(dias), f'Cerrado {d}')
+    return total, len(dias)
+
+def reconciliar_inventario(casino=None, solo_reportar=False):
+    """Compara Inventario.cantidad con el libro de movimientos y, salvo solo_reportar, la corrige. Devuelve las diferencias."""
+    query = db.session.query(Inventario, func.coalesce(func.sum(MovimientoStock.delta), 0)).outerjoin(MovimientoStock, MovimientoStock.producto_id == Inventario.id)
+    if casino: query = query.filter(Inventario.casino == casino)
+    diferencias = [(p, libro) for p, libro in query.group_by(Inventario.id).order_by(Inventario.casino, Inventario.nombre) if abs(p.cantidad - libro) > 1e-6]
+    reporte = [{'producto_id': p.id, 'casino': p.casino, 'nombre': p.nombre, 'inventario': p.cantidad, 'libro': libro} for p, libro in diferencias]
+    if diferencias and not solo_reportar:
+        tabla = Inventario.__table__
+        db.session.execute(tabla.update().where(tabla.c.id == bindparam('b_id')).values(cantidad=bindparam('b_q')), [{'b_id': p.id, 'b_q': libro} for p, libro in diferencias])
+        invalidar_codigos({clave for p, _ in diferencias for clave in claves_cache(p)})
+        versionar_productos([p for p, _ in diferencias])
+        db.session.commit()
+    return reporte
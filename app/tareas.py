@@ -0,0 +1,304 @@
+import inspect
+import json
+import os
+import shutil
+import socket
+import threading
+import traceback
+import uuid
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+from flask import current_app, g
+from sqlalchemy import and_, bindparam
+from sqlalchemy.exc import IntegrityError, OperationalError
+from werkzeug.utils import secure_filename
+
+from .analisis import analisis_multiperiodo, rango_analisis
+from .exportacion import FILAS_POR_LOTE_EXPORTACION, comprimir_gzip, consulta_exportacion, filas_archivadas_exportacion, filas_csv
+from .extensions import db
+from .idempotencia import purgar_claves_idempotencia
+from .models import Tarea, casino_por_defecto
+from .pronostico import calcular_pronosticos
+from .resumenes import reconstruir_tabla_resumenes
+from .stock import reconciliar_inventario, snapshots_pendientes
+
+
+# -----------------------------------------------------
+# TAREAS EN SEGUNDO PLANO
+# -----------------------------------------------------
+# Los análisis de rangos largos, las exportaciones, la reconstrucción de
+# resúmenes y la reconciliación de stock no deben ocupar los hilos de gunicorn.
+# POST /tareas deja una fila en la tabla `tarea` y `flask trabajador` (un
+# proceso aparte en la misma máquina, sin broker) la ejecuta en su pool de
+# hilos; /api/tareas/<id> da el progreso y /tareas/<id>/descarga el archivo.
+#
+# Cada hilo toma una tarea con un UPDATE condicionado a estado='pendiente'
+# (gana uno solo aunque haya varios procesos) y la corre en su propio contexto
+# de aplicación. Un hilo monitor escribe el progreso y el latido de las tareas
+# en curso, devuelve a la cola las de un trabajador que dejó de latir y crea
+# las tareas programadas de TAREAS_PROGRAMA ("nombre=min hora día mes díasem;
+# ..." en UTC). Cada minuto programado es una fila con (programa, programada)
+# única: dos trabajadores no duplican la tarea nocturna, y al arrancar se crean
+# las de la última hora que nadie creó.
+#
+# Las tareas que escriben abren sus transacciones con BEGIN IMMEDIATE en SQLite
+# (como las peticiones POST) y deben confirmar por pasos: mientras una
+# transacción sigue abierta, ni el progreso ni las peticiones pueden escribir.
+TAREAS = {}  # tipo -> SimpleNamespace(funcion, parametros, requeridos, escribe, intentos)
+ESTADOS_ACTIVOS = ('pendiente', 'en_curso')
+
+def tarea(tipo, escribe=False, intentos=1):
+    """Registra una función como tarea; recibe `trabajo` y los parámetros como texto (o None)."""
+    def registrar(funcion):
+        parametros = {nombre: p for nombre, p in inspect.signature(funcion).parameters.items() if nombre != 'trabajo'}
+        requeridos = [nombre for nombre, p in parametros.items() if p.default is inspect.Parameter.empty]
+        TAREAS[tipo] = SimpleNamespace(funcion=funcion, parametros=list(parametros), requeridos=requeridos, escribe=escribe, intentos=intentos)
+        return funcion
+    return registrar
+
+def _es_si(valor):
+    return str(valor).strip().lower() in ('1', 'true', 'on', 'si', 'sí')
+
+class Trabajo:
+    """Lo que ve una tarea mientras corre: avance() para informar progreso y archivo() para el resultado descargable."""
+    def __init__(self, tarea_bd):
+        self.id, self.uuid = tarea_bd.id, tarea_bd.uuid
+        self.progreso, self.mensaje, self.ruta = 0.0, None, None
+
+    def avance(self, progreso=None, mensaje=None):
+        # Solo en memoria: el monitor lo escribe con el latido, fuera de la transacción de la tarea
+        if progreso is not None: self.progreso = max(0.0, min(float(progreso), 1.0))
+        if mensaje is not None: self.mensaje = str(mensaje)[:200]
+
+    def archivo(self, nombre):
+        carpeta = os.path.join(current_app.config['TAREAS_DIR'], self.uuid)
+        os.makedirs(carpeta, exist_ok=True)
+        self.ruta = os.path.join(carpeta, secure_filename(nombre))
+        return open(self.ruta, 'wb')
+
+def encolar_tarea(tipo, parametros=None, programa=None, programada=None):
+    """Agrega una tarea pendiente a la sesión (sin commit). ValueError si el tipo o los parámetros no existen o falta alguno obligatorio."""
+    registro = TAREAS.get(tipo)
+    if registro is None: raise ValueError(f'Tarea desconocida: {tipo!r}.')
+    if not isinstance(parametros or {}, dict): raise ValueError('Los parámetros deben ser un objeto.')
+    parametros = {k: str(v) for k, v in (parametros or {}).items() if v not in (None, '')}
+    sobrantes = sorted(set(parametros) - set(registro.parametros))
+    if sobrantes: raise ValueError(f"Parámetros no válidos para {tipo}: {', '.join(sobrantes)}.")
+    faltantes = [p for p in registro.requeridos if p not in parametros]
+    if faltantes: raise ValueError(f"Faltan parámetros para {tipo}: {', '.join(faltantes)}.")
+    nueva = Tarea(uuid=str(uuid.uuid4()), tipo=tipo, parametros=json.dumps(parametros), estado='pendiente', progreso=0,
+                  creada=datetime.utcnow(), disponible=programada or datetime.utcnow(), intentos=0, max_intentos=registro.intentos,
+                  programa=programa, programada=programada)
+    db.session.add(nueva)
+    return nueva
+
+def tomar_tarea(trabajador):
+    """Reserva la siguiente tarea disponible para `trabajador` y devuelve su id (None si no hay)."""
+    ahora = datetime.utcnow(); t = Tarea.__table__
+    candidatas = [i for (i,) in db.session.query(Tarea.id).filter(Tarea.estado == 'pendiente', Tarea.disponible <= ahora)
+                  .order_by(Tarea.disponible, Tarea.id).limit(10)]
+    db.session.commit()  # sin lectura abierta: en SQLite el UPDATE espera el bloqueo en vez de fallar
+    for tarea_id in candidatas:
+        tomada = db.session.execute(t.update().where(t.c.id == tarea_id, t.c.estado == 'pendiente').values(
+            estado='en_curso', trabajador=trabajador, iniciada=ahora, latido=ahora, intentos=t.c.intentos + 1)).rowcount
+        db.session.commit()
+        if tomada: return tarea_id
+    return None
+
+def ejecutar_tarea(tarea_id, en_curso=None):
+    """Corre una tarea ya tomada y guarda su resultado; si falla, la reprograma con espera creciente o la marca fallida."""
+    t = Tarea.__table__; tarea_bd = db.session.get(Tarea, tarea_id)
+    tipo, registro, trabajo = tarea_bd.tipo, TAREAS.get(tarea_bd.tipo), Trabajo(tarea_bd)
+    parametros, intentos, max_intentos = json.loads(tarea_bd.parametros or '{}'), tarea_bd.intentos, tarea_bd.max_intentos
+    db.session.commit()
+    if en_curso is not None: en_curso[tarea_id] = trabajo
+    g.tarea_escribe = bool(registro and registro.escribe)
+    try:
+        if registro is None: raise ValueError(f'Tarea desconocida: {tipo!r}.')
+        resultado = registro.funcion(trabajo, **parametros)
+        db.session.commit()
+        valores = dict(estado='terminada', progreso=1.0, terminada=datetime.utcnow(), archivo=trabajo.ruta, error=None,
+                       resultado=json.dumps(resultado, default=str) if resultado is not None else None)
+    except Exception:
+        db.session.rollback()
+        error = traceback.format_exc()[-4000:]
+        current_app.logger.exception('Tarea %s (%s) falló en el intento %s de %s', tarea_id, tipo, intentos, max_intentos)
+        if intentos < max_intentos:
+            valores = dict(estado='pendiente', trabajador=None, error=error, disponible=datetime.utcnow() + timedelta(seconds=30 * 2 ** intentos))
+        else:
+            valores = dict(estado='fallida', terminada=datetime.utcnow(), error=error)
+    finally:
+        g.tarea_escribe = False
+        if en_curso is not None: en_curso.pop(tarea_id, None)
+    db.session.execute(t.update().where(t.c.id == tarea_id).values(mensaje=trabajo.mensaje, **valores))
+    db.session.commit()
+    return valores['estado']
+
+def recuperar_tareas_huerfanas():
+    """Devuelve a la cola (o da por fallidas) las tareas en curso cuyo trabajador dejó de latir."""
+    t = Tarea.__table__; ahora = datetime.utcnow()
+    limite = ahora - timedelta(seconds=current_app.config['TAREAS_LATIDO_MAX'])
+    huerfana = and_(t.c.estado == 'en_curso', t.c.latido < limite)
+    reencoladas = db.session.execute(t.update().where(huerfana, t.c.intentos < t.c.max_intentos).values(
+        estado='pendiente', trabajador=None, disponible=ahora, mensaje='Reintento: el trabajador dejó de responder.')).rowcount
+    fallidas = db.session.execute(t.update().where(huerfana).values(
+        estado='fallida', terminada=ahora, error='El trabajador dejó de responder.')).rowcount
+    db.session.commit()
+    return reencoladas + fallidas
+
+# --- Programación tipo cron (UTC) ---
+def _campo_cron(texto, minimo, maximo):
+    valores = set()
+    for parte in texto.split(','):
+        rango, _, paso = parte.partition('/')
+        if rango == '*': inicio, fin = minimo, maximo
+        elif '-' in rango: inicio, fin = (int(x) for x in rango.split('-', 1))
+        else: inicio = int(rango); fin = maximo if paso else inicio
+        if not (minimo <= inicio <= fin <= maximo): raise ValueError(f'Campo cron fuera de rango: {parte!r}.')
+        valores.update(range(inicio, fin + 1, int(paso or 1)))
+    return valores
+
+def cron(expresion):
+    """Compila 'min hora día mes díasem' (*, a-b, a,b y /paso; domingo = 0 o 7) a una función momento -> bool."""
+    campos = expresion.split()
+    if len(campos) != 5: raise ValueError(f'Expresión cron inválida: {expresion!r} (se esperan 5 campos).')
+    minutos, horas, dias, meses, dias_semana = (_campo_cron(c, a, b) for c, (a, b) in zip(campos, [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]))
+    dias_semana = {d % 7 for d in dias_semana}
+    return lambda m: (m.minute in minutos and m.hour in horas and m.day in dias and m.month in meses
+                      and m.isoweekday() % 7 in dias_semana)
+
+def programa_tareas():
+    """[(tipo, expresión, coincide)] de TAREAS_PROGRAMA."""
+    programa = []
+    for entrada in filter(None, (e.strip() for e in current_app.config['TAREAS_PROGRAMA'].split(';'))):
+        tipo, _, expresion = (x.strip() for x in entrada.partition('='))
+        if tipo not in TAREAS: raise ValueError(f'TAREAS_PROGRAMA: tarea desconocida {tipo!r}.')
+        if TAREAS[tipo].requeridos: raise ValueError(f"TAREAS_PROGRAMA: {tipo} necesita parámetros ({', '.join(TAREAS[tipo].requeridos)}) y las tareas programadas no llevan.")
+        programa.append((tipo, expresion, cron(expresion)))
+    return programa
+
+def programar_tareas(programa, desde, hasta):
+    """Encola las tareas programadas de los minutos en (desde, hasta]; devuelve cuántas creó este proceso."""
+    creadas = 0; minuto = max(desde, hasta - timedelta(hours=1)) + timedelta(minutes=1)  # tras una caída larga solo se recupera la última hora
+    while minuto <= hasta:
+        for tipo, _, coincide in programa:
+            if not coincide(minuto): continue
+            try:
+                encolar_tarea(tipo, programa=tipo, programada=minuto); db.session.commit(); creadas += 1
+            except IntegrityError:
+                db.session.rollback()  # otro trabajador ya la creó
+        minuto += timedelta(minutes=1)
+    return creadas
+
+class PoolTareas:
+    """Hilos que ejecutan tareas de la tabla más un hilo monitor (progreso, latidos, huérfanas y programa)."""
+    def __init__(self, app, hilos, programa=None):
+        self.app, self.hilos, self.programa = app, hilos, programa
+        self.parar = threading.Event()
+        self.en_curso = {}  # tarea_id -> Trabajo
+        self.nombre = f'{socket.gethostname()}:{os.getpid()}'
+        self.ejecutadas = 0
+        self._hilos = []
+
+    def iniciar(self, hasta_vaciar=False):
+        self._hilos = [threading.Thread(target=self._trabajar, args=(hasta_vaciar,), name=f'tarea-{i}', daemon=True) for i in range(self.hilos)]
+        self._monitor = threading.Thread(target=self._monitorear, name='tarea-monitor', daemon=True)
+        for hilo in self._hilos + [self._monitor]: hilo.start()
+
+    def esperar(self):
+        for hilo in self._hilos: hilo.join()
+        self.parar.set()
+        self._monitor.join()
+
+    def _trabajar(self, hasta_vaciar):
+        trabajador = f'{self.nombre}:{threading.current_thread().name}'
+        while not self.parar.is_set():
+            try:
+                with self.app.app_context():
+                    tarea_id = tomar_tarea(trabajador)
+                    if tarea_id is not None:
+                        ejecutar_tarea(tarea_id, self.en_curso); self.ejecutadas += 1
+                        continue
+            except OperationalError:
+                self.app.logger.warning('Cola de tareas ocupada; se reintenta.', exc_info=True)
+            if hasta_vaciar: return
+            self.parar.wait(self.app.config['TAREAS_INTERVALO'])
+
+    def _monitorear(self):
+        ultimo = datetime.utcnow().replace(second=0, microsecond=0) - timedelta(hours=1)
+        t = Tarea.__table__
+        while not self.parar.wait(min(self.app.config['TAREAS_INTERVALO'], 2)):
+            with self.app.app_context():
+                try:
+                    ahora = datetime.utcnow()
+                    if self.en_curso:
+                        db.session.execute(t.update().where(t.c.id == bindparam('b_id'), t.c.estado == 'en_curso')
+                                           .values(latido=ahora, progreso=bindparam('b_progreso'), mensaje=bindparam('b_mensaje')),
+                                           [{'b_id': i, 'b_progreso': w.progreso, 'b_mensaje': w.mensaje} for i, w in list(self.en_curso.items())])
+                        db.session.commit()
+                    minuto = ahora.replace(second=0, microsecond=0)
+                    if minuto > ultimo:
+                        recuperar_tareas_huerfanas()
+                        if self.programa: programar_tareas(self.programa, ultimo, minuto)
+                        ultimo = minuto
+                except OperationalError:
+                    db.session.rollback()  # base ocupada por una tarea que escribe: se reintenta en la siguiente vuelta
+
+# --- Tareas disponibles ---
+@tarea('exportar')
+def tarea_exportar(trabajo, entidad, casino=None, desde=None, hasta=None, comprimir=None):
+    casino = casino or casino_por_defecto(); hoy = datetime.utcnow().date()
+    desde = date.fromisoformat(desde) if desde else hoy.replace(day=1)
+    hasta = date.fromisoformat(hasta) if hasta else hoy
+    exportacion = consulta_exportacion(entidad, casino, desde, hasta)
+    if exportacion is None: raise ValueError(f'No se puede exportar {entidad!r}.')
+    def con_avance(bloques):
+        for i, bloque in enumerate(bloques):
+            trabajo.avance(mensaje=f'{i * FILAS_POR_LOTE_EXPORTACION} filas escritas'); yield bloque
+    bloques = con_avance(filas_csv(*exportacion, archivadas=filas_archivadas_exportacion(entidad, casino, desde, hasta)))
+    nombre = f"{entidad}_{casino.replace(' ', '-')}_{desde}_{hasta}.csv" + ('.gz' if _es_si(comprimir) else '')
+    with trabajo.archivo(nombre) as salida:
+        for datos in (comprimir_gzip(bloques) if _es_si(comprimir) else (b.encode('utf-8') for b in bloques)): salida.write(datos)
+    return {'archivo': os.path.basename(trabajo.ruta), 'bytes': os.path.getsize(trabajo.ruta)}
+
+@tarea('analisis')
+def tarea_analisis(trabajo, casino=None, fecha_inicio=None, fecha_fin=None, top=None):
+    filtros = {k: v for k, v in dict(casino=casino, fecha_inicio=fecha_inicio, fecha_fin=fecha_fin).items() if v}
+    casino, inicio, fin = rango_analisis(filtros)
+    datos = analisis_multiperiodo(casino, inicio, fin, int(top or current_app.config['ANALISIS_TOP']))
+    with trabajo.archivo(f"analisis_{casino.replace(' ', '-')}_{inicio:%Y-%m-%d}_{fin - timedelta(days=1):%Y-%m-%d}.json") as salida:
+        salida.write(json.dumps(datos, ensure_ascii=False, default=str).encode('utf-8'))
+    return {'archivo': os.path.basename(trabajo.ruta)}
+
+@tarea('reconstruir-resumenes', escribe=True, intentos=3)
+def tarea_reconstruir_resumenes(trabajo):
+    return {'resumenes': reconstruir_tabla_resumenes()}
+
+@tarea('reconciliar-stock', escribe=True)
+def tarea_reconciliar_stock(trabajo, casino=None, solo_reportar=None):
+    diferencias = reconciliar_inventario(casino, _es_si(solo_reportar))
+    return {'corregidas': bool(diferencias) and not _es_si(solo_reportar), 'diferencias': diferencias}
+
+@tarea('snapshot-stock', escribe=True, intentos=3)
+def tarea_snapshot_stock(trabajo, dia=None):
+    saldos, dias = snapshots_pendientes(dia, trabajo.avance)
+    return {'saldos': saldos, 'dias': dias}
+
+@tarea('pronosticar-stock', escribe=True, intentos=3)
+def tarea_pronosticar_stock(trabajo, casino=None):
+    return {'productos': calcular_pronosticos(casino)}
+
+@tarea('purgar-idempotencia', escribe=True, intentos=3)
+def tarea_purgar_idempotencia(trabajo, horas=None):
+    return {'eliminadas': purgar_claves_idempotencia(int(horas) if horas else None)}
+
+@tarea('purgar-tareas', escribe=True, intentos=3)
+def tarea_purgar_tareas(trabajo, dias=None):
+    limite = datetime.utcnow() - timedelta(days=int(dias) if dias else current_app.config['TAREAS_RETENCION_DIAS'])
+    viejas = Tarea.query.filter(Tarea.estado.in_(('terminada', 'fallida')), Tarea.terminada < limite)
+    uuids = [u for (u,) in viejas.with_entities(Tarea.uuid)]
+    viejas.delete(synchronize_session=False)
+    db.session.commit()
+    for u in uuids: shutil.rmtree(os.path.join(current_app.config['TAREAS_DIR'], u), ignore_errors=True)
+    return {'eliminadas': len(uuids)}
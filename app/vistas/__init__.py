@@ -0,0 +1,9 @@
+# -----------------------------------------------------
+# VISTAS
+# -----------------------------------------------------
+# Un blueprint por dominio. Los endpoints llevan el prefijo del blueprint
+# (url_for('ventas.venta_list')); los comandos de cada blueprint se registran
+# en el grupo raíz (cli_group=None), así que siguen siendo `flask <comando>`.
+from . import analisis, api, compras, consumo, gastos, inventario, principal, tareas, ventas
+
+BLUEPRINTS = (principal.bp, inventario.bp, ventas.bp, compras.bp, gastos.bp, consumo.bp, analisis.bp, api.bp, tareas.bp)
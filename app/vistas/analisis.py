@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+import click
+from flask import Blueprint, Response, abort, current_app, jsonify, render_template, request, stream_with_context
+
+from ..analisis import analisis_multiperiodo, cache_analisis, margenes_por_producto, rango_analisis
+from ..exportacion import comprimir_gzip, consulta_exportacion, filas_archivadas_exportacion, filas_csv
+from ..models import casino_por_defecto, nombres_casinos
+from ..resumenes import reconstruir_tabla_resumenes
+
+bp = Blueprint('analisis', __name__, cli_group=None)
+
+
+# -----------------------------------------------------
+# ANÁLISIS, MÁRGENES Y EXPORTACIÓN
+# -----------------------------------------------------
+# Los cálculos están en app/analisis.py y app/exportacion.py; aquí solo se
+# leen los filtros de la petición y se arma la respuesta.
+@bp.route('/analisis')
+def analisis():
+    # Tarjetas, gráficos y tablas se llenan desde /api/analisis con estos mismos filtros
+    casino, fecha_inicio, fecha_fin = rango_analisis(request.args)
+    return render_template('analisis.html', casino=casino, fecha_inicio=fecha_inicio.strftime('%Y-%m-%d'),
+                           fecha_fin=(fecha_fin - timedelta(days=1)).strftime('%Y-%m-%d'), top=current_app.config['ANALISIS_TOP'])
+
+@bp.route('/api/analisis')
+def api_analisis():
+    try: casino, inicio, fin = rango_analisis(request.args)
+    except ValueError: return jsonify({'error': 'Fechas inválidas (formato AAAA-MM-DD).'}), 400
+    if fin <= inicio: return jsonify({'error': 'La fecha fin debe ser posterior a la de inicio.'}), 400
+    top = max(1, min(request.args.get('top', current_app.config['ANALISIS_TOP'], type=int), 100))
+    clave = (casino, inicio, fin, top)
+    encontrado, datos = cache_analisis.obtener(clave)
+    if not encontrado:
+        datos = analisis_multiperiodo(casino, inicio, fin, top)
+        cache_analisis.guardar(clave, datos)
+    return jsonify(datos)
+
+@bp.route('/analisis/margenes')
+def analisis_margenes():
+    casino, inicio, fin = rango_analisis(request.args)
+    filas = margenes_por_producto(casino, inicio, fin)
+    totales = {c: sum(f[c] for f in filas) for c in ('ingresos', 'costo', 'margen', 'sin_costo', 'ingresos_sin_costo')}
+    costeados = totales['ingresos'] - totales['ingresos_sin_costo']
+    totales['margen_pct'] = totales['margen'] / costeados * 100 if costeados else None
+    return render_template('analisis_margenes.html', filas=filas, totales=totales, casino=casino, metodo=current_app.config['COSTO_METODO'],
+                           fecha_inicio=inicio.strftime('%Y-%m-%d'), fecha_fin=(fin - timedelta(days=1)).strftime('%Y-%m-%d'))
+
+@bp.route('/exportar/<entidad>')
+def exportar_csv(entidad):
+    casino = request.args.get('casino', casino_por_defecto())
+    hoy = datetime.utcnow().date()
+    try:
+        desde = datetime.strptime(request.args.get('desde', hoy.replace(day=1).isoformat()), '%Y-%m-%d').date()
+        hasta = datetime.strptime(request.args.get('hasta', hoy.isoformat()), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Fechas inválidas (formato AAAA-MM-DD).'}), 400
+    # Se valida antes de abrir el stream: una vez enviados los encabezados el error sería una descarga cortada
+    if casino not in nombres_casinos(): abort(404)
+    exportacion = consulta_exportacion(entidad, casino, desde, hasta)
+    if exportacion is None: abort(404)
+    nombre = f"{entidad}_{casino.replace(' ', '-')}_{desde}_{hasta}.csv"
+    bloques = filas_csv(*exportacion, archivadas=filas_archivadas_exportacion(entidad, casino, desde, hasta))
+    if request.args.get('gzip') == '1':
+        return Response(stream_with_context(comprimir_gzip(bloques)), mimetype='application/gzip',
+                        headers={'Content-Disposition': f'attachment; filename="{nombre}.gz"'})
+    return Response(stream_with_context(b.encode('utf-8') for b in bloques), mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename="{nombre}"'})
+
+@bp.cli.command('reconstruir-resumenes')
+def reconstruir_resumenes():
+    """Recalcula desde cero la tabla de resúmenes diarios."""
+    click.echo(f'✅ {reconstruir_tabla_resumenes()} resúmenes diarios reconstruidos.')
@@ -0,0 +1,116 @@
+import json
+import queue
+from datetime import datetime, timezone
+
+from flask import Blueprint, Response, jsonify, request
+
+from ..busqueda import buscar_en_inventario, normalizar_busqueda
+from ..catalogo import cache_codigos, canal_stock, producto_a_dict, version_actual
+from ..extensions import db
+from ..models import Inventario, ProductoEliminado, casino_por_defecto
+from ..stock import registrar_movimientos, stock_en
+
+bp = Blueprint('api', __name__, cli_group=None)
+
+
+# -----------------------------------------------------
+# API DEL POS Y STOCK EN VIVO
+# -----------------------------------------------------
+@bp.route('/api/producto/<code>')
+def buscar_producto_por_codigo(code):
+    casino = request.args.get('casino', casino_por_defecto())
+    encontrado, producto = cache_codigos.obtener((casino, code))
+    if not encontrado:
+        item = Inventario.query.filter_by(codigo_barras=code, casino=casino).first()
+        producto = producto_a_dict(item) if item else None
+        cache_codigos.guardar((casino, code), producto)
+    if producto: return jsonify(producto)
+    return jsonify({'error': 'Producto no encontrado'}), 404
+@bp.route('/api/catalogo')
+def api_catalogo():
+    """Catálogo del casino para los POS. ETag = versión; `?since=N` devuelve solo lo cambiado y eliminado después de N."""
+    casino = request.args.get('casino', casino_por_defecto())
+    version = version_actual('inventario', casino)
+    if request.if_none_match.contains(str(version)):
+        respuesta = Response(status=304)
+    else:
+        since = request.args.get('since', type=int)
+        completo = since is None or since > version  # una versión futura significa copia local de otra base
+        query = Inventario.query.filter(Inventario.casino == casino, Inventario.activo)
+        eliminados = []
+        if not completo:
+            query = query.filter(Inventario.version > since)
+            eliminados = [pid for (pid,) in db.session.query(ProductoEliminado.producto_id).filter(ProductoEliminado.casino == casino, ProductoEliminado.version > since)]
+        respuesta = jsonify({'casino': casino, 'version': version, 'completo': completo, 'productos': [producto_a_dict(p) for p in query.order_by(Inventario.nombre)], 'eliminados': eliminados})
+    respuesta.set_etag(str(version))
+    respuesta.headers['Cache-Control'] = 'no-cache'
+    return respuesta
+@bp.route('/api/productos/buscar')
+def buscar_productos():
+    """Búsqueda para autocompletar: ?q=&casino=[&limite=]. Sin acentos, por prefijo o por parte del nombre."""
+    casino = request.args.get('casino', casino_por_defecto())
+    limite = min(max(request.args.get('limite', 10, type=int), 1), 50)
+    q = request.args.get('q', '')
+    productos = buscar_en_inventario(casino, q, limite) if normalizar_busqueda(q) else []
+    return jsonify({'q': q, 'productos': [producto_a_dict(p) for p in productos]})
+@bp.route('/api/productos/lookup', methods=['POST'])
+def buscar_productos_por_codigos():
+    data = request.get_json(silent=True) or {}
+    casino = data.get('casino', casino_por_defecto()); codigos = data.get('codigos')
+    if not isinstance(codigos, list) or len(codigos) > 1000: return jsonify({'error': 'Se requiere una lista "codigos" de hasta 1000 elementos.'}), 400
+    productos = {}; faltantes = []
+    for code in {str(c) for c in codigos if c}:
+        encontrado, producto = cache_codigos.obtener((casino, code))
+        if encontrado: productos[code] = producto
+        else: faltantes.append(code)
+    if faltantes:
+        # Los códigos que no están en caché se resuelven en una sola consulta
+        items = {i.codigo_barras: producto_a_dict(i) for i in Inventario.query.filter(Inventario.casino == casino, Inventario.codigo_barras.in_(faltantes))}
+        for code in faltantes:
+            productos[code] = items.get(code)
+            cache_codigos.guardar((casino, code), productos[code])
+    return jsonify({'productos': {c: p for c, p in productos.items() if p}, 'no_encontrados': sorted(c for c, p in productos.items() if not p)})
+@bp.route('/api/inventario/nuevo', methods=['POST'])
+def api_inventario_nuevo():
+    data = request.get_json()
+    if not data or not data.get('nombre') or not data.get('unidad'): return jsonify({'error': 'Nombre y unidad son requeridos.'}), 400
+    item = Inventario(codigo_barras=(data.get('codigo_barras') or '').strip() or None, nombre=data.get('nombre'), cantidad=float(data.get('cantidad', 0)), unidad=data.get('unidad'), minimo=float(data.get('minimo', 0)), precio=float(data.get('precio', 0)), casino=data.get('casino', casino_por_defecto()))
+    db.session.add(item); db.session.flush()
+    registrar_movimientos({item.id: item.cantidad}, 'alta')
+    db.session.commit()
+    return jsonify({'id': item.id, 'nombre': item.nombre, 'codigo_barras': item.codigo_barras}), 201
+@bp.route('/api/inventario/stock_historico')
+def api_stock_historico():
+    """Stock de los productos de un casino en un instante: ?casino=&fecha=ISO 8601 (UTC)[&producto_id=]."""
+    casino = request.args.get('casino', casino_por_defecto())
+    try: momento = datetime.fromisoformat(request.args['fecha'])
+    except (KeyError, ValueError): return jsonify({'error': 'Parámetro fecha inválido (use ISO 8601).'}), 400
+    if momento.tzinfo: momento = momento.astimezone(timezone.utc).replace(tzinfo=None)
+    query = db.session.query(Inventario.id, Inventario.nombre, Inventario.unidad).filter(Inventario.casino == casino)
+    if request.args.get('producto_id', '').isdigit(): query = query.filter(Inventario.id == int(request.args['producto_id']))
+    productos = query.order_by(Inventario.nombre).all()
+    saldos = stock_en(momento, [p.id for p in productos])
+    return jsonify({'casino': casino, 'fecha': momento.isoformat(), 'productos': [{'id': p.id, 'nombre': p.nombre, 'unidad': p.unidad, 'cantidad': saldos.get(p.id, 0)} for p in productos]})
+
+@bp.route('/stream/stock')
+def stream_stock():
+    """Eventos `stock` (mismo formato que el delta de /api/catalogo) y `stock_bajo` del casino."""
+    casino = request.args.get('casino', casino_por_defecto())
+    cola = canal_stock.suscribir(casino)
+    if cola is None: return jsonify({'error': 'Demasiadas conexiones abiertas.'}), 503
+    canal_stock.notificar()
+
+    def eventos():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try: evento, datos = cola.get(timeout=15)
+                except queue.Empty:
+                    yield ': ping\n\n'  # mantiene viva la conexión a través de proxies
+                    continue
+                if evento is None: return
+                yield f'event: {evento}\ndata: {json.dumps(datos)}\n\n'
+        finally:
+            canal_stock.desuscribir(casino, cola)
+
+    return Response(eventos(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
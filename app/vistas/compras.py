@@ -0,0 +1,109 @@
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import click
+from flask import Blueprint, flash, g, jsonify, redirect, render_template, request, url_for
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
+
+from ..extensions import db
+from ..idempotencia import guardar_respuesta_idempotente, idempotente, nuevo_recibo_id, respuesta_previa
+from ..models import Compra, Inventario, PronosticoStock, ReciboCompra, casino_por_defecto
+from ..paginacion import paginar_recibos
+from ..pronostico import calcular_pronosticos
+from ..resumenes import acumular_resumen
+from ..stock import aplicar_movimientos_stock, cargar_productos
+
+bp = Blueprint('compras', __name__, cli_group=None)
+
+
+# -----------------------------------------------------
+# COMPRAS
+# -----------------------------------------------------
+@bp.route('/compras')
+def compra_list():
+    casino = request.args.get('casino', casino_por_defecto())
+    query = ReciboCompra.query.options(selectinload(ReciboCompra.lineas).joinedload(Compra.producto)).filter(ReciboCompra.casino == casino)
+    recibos, cursor_anterior, cursor_siguiente = paginar_recibos(query, ReciboCompra, request.args.get('cursor'), request.args.get('dir', 'next'))
+    return render_template('compras_list.html', recibos=recibos, casino=casino, cursor_anterior=cursor_anterior, cursor_siguiente=cursor_siguiente)
+@bp.route('/compras/registrar')
+def compra_registrar():
+    casino = request.args.get('casino', casino_por_defecto())
+    return render_template('compras_form.html', casino=casino)
+@bp.route('/compras/registrar_multiple', methods=['POST'])
+@idempotente
+def compra_registrar_multiple():
+    data = request.get_json(); carrito = data.get('carrito'); proveedor = data.get('proveedor'); comprador = data.get('comprador'); casino = data.get('casino')
+    if not all([carrito, proveedor, comprador, casino]): return jsonify({'error': 'Faltan datos en la solicitud.'}), 400
+    try:
+        with db.session.begin_nested():
+            productos = cargar_productos(item['id'] for item in carrito)
+            total_compra = 0; lineas = []; entradas = defaultdict(float); importes = defaultdict(float)
+            for item in carrito:
+                producto = productos.get(int(item['id']))
+                if not producto: raise ValueError(f"Producto con ID {item['id']} no encontrado.")
+                cantidad = float(item['cantidad']); costo_unitario = float(item['costo_unitario']); entradas[producto.id] += cantidad; importes[producto.id] += cantidad * costo_unitario
+                lineas.append({'producto_id': producto.id, 'cantidad': cantidad, 'costo_unitario': costo_unitario})
+                total_compra += cantidad * costo_unitario
+            recibo = ReciboCompra(uuid=nuevo_recibo_id(), fecha=datetime.utcnow(), total=total_compra, proveedor=proveedor, comprador=comprador, casino=casino)
+            # El costo promedio se actualiza aquí mismo con el de la compra (varias líneas del mismo producto se ponderan)
+            costos = {pid: importes[pid] / cantidad for pid, cantidad in entradas.items() if cantidad}
+            aplicar_movimientos_stock(productos, entradas, 'compra', recibo.uuid, costos)
+            db.session.add(recibo); db.session.flush()
+            db.session.execute(insert(Compra), [dict(linea, recibo_compra_id=recibo.id, casino=recibo.casino, fecha=recibo.fecha) for linea in lineas])
+            acumular_resumen(casino, recibo.fecha, compras=total_compra)
+            cuerpo = guardar_respuesta_idempotente({'mensaje': 'Compra registrada y stock actualizado con éxito.', 'recibo_id': recibo.uuid})
+        db.session.commit()
+        return jsonify(cuerpo), 200
+    except ValueError as e: db.session.rollback(); return jsonify({'error': str(e)}), 400
+    except IntegrityError:
+        db.session.rollback()
+        previa = respuesta_previa(g.clave_idempotencia) if g.get('clave_idempotencia') else None
+        return previa if previa is not None else (jsonify({'error': 'Error al guardar la compra.'}), 500)
+@bp.route('/compras/eliminar/<recibo_id>', methods=['POST'])
+def compra_eliminar_recibo(recibo_id):
+    recibo = ReciboCompra.query.options(selectinload(ReciboCompra.lineas)).filter_by(uuid=recibo_id).first_or_404()
+    casino = recibo.casino
+    try:
+        with db.session.begin_nested():
+            # Retirar del inventario lo que había ingresado con la compra
+            salidas = defaultdict(float)
+            for compra in recibo.lineas: salidas[compra.producto_id] -= compra.cantidad
+            aplicar_movimientos_stock(cargar_productos(salidas), salidas, 'compra_anulada', recibo.uuid)
+            acumular_resumen(casino, recibo.fecha, compras=-recibo.total)
+            db.session.delete(recibo)
+        db.session.commit()
+    except ValueError as e:
+        db.session.rollback()
+        flash(f'❌ No se puede eliminar la compra: {e}', 'danger')
+        return redirect(url_for('compras.compra_list', casino=casino))
+    flash('⚠️ Recibo de compra eliminado. El stock ha sido revertido.', 'warning')
+    return redirect(url_for('compras.compra_list', casino=casino))
+
+# --- Compra sugerida (ver app/pronostico.py) ---
+@bp.route('/compras/sugerida')
+def compra_sugerida():
+    casino = request.args.get('casino', casino_por_defecto())
+    sugeridos = (PronosticoStock.query.join(Inventario).options(joinedload(PronosticoStock.producto))
+                 .filter(Inventario.casino == casino, PronosticoStock.cantidad_sugerida > 0).all())
+    # Primero lo que se acaba antes
+    sugeridos.sort(key=lambda p: p.producto.cantidad / p.consumo_diario if p.consumo_diario > 0 else float('-inf'))
+    calculado = db.session.query(func.max(PronosticoStock.calculado)).join(Inventario).filter(Inventario.casino == casino).scalar()
+    return render_template('compras_sugerida.html', sugeridos=sugeridos, calculado=calculado, casino=casino)
+
+@bp.route('/compras/sugerida/recalcular', methods=['POST'])
+def compra_sugerida_recalcular():
+    casino = request.form.get('casino', casino_por_defecto())
+    total = calcular_pronosticos(casino)
+    flash(f'📈 Pronóstico recalculado para {total} productos de {casino}.', 'success')
+    return redirect(url_for('compras.compra_sugerida', casino=casino))
+
+@bp.cli.command('pronosticar-stock')
+@click.option('--casino', default=None, help='Solo este casino (por defecto todos).')
+def pronosticar_stock(casino):
+    """Recalcula consumo pronosticado, punto de reorden y cantidad sugerida de cada producto."""
+    inicio = time.perf_counter()
+    total = calcular_pronosticos(casino)
+    click.echo(f'📈 {total} productos pronosticados en {time.perf_counter() - inicio:.2f} s.')
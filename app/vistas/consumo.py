@@ -0,0 +1,322 @@
+from collections import defaultdict
+from datetime import datetime
+
+from flask import Blueprint, flash, jsonify, redirect, render_template, request, url_for
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+
+from ..extensions import db
+from ..listados import listado_condicional
+from ..models import ConsumoRefrigerio, ConsumoRefrigerioItem, Inventario, RecetaRefrigerio, RecetaRefrigerioItem, casino_por_defecto
+from ..resumenes import acumular_resumen
+from ..stock import aplicar_movimientos_stock, cargar_productos
+
+bp = Blueprint('consumo', __name__, cli_group=None)
+
+
+# -----------------------------------------------------
+# CONSUMO DE REFRIGERIOS (NUEVAS RUTAS CRUD)
+# -----------------------------------------------------
+@bp.route('/consumo')
+def consumo_list():
+    casino = request.args.get('casino', casino_por_defecto())
+    # Muestra nombre y unidad de los productos: también depende de inventario
+    return listado_condicional('consumo_list.html', 'consumo_list_tabla.html', ('consumo', 'inventario'), casino, lambda: {
+        'consumos': ConsumoRefrigerio.query.options(
+            selectinload(ConsumoRefrigerio.items).joinedload(ConsumoRefrigerioItem.producto)
+        ).filter_by(casino=casino).order_by(ConsumoRefrigerio.fecha.desc()).all()})
+
+@bp.route('/consumo/nuevo', methods=['GET', 'POST'])
+def consumo_nuevo():
+    casino = request.args.get('casino', casino_por_defecto())
+    if request.method == 'POST':
+        try:
+            with db.session.begin_nested():
+                nuevo_consumo = ConsumoRefrigerio(
+                    fecha=datetime.strptime(request.form['fecha'], '%Y-%m-%d').date(),
+                    descripcion=request.form['descripcion'],
+                    cantidad_total=int(request.form['cantidad_total']),
+                    responsable=request.form['responsable'],
+                    casino=request.form['casino']
+                )
+                db.session.add(nuevo_consumo)
+                nuevo_consumo.receta, lineas = lineas_de_consumo(request.form, nuevo_consumo.cantidad_total, nuevo_consumo.casino)
+
+                productos = cargar_productos(pid for pid, _ in lineas)
+                salidas = defaultdict(float)
+                for producto_id, cantidad_consumida in lineas:
+                    producto_inv = productos.get(producto_id)
+                    if not producto_inv: raise ValueError(f"Producto con ID {producto_id} no encontrado.")
+                    salidas[producto_id] -= cantidad_consumida
+                    if producto_inv.cantidad < -salidas[producto_id]:
+                        raise ValueError(f"Stock insuficiente para '{producto_inv.nombre}'. Necesitas: {-salidas[producto_id]}, Disponible: {producto_inv.cantidad}")
+                db.session.flush()  # para obtener nuevo_consumo.id
+                aplicar_movimientos_stock(productos, salidas, 'consumo', nuevo_consumo.id)
+
+                if lineas:
+                    db.session.execute(insert(ConsumoRefrigerioItem), [
+                        {'consumo_id': nuevo_consumo.id, 'producto_id': producto_id, 'cantidad_consumida': cantidad_consumida}
+                        for producto_id, cantidad_consumida in lineas
+                    ])
+
+                acumular_resumen(nuevo_consumo.casino, nuevo_consumo.fecha, refrigerios=nuevo_consumo.cantidad_total)
+            
+            db.session.commit()
+            flash('✅ Consumo de refrigerio registrado y stock actualizado.', 'success')
+            return redirect(url_for('consumo.consumo_list', casino=nuevo_consumo.casino))
+
+        except (ValueError, AttributeError) as e:
+            db.session.rollback()
+            flash(f'❌ Error: {e}', 'danger')
+            return redirect(url_for('consumo.consumo_nuevo', casino=casino))
+    
+    productos = Inventario.query.filter_by(casino=casino, activo=True).order_by(Inventario.nombre).all()
+    recetas = RecetaRefrigerio.query.filter_by(casino=casino).order_by(RecetaRefrigerio.nombre).all()
+    return render_template('consumo_form.html', productos=productos, recetas=recetas, casino=casino, consumo=None)
+
+
+def sincronizar_items_consumo(consumo, nuevas, tipo):
+    """Lleva los ítems de `consumo` a `nuevas` ({producto_id: cantidad_consumida}) tocando solo lo que cambia.
+
+    El stock de cada producto afectado se ajusta por la diferencia neta entre lo
+    consumido antes y ahora (un solo lote de UPDATE, con las filas bloqueadas), los
+    ítems existentes se actualizan en su lugar y solo se insertan/borran los que
+    entran o salen. Devuelve los netos aplicados.
+    """
+    anteriores = defaultdict(float)
+    for item in consumo.items: anteriores[item.producto_id] += item.cantidad_consumida
+    productos = cargar_productos(set(anteriores) | set(nuevas))
+    netos = {}
+    for producto_id in set(anteriores) | set(nuevas):
+        producto_inv = productos.get(producto_id)
+        if not producto_inv:
+            if producto_id in nuevas: raise ValueError(f"Producto con ID {producto_id} no encontrado.")
+            continue  # el producto ya no existe: no hay stock que devolver
+        neto = anteriores.get(producto_id, 0) - nuevas.get(producto_id, 0)
+        if abs(neto) < 1e-9: continue
+        if producto_inv.cantidad < -neto:
+            raise ValueError(f"Stock insuficiente para '{producto_inv.nombre}'. Necesitas: {-neto} más, Disponible: {producto_inv.cantidad}")
+        netos[producto_id] = neto
+    if netos: aplicar_movimientos_stock(productos, netos, tipo, consumo.id)
+
+    vistos = set()
+    for item in list(consumo.items):
+        if item.producto_id in nuevas and item.producto_id not in vistos:
+            vistos.add(item.producto_id)
+            if item.cantidad_consumida != nuevas[item.producto_id]: item.cantidad_consumida = nuevas[item.producto_id]
+        else:
+            consumo.items.remove(item)  # delete-orphan
+    consumo.items.extend(ConsumoRefrigerioItem(producto_id=pid, cantidad_consumida=cantidad) for pid, cantidad in nuevas.items() if pid not in vistos)
+    return netos
+
+@bp.route('/consumo/editar/<int:consumo_id>', methods=['GET', 'POST'])
+def consumo_editar(consumo_id):
+    consumo = ConsumoRefrigerio.query.options(selectinload(ConsumoRefrigerio.items)).get_or_404(consumo_id)
+    casino = consumo.casino
+    
+    if request.method == 'POST':
+        try:
+            with db.session.begin_nested():
+                acumular_resumen(consumo.casino, consumo.fecha, refrigerios=-consumo.cantidad_total)
+
+                # Actualizar datos principales
+                consumo.fecha = datetime.strptime(request.form['fecha'], '%Y-%m-%d').date()
+                consumo.descripcion = request.form['descripcion']
+                consumo.cantidad_total = int(request.form['cantidad_total'])
+                consumo.responsable = request.form['responsable']
+                consumo.casino = request.form['casino']
+
+                # Solo se aplica al stock la diferencia con la composición anterior
+                consumo.receta, lineas = lineas_de_consumo(request.form, consumo.cantidad_total, consumo.casino)
+                nuevas = defaultdict(float)
+                for producto_id, cantidad_consumida in lineas: nuevas[producto_id] += cantidad_consumida
+                sincronizar_items_consumo(consumo, nuevas, 'consumo_editado')
+
+                acumular_resumen(consumo.casino, consumo.fecha, refrigerios=consumo.cantidad_total)
+            
+            db.session.commit()
+            flash('🟣 Consumo de refrigerio actualizado correctamente.', 'info')
+            return redirect(url_for('consumo.consumo_list', casino=consumo.casino))
+
+        except (ValueError, AttributeError) as e:
+            db.session.rollback()
+            flash(f'❌ Error al actualizar: {e}', 'danger')
+            # Si sincronizar_items_consumo no pudo descontar la diferencia (sin stock), el rollback deja el consumo y el stock como estaban
+            return redirect(url_for('consumo.consumo_editar', consumo_id=consumo_id))
+
+    productos = Inventario.query.filter_by(casino=casino, activo=True).order_by(Inventario.nombre).all()
+    recetas = RecetaRefrigerio.query.filter_by(casino=casino).order_by(RecetaRefrigerio.nombre).all()
+    return render_template('consumo_form.html', consumo=consumo, productos=productos, recetas=recetas, casino=casino)
+
+
+@bp.route('/consumo/eliminar/<int:consumo_id>', methods=['POST'])
+def consumo_eliminar(consumo_id):
+    consumo = ConsumoRefrigerio.query.options(selectinload(ConsumoRefrigerio.items)).get_or_404(consumo_id)
+    casino = consumo.casino
+    
+    with db.session.begin_nested():
+        # Devolver los productos al inventario antes de eliminar
+        sincronizar_items_consumo(consumo, {}, 'consumo_anulado')
+        acumular_resumen(casino, consumo.fecha, refrigerios=-consumo.cantidad_total)
+        db.session.delete(consumo)
+    
+    db.session.commit()
+    flash('⚠️ Registro de consumo eliminado. El stock ha sido restaurado.', 'warning')
+    return redirect(url_for('consumo.consumo_list', casino=casino))
+
+# -----------------------------------------------------
+# RECETAS Y PLANIFICADOR DE REFRIGERIOS
+# -----------------------------------------------------
+# Una receta guarda cuánto de cada producto lleva UNA porción. El planificador
+# arma la matriz recetas × productos y, contra el stock actual del casino,
+# calcula de una vez cuántas porciones salen de cada receta, qué insumo las
+# limita y cuánto falta para llegar a un objetivo de porciones.
+def lineas_de_consumo(form, cantidad_total, casino):
+    """(receta, [(producto_id, cantidad_consumida)]) según la receta elegida o la composición escrita a mano."""
+    receta_id = form.get('receta_id', type=int)
+    if receta_id:
+        receta = db.session.get(RecetaRefrigerio, receta_id)
+        if not receta or receta.casino != casino: raise ValueError('La receta seleccionada no existe en este casino.')
+        return receta, [(item.producto_id, item.cantidad_por_unidad * cantidad_total) for item in receta.items]
+    productos_ids, cantidades = form.getlist('producto_id[]'), form.getlist('cantidad[]')
+    return None, [(int(pid), float(cant) * cantidad_total) for pid, cant in zip(productos_ids, cantidades) if pid and cant]
+
+def planificar_recetas(recetas, objetivos=None):
+    """Porciones posibles, insumo limitante y faltantes de cada receta con el stock actual.
+
+    `objetivos` es {receta_id: porciones}. Además del faltante de cada receta por separado,
+    'plan' trae el faltante de preparar todos los objetivos a la vez (comparten el stock).
+    """
+    import numpy as np  # solo lo necesita el planificador
+
+    objetivos = objetivos or {}
+    ids = sorted({item.producto_id for receta in recetas for item in receta.items})
+    columna = {pid: j for j, pid in enumerate(ids)}
+    productos = {p.id: p for p in Inventario.query.filter(Inventario.id.in_(ids))} if ids else {}
+    stock = np.array([max(productos[pid].cantidad, 0.0) for pid in ids], dtype=float)
+
+    matriz = np.zeros((len(recetas), len(ids)))
+    for i, receta in enumerate(recetas):
+        for item in receta.items: matriz[i, columna[item.producto_id]] += item.cantidad_por_unidad
+    usa = matriz > 0
+    rinde = np.full(matriz.shape, np.inf)
+    np.divide(stock, matriz, out=rinde, where=usa)  # porciones que alcanza cada insumo
+    limitante = rinde.argmin(axis=1) if ids else np.zeros(len(recetas), dtype=int)
+    posibles = np.floor(rinde.min(axis=1, initial=np.inf) + 1e-9)
+    posibles[~usa.any(axis=1)] = 0  # receta sin insumos
+
+    objetivo = np.array([max(objetivos.get(receta.id, 0), 0) for receta in recetas], dtype=float)
+    necesario = matriz * objetivo[:, None]
+    faltante = np.maximum(necesario - stock, 0)
+    faltante_plan = np.maximum(necesario.sum(axis=0) - stock, 0)
+
+    def faltantes(fila_necesario, fila_faltante):
+        return [{'producto': productos[ids[j]], 'necesario': float(fila_necesario[j]), 'disponible': float(stock[j]), 'faltante': float(fila_faltante[j])}
+                for j in np.flatnonzero(fila_faltante > 1e-9)]
+
+    return {
+        'recetas': [{
+            'receta': receta,
+            'posibles': int(posibles[i]),
+            'limitante': productos[ids[limitante[i]]] if usa[i].any() else None,
+            'objetivo': int(objetivo[i]),
+            'faltantes': faltantes(necesario[i], faltante[i]),
+        } for i, receta in enumerate(recetas)],
+        'plan': faltantes(necesario.sum(axis=0), faltante_plan),
+    }
+
+def _objetivos_de(args):
+    """Lee ?objetivo_<receta_id>=porciones."""
+    objetivos = {}
+    for clave in args:
+        if clave.startswith('objetivo_') and clave[9:].isdigit():
+            objetivos[int(clave[9:])] = args.get(clave, 0, type=int) or 0
+    return objetivos
+
+@bp.route('/consumo/recetas')
+def receta_list():
+    casino = request.args.get('casino', casino_por_defecto())
+    recetas = RecetaRefrigerio.query.options(
+        selectinload(RecetaRefrigerio.items).joinedload(RecetaRefrigerioItem.producto)
+    ).filter_by(casino=casino).order_by(RecetaRefrigerio.nombre).all()
+    plan = planificar_recetas(recetas, _objetivos_de(request.args)) if recetas else {'recetas': [], 'plan': []}
+    return render_template('receta_list.html', plan=plan, casino=casino)
+
+@bp.route('/api/recetas/plan')
+def api_plan_recetas():
+    """Planificador en JSON: ?casino=&objetivo_<receta_id>=porciones."""
+    casino = request.args.get('casino', casino_por_defecto())
+    recetas = RecetaRefrigerio.query.options(selectinload(RecetaRefrigerio.items)).filter_by(casino=casino).order_by(RecetaRefrigerio.nombre).all()
+    plan = planificar_recetas(recetas, _objetivos_de(request.args))
+    faltantes = lambda filas: [{'producto_id': f['producto'].id, 'nombre': f['producto'].nombre, 'necesario': f['necesario'],
+                                'disponible': f['disponible'], 'faltante': f['faltante']} for f in filas]
+    return jsonify({
+        'casino': casino,
+        'recetas': [{'id': r['receta'].id, 'nombre': r['receta'].nombre, 'posibles': r['posibles'],
+                     'limitante': r['limitante'] and {'producto_id': r['limitante'].id, 'nombre': r['limitante'].nombre},
+                     'objetivo': r['objetivo'], 'faltantes': faltantes(r['faltantes'])} for r in plan['recetas']],
+        'plan': faltantes(plan['plan']),
+    })
+
+def _guardar_receta(receta):
+    receta.nombre = request.form['nombre'].strip()
+    receta.casino = request.form['casino']
+    if not receta.nombre: raise ValueError('La receta necesita un nombre.')
+    cantidades = defaultdict(float)
+    for pid, cant in zip(request.form.getlist('producto_id[]'), request.form.getlist('cantidad[]')):
+        if pid and cant and float(cant) > 0: cantidades[int(pid)] += float(cant)
+    if not cantidades: raise ValueError('La receta necesita al menos un producto con cantidad.')
+    validos = {p.id for p in Inventario.query.filter(Inventario.id.in_(cantidades), Inventario.casino == receta.casino)}
+    if validos != set(cantidades): raise ValueError('Todos los productos deben ser del inventario de ese casino.')
+    receta.items = [RecetaRefrigerioItem(producto_id=pid, cantidad_por_unidad=cant) for pid, cant in cantidades.items()]
+
+@bp.route('/consumo/recetas/nueva', methods=['GET', 'POST'])
+def receta_nueva():
+    casino = request.args.get('casino', casino_por_defecto())
+    if request.method == 'POST':
+        receta = RecetaRefrigerio()
+        try:
+            _guardar_receta(receta)
+            db.session.add(receta)
+            db.session.commit()
+            flash(f'✅ Receta "{receta.nombre}" guardada.', 'success')
+            return redirect(url_for('consumo.receta_list', casino=receta.casino))
+        except ValueError as e:
+            db.session.rollback()
+            flash(f'❌ Error: {e}', 'danger')
+        except IntegrityError:
+            db.session.rollback()
+            flash('❌ Ya existe una receta con ese nombre en este casino.', 'danger')
+        return redirect(url_for('consumo.receta_nueva', casino=casino))
+    productos = Inventario.query.filter_by(casino=casino, activo=True).order_by(Inventario.nombre).all()
+    return render_template('receta_form.html', receta=None, productos=productos, casino=casino)
+
+@bp.route('/consumo/recetas/editar/<int:receta_id>', methods=['GET', 'POST'])
+def receta_editar(receta_id):
+    receta = RecetaRefrigerio.query.get_or_404(receta_id)
+    if request.method == 'POST':
+        try:
+            _guardar_receta(receta)
+            db.session.commit()
+            flash(f'🟣 Receta "{receta.nombre}" actualizada.', 'info')
+            return redirect(url_for('consumo.receta_list', casino=receta.casino))
+        except ValueError as e:
+            db.session.rollback()
+            flash(f'❌ Error: {e}', 'danger')
+        except IntegrityError:
+            db.session.rollback()
+            flash('❌ Ya existe una receta con ese nombre en este casino.', 'danger')
+        return redirect(url_for('consumo.receta_editar', receta_id=receta_id))
+    productos = Inventario.query.filter_by(casino=receta.casino, activo=True).order_by(Inventario.nombre).all()
+    return render_template('receta_form.html', receta=receta, productos=productos, casino=receta.casino)
+
+@bp.route('/consumo/recetas/eliminar/<int:receta_id>', methods=['POST'])
+def receta_eliminar(receta_id):
+    receta = RecetaRefrigerio.query.get_or_404(receta_id)
+    casino = receta.casino
+    ConsumoRefrigerio.query.filter_by(receta_id=receta.id).update({'receta_id': None})  # los consumos conservan sus ítems
+    db.session.delete(receta)
+    db.session.commit()
+    flash('⚠️ Receta eliminada.', 'warning')
+    return redirect(url_for('consumo.receta_list', casino=casino))
@@ -0,0 +1,105 @@
+from datetime import datetime
+
+from flask import Blueprint, flash, redirect, render_template, request, url_for
+
+from ..extensions import db
+from ..listados import listado_condicional
+from ..models import Gasto, Inversion, casino_por_defecto
+from ..resumenes import acumular_resumen
+
+bp = Blueprint('gastos', __name__, cli_group=None)
+
+
+# -----------------------------------------------------
+# INVERSIONES (CRUD COMPLETO)
+# -----------------------------------------------------
+@bp.route('/inversiones')
+def inversion_list():
+    casino = request.args.get('casino', casino_por_defecto())
+    return listado_condicional('inversion_list.html', 'inversion_list_tabla.html', ('inversion',), casino, lambda: {
+        'items': Inversion.query.filter_by(casino=casino).order_by(Inversion.fecha.desc()).all()})
+
+@bp.route('/inversiones/nueva', methods=['GET', 'POST'])
+def inversion_nueva():
+    if request.method == 'POST':
+        nueva_inversion = Inversion(fecha=datetime.strptime(request.form['fecha'], '%Y-%m-%d'),descripcion=request.form['descripcion'],costo=float(request.form['costo']),proveedor=request.form['proveedor'],comprador=request.form['comprador'],casino=request.form['casino'])
+        db.session.add(nueva_inversion)
+        acumular_resumen(nueva_inversion.casino, nueva_inversion.fecha, inversiones=nueva_inversion.costo)
+        db.session.commit()
+        flash('✅ Inversión registrada correctamente.', 'success')
+        return redirect(url_for('gastos.inversion_list', casino=nueva_inversion.casino))
+    return render_template('inversion_form.html', item=None, casino=request.args.get('casino', casino_por_defecto()))
+
+@bp.route('/inversiones/editar/<int:inversion_id>', methods=['GET', 'POST'])
+def inversion_editar(inversion_id):
+    item = Inversion.query.get_or_404(inversion_id)
+    if request.method == 'POST':
+        acumular_resumen(item.casino, item.fecha, inversiones=-item.costo)
+        item.fecha = datetime.strptime(request.form['fecha'], '%Y-%m-%d')
+        item.descripcion = request.form['descripcion']
+        item.costo = float(request.form['costo'])
+        item.proveedor = request.form['proveedor']
+        item.comprador = request.form['comprador']
+        item.casino = request.form['casino']
+        acumular_resumen(item.casino, item.fecha, inversiones=item.costo)
+        db.session.commit()
+        flash('🟣 Inversión actualizada correctamente.', 'info')
+        return redirect(url_for('gastos.inversion_list', casino=item.casino))
+    return render_template('inversion_form.html', item=item, casino=item.casino)
+
+@bp.route('/inversiones/eliminar/<int:inversion_id>', methods=['POST'])
+def inversion_eliminar(inversion_id):
+    item = Inversion.query.get_or_404(inversion_id)
+    casino = item.casino
+    db.session.delete(item)
+    acumular_resumen(casino, item.fecha, inversiones=-item.costo)
+    db.session.commit()
+    flash('⚠️ Inversión eliminada.', 'warning')
+    return redirect(url_for('gastos.inversion_list', casino=casino))
+
+# -----------------------------------------------------
+# GASTOS (CRUD COMPLETO)
+# -----------------------------------------------------
+@bp.route('/gastos')
+def gasto_list():
+    casino = request.args.get('casino', casino_por_defecto())
+    return listado_condicional('gasto_list.html', 'gasto_list_tabla.html', ('gasto',), casino, lambda: {
+        'items': Gasto.query.filter_by(casino=casino).order_by(Gasto.fecha.desc()).all()})
+
+@bp.route('/gastos/nuevo', methods=['GET', 'POST'])
+def gasto_nuevo():
+    if request.method == 'POST':
+        nuevo_gasto = Gasto(fecha=datetime.strptime(request.form['fecha'], '%Y-%m-%d'),descripcion=request.form['descripcion'],costo=float(request.form['costo']),proveedor=request.form['proveedor'],comprador=request.form['comprador'],casino=request.form['casino'])
+        db.session.add(nuevo_gasto)
+        acumular_resumen(nuevo_gasto.casino, nuevo_gasto.fecha, gastos=nuevo_gasto.costo)
+        db.session.commit()
+        flash('✅ Gasto registrado correctamente.', 'success')
+        return redirect(url_for('gastos.gasto_list', casino=nuevo_gasto.casino))
+    return render_template('gasto_form.html', item=None, casino=request.args.get('casino', casino_por_defecto()))
+
+@bp.route('/gastos/editar/<int:gasto_id>', methods=['GET', 'POST'])
+def gasto_editar(gasto_id):
+    item = Gasto.query.get_or_404(gasto_id)
+    if request.method == 'POST':
+        acumular_resumen(item.casino, item.fecha, gastos=-item.costo)
+        item.fecha = datetime.strptime(request.form['fecha'], '%Y-%m-%d')
+        item.descripcion = request.form['descripcion']
+        item.costo = float(request.form['costo'])
+        item.proveedor = request.form['proveedor']
+        item.comprador = request.form['comprador']
+        item.casino = request.form['casino']
+        acumular_resumen(item.casino, item.fecha, gastos=item.costo)
+        db.session.commit()
+        flash('🟣 Gasto actualizado correctamente.', 'info')
+        return redirect(url_for('gastos.gasto_list', casino=item.casino))
+    return render_template('gasto_form.html', item=item, casino=item.casino)
+
+@bp.route('/gastos/eliminar/<int:gasto_id>', methods=['POST'])
+def gasto_eliminar(gasto_id):
+    item = Gasto.query.get_or_404(gasto_id)
+    casino = item.casino
+    db.session.delete(item)
+    acumular_resumen(casino, item.fecha, gastos=-item.costo)
+    db.session.commit()
+    flash('⚠️ Gasto eliminado.', 'warning')
+    return redirect(url_for('gastos.gasto_list', casino=casino))
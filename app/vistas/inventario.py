@@ -0,0 +1,219 @@
+import csv
+import io
+
+import click
+from flask import Blueprint, current_app, flash, jsonify, redirect, render_template, request, url_for
+from sqlalchemy import exists, or_
+from sqlalchemy.orm import joinedload
+
+from ..bd import insert_con_conflicto
+from ..busqueda import normalizar_busqueda, reconstruir_indice_busqueda
+from ..catalogo import invalidar_codigos, registrar_baja_producto, siguiente_version
+from ..extensions import db
+from ..listados import listado_condicional
+from ..models import (CapaCosto, Compra, ConsumoRefrigerioItem, Inventario, MovimientoStock, PronosticoStock, RecetaRefrigerioItem, Venta,
+                      casino_por_defecto)
+from ..stock import aplicar_movimientos_stock, cargar_productos, reconciliar_inventario, registrar_movimientos, rehacer_costos, snapshots_pendientes
+
+bp = Blueprint('inventario', __name__, cli_group=None)
+
+
+# -----------------------------------------------------
+# INVENTARIO (CRUD)
+# -----------------------------------------------------
+@bp.route('/inventario')
+def inventario_list():
+    casino = request.args.get('casino', casino_por_defecto())
+    return listado_condicional('inventario_list.html', 'inventario_list_tabla.html', ('inventario', 'pronostico'), casino, lambda: {
+        'items': Inventario.query.options(joinedload(Inventario.pronostico)).filter_by(casino=casino, activo=True).order_by(Inventario.nombre).all()})
+@bp.route('/inventario/nuevo', methods=['GET', 'POST'])
+def inventario_nuevo():
+    if request.method == 'POST':
+        item = Inventario(codigo_barras=request.form['codigo_barras'].strip() or None,nombre=request.form['nombre'],cantidad=float(request.form['cantidad']),unidad=request.form['unidad'],minimo=float(request.form.get('minimo', 0)),precio=float(request.form.get('precio', 0)),casino=request.form['casino'])
+        db.session.add(item); db.session.flush()
+        registrar_movimientos({item.id: item.cantidad}, 'alta')
+        db.session.commit()
+        flash('✅ Insumo creado exitosamente.', 'success')
+        return redirect(url_for('inventario.inventario_list', casino=item.casino))
+    return render_template('inventario_form.html', item=None)
+@bp.route('/inventario/editar/<int:item_id>', methods=['GET', 'POST'])
+def inventario_editar(item_id):
+    item = Inventario.query.filter_by(id=item_id, activo=True).first_or_404()
+    if request.method == 'POST':
+        try:
+            with db.session.begin_nested():
+                productos = cargar_productos([item.id])
+                # El ajuste es la diferencia con la cantidad que mostraba el formulario y se aplica con
+                # `cantidad = cantidad + :delta`: las ventas hechas mientras tanto no se pisan
+                delta = float(request.form['cantidad']) - float(request.form.get('cantidad_original', item.cantidad))
+                item.codigo_barras = request.form['codigo_barras'].strip() or None; item.nombre = request.form['nombre']; item.unidad = request.form['unidad']; item.minimo = float(request.form.get('minimo', 0)); item.precio = float(request.form.get('precio', 0)); item.casino = request.form['casino']
+                if delta: aplicar_movimientos_stock(productos, {item.id: delta}, 'ajuste')
+            db.session.commit()
+        except ValueError as e:
+            db.session.rollback()
+            flash(f'❌ No se puede ajustar el stock: {e}', 'danger')
+            return redirect(url_for('inventario.inventario_editar', item_id=item_id))
+        flash('🟣 Insumo actualizado correctamente.', 'info')
+        return redirect(url_for('inventario.inventario_list', casino=item.casino))
+    return render_template('inventario_form.html', item=item)
+@bp.route('/inventario/eliminar/<int:item_id>', methods=['POST'])
+def inventario_eliminar(item_id):
+    item = Inventario.query.filter_by(id=item_id, activo=True).first_or_404()
+    casino = item.casino
+    RecetaRefrigerioItem.query.filter_by(producto_id=item.id).delete()  # sale de las recetas que lo usaban
+    PronosticoStock.query.filter_by(producto_id=item.id).delete()
+    if not con_historial(item.id):
+        CapaCosto.query.filter_by(producto_id=item.id).delete()
+        db.session.delete(item)
+        db.session.commit()
+        flash('⚠️ Insumo eliminado.', 'warning')
+        return redirect(url_for('inventario.inventario_list', casino=casino))
+    # El libro de movimientos es solo de inserción: con historial el producto se da de baja, su stock se
+    # cierra con un movimiento `baja` y deja el catálogo (el código de barras queda libre)
+    with db.session.begin_nested():
+        productos = cargar_productos([item.id])
+        if item.cantidad: aplicar_movimientos_stock(productos, {item.id: -item.cantidad}, 'baja')
+        item.activo = False; item.codigo_barras = None
+        registrar_baja_producto(item.id, casino)
+    db.session.commit()
+    flash('⚠️ Insumo dado de baja. Su historial de movimientos, ventas y compras se conserva.', 'warning')
+    return redirect(url_for('inventario.inventario_list', casino=casino))
+
+def con_historial(producto_id):
+    """True si el producto aparece en el libro de movimientos, ventas, compras o consumos."""
+    referencias = (MovimientoStock.producto_id, Venta.producto_id, Compra.producto_id, ConsumoRefrigerioItem.producto_id)
+    return db.session.query(or_(*[exists().where(columna == producto_id) for columna in referencias])).scalar()
+# --- IMPORTACIÓN MASIVA DE INVENTARIO (CSV) ---
+COLUMNAS_IMPORTACION = ('codigo_barras', 'nombre', 'cantidad', 'unidad', 'minimo', 'precio')
+FILAS_POR_LOTE_IMPORTACION = 1000
+
+def _numero(valor, campo, requerido=False):
+    valor = (valor or '').strip()
+    if not valor:
+        if requerido: raise ValueError(f'{campo} es requerido')
+        return 0.0
+    if ',' in valor and '.' not in valor: valor = valor.replace(',', '.')  # coma decimal
+    try: return float(valor)
+    except ValueError: raise ValueError(f"{campo} no es un número: '{valor}'")
+
+def validar_csv_inventario(texto, casino):
+    """Valida el CSV en una sola pasada. Devuelve (filas_validas, errores por fila)."""
+    try: dialecto = csv.Sniffer().sniff(texto[:4096], delimiters=',;\t')
+    except csv.Error: dialecto = csv.excel
+    lector = csv.DictReader(io.StringIO(texto), dialect=dialecto)
+    faltantes = [c for c in ('codigo_barras', 'nombre', 'unidad') if c not in (lector.fieldnames or [])]
+    if faltantes: return [], [{'fila': 1, 'error': f"Faltan columnas: {', '.join(faltantes)}"}]
+    validas, errores, vistos = [], [], {}
+    for numero, fila in enumerate(lector, start=2):  # la fila 1 son los encabezados
+        try:
+            codigo = (fila.get('codigo_barras') or '').strip()
+            nombre = (fila.get('nombre') or '').strip(); unidad = (fila.get('unidad') or '').strip()
+            if not codigo: raise ValueError('codigo_barras es requerido')
+            if len(codigo) > 50 or len(nombre) > 100 or len(unidad) > 20: raise ValueError('Texto demasiado largo')
+            if not nombre or not unidad: raise ValueError('nombre y unidad son requeridos')
+            if codigo in vistos: raise ValueError(f'codigo_barras repetido (ya aparece en la fila {vistos[codigo]})')
+            validas.append({'codigo_barras': codigo, 'nombre': nombre, 'unidad': unidad, 'casino': casino,
+                            'cantidad': _numero(fila.get('cantidad'), 'cantidad'), 'minimo': _numero(fila.get('minimo'), 'minimo'), 'precio': _numero(fila.get('precio'), 'precio')})
+            vistos[codigo] = numero
+        except ValueError as e:
+            errores.append({'fila': numero, 'codigo_barras': fila.get('codigo_barras'), 'error': str(e)})
+    return validas, errores
+
+def upsert_inventario(filas):
+    """INSERT ... ON CONFLICT (codigo_barras, casino) DO UPDATE por lotes. Devuelve (nuevos, actualizados)."""
+    if not filas: return 0, 0
+    casino = filas[0]['casino']
+    existentes = {}  # codigo -> (id, cantidad anterior)
+    # Las filas existentes quedan bloqueadas hasta el commit (en SQLite, el POST ya abrió con BEGIN IMMEDIATE):
+    # ninguna venta cambia la cantidad entre esta lectura y el upsert, así la diferencia que va al libro es exacta
+    for i in range(0, len(filas), FILAS_POR_LOTE_IMPORTACION):
+        codigos = [f['codigo_barras'] for f in filas[i:i + FILAS_POR_LOTE_IMPORTACION]]
+        bloqueadas = (db.session.query(Inventario.codigo_barras, Inventario.id, Inventario.cantidad)
+                      .filter(Inventario.casino == casino, Inventario.codigo_barras.in_(codigos)).order_by(Inventario.id).with_for_update())
+        existentes.update({c: (pid, q) for c, pid, q in bloqueadas})
+    version = siguiente_version('inventario', casino)
+    for fila in filas: fila.update(version=version, nombre_busqueda=normalizar_busqueda(fila['nombre']))
+    stmt = insert_con_conflicto(Inventario)
+    for i in range(0, len(filas), FILAS_POR_LOTE_IMPORTACION):
+        lote = filas[i:i + FILAS_POR_LOTE_IMPORTACION]
+        if stmt is not None:
+            db.session.execute(stmt.on_conflict_do_update(
+                index_elements=[Inventario.__table__.c.codigo_barras, Inventario.__table__.c.casino_id],
+                set_={c: stmt.excluded[c] for c in ('nombre', 'nombre_busqueda', 'cantidad', 'unidad', 'minimo', 'precio', 'version')}
+            ), lote)
+        else:
+            # Motores sin ON CONFLICT: se separan inserciones y actualizaciones
+            db.session.bulk_update_mappings(Inventario, [dict(f, id=existentes[f['codigo_barras']][0]) for f in lote if f['codigo_barras'] in existentes])
+            db.session.bulk_insert_mappings(Inventario, [f for f in lote if f['codigo_barras'] not in existentes])
+    # El libro recibe la diferencia de los actualizados y el saldo inicial de los nuevos
+    movimientos = {existentes[f['codigo_barras']][0]: f['cantidad'] - existentes[f['codigo_barras']][1] for f in filas if f['codigo_barras'] in existentes}
+    cantidades_nuevas = {f['codigo_barras']: f['cantidad'] for f in filas if f['codigo_barras'] not in existentes}
+    codigos_nuevos = list(cantidades_nuevas)
+    for i in range(0, len(codigos_nuevos), FILAS_POR_LOTE_IMPORTACION):
+        lote = codigos_nuevos[i:i + FILAS_POR_LOTE_IMPORTACION]
+        movimientos.update({pid: cantidades_nuevas[c] for c, pid in db.session.query(Inventario.codigo_barras, Inventario.id).filter(Inventario.casino == casino, Inventario.codigo_barras.in_(lote))})
+    registrar_movimientos(movimientos, 'importacion')
+    invalidar_codigos({(casino, f['codigo_barras']) for f in filas})
+    return len(filas) - len(existentes), len(existentes)
+
+@bp.route('/inventario/importar', methods=['GET', 'POST'])
+def inventario_importar():
+    """Carga masiva desde CSV (formulario o `Content-Type: text/csv` con ?casino=)."""
+    casino = request.values.get('casino', casino_por_defecto())
+    if request.method == 'GET':
+        return render_template('inventario_importar.html', casino=casino, reporte=None, columnas=COLUMNAS_IMPORTACION)
+    es_api = request.mimetype == 'text/csv'
+    if es_api:
+        texto = request.get_data(as_text=True)
+    else:
+        archivo = request.files.get('archivo')
+        if not archivo or not archivo.filename:
+            flash('❌ Seleccione un archivo CSV.', 'danger')
+            return redirect(url_for('inventario.inventario_importar', casino=casino))
+        texto = archivo.read().decode('utf-8-sig', errors='replace')
+    validas, errores = validar_csv_inventario(texto.lstrip('\ufeff'), casino)
+    solo_validar = request.values.get('solo_validar') == '1'
+    nuevos = actualizados = 0
+    if not solo_validar:
+        nuevos, actualizados = upsert_inventario(validas)
+        db.session.commit()
+    reporte = {'casino': casino, 'validas': len(validas), 'nuevos': nuevos, 'actualizados': actualizados, 'errores': errores, 'solo_validar': solo_validar}
+    if es_api: return jsonify(reporte), (200 if not errores else 207)
+    return render_template('inventario_importar.html', casino=casino, reporte=reporte, columnas=COLUMNAS_IMPORTACION)
+
+# -----------------------------------------------------
+# COMANDOS DE INVENTARIO
+# -----------------------------------------------------
+# Envoltorios de los servicios de app/busqueda.py y app/stock.py; los mismos
+# servicios los usa `flask trabajador` (ver app/tareas.py).
+@bp.cli.command('reindexar-busqueda')
+def reindexar_busqueda():
+    """Recalcula nombre_busqueda y crea/reconstruye el índice de búsqueda del motor actual."""
+    productos, motor = reconstruir_indice_busqueda()
+    click.echo(f'🔎 {productos} productos indexados ({motor}).')
+
+@bp.cli.command('recalcular-costos')
+@click.option('--casino', default=None, help='Solo este casino.')
+def recalcular_costos(casino):
+    """Rehace costo_promedio, las capas FIFO y el costo de cada venta desde el libro de movimientos."""
+    productos, lineas = rehacer_costos(casino)
+    click.echo(f'✅ Costos recalculados: {productos} productos, {lineas} líneas de venta ({current_app.config["COSTO_METODO"]}).')
+    click.echo('   Ejecuta `flask reconstruir-resumenes` para actualizar el costo de ventas de /analisis.')
+
+@bp.cli.command('snapshot-stock')
+@click.option('--dia', default=None, help='Día a cerrar (YYYY-MM-DD). Por defecto, todos los pendientes hasta ayer.')
+def snapshot_stock(dia):
+    """Guarda los saldos diarios de stock (la programa `flask trabajador` después de medianoche UTC)."""
+    total, dias = snapshots_pendientes(dia)
+    click.echo(f'📸 {total} saldos guardados en {dias} día(s).')
+
+@bp.cli.command('reconciliar-stock')
+@click.option('--casino', default=None, help='Limitar a un casino.')
+@click.option('--solo-reportar', is_flag=True, help='Mostrar las diferencias sin corregir Inventario.cantidad.')
+def reconciliar_stock(casino, solo_reportar):
+    """Recalcula Inventario.cantidad sumando el libro de movimientos y reporta las diferencias."""
+    diferencias = reconciliar_inventario(casino, solo_reportar)
+    for d in diferencias:
+        click.echo(f"  {d['casino']} | {d['nombre']} (id {d['producto_id']}): inventario {d['inventario']:g}, libro {d['libro']:g}, diferencia {d['inventario'] - d['libro']:+g}")
+    estado = 'corregidas' if diferencias and not solo_reportar else 'encontradas'
+    click.echo(f'{"⚠️" if diferencias else "✅"} {len(diferencias)} diferencias {estado}.')
@@ -0,0 +1,90 @@
+from datetime import date, datetime
+
+import click
+from flask import Blueprint, Response, abort, current_app, render_template, request
+from flask_login import current_user
+from sqlalchemy import func
+
+from ..analisis import cache_analisis
+from ..archivo import ARCHIVABLES, archivar_mes, mes_siguiente, reconciliar_archivos
+from ..catalogo import cache_codigos
+from ..extensions import db, login_manager
+from ..listados import cache_fragmentos
+from ..metricas import metricas_sql
+from ..models import Casino, Inventario, User, cargar_casinos, nombres_casinos
+from ..particiones import crear_particiones_venta, venta_particionada
+
+bp = Blueprint('principal', __name__, cli_group=None)
+
+
+# -----------------------------------------------------
+# CARGA DE USUARIO Y CONTEXTO
+# -----------------------------------------------------
+@login_manager.user_loader
+def load_user(user_id): return User.query.get(int(user_id))
+
+@bp.app_context_processor
+def inject_current_year(): return {'current_year': datetime.utcnow().year}
+
+@bp.app_context_processor
+def inject_casinos(): return {'casinos': nombres_casinos()}
+
+@bp.before_app_request
+def validar_casino():
+    # Un casino inexistente en la URL o el formulario no llega a las consultas
+    casino = request.values.get('casino')
+    if casino is None or casino in nombres_casinos(): return
+    cargar_casinos()  # pudo crearse desde otro worker
+    if casino not in nombres_casinos(): abort(404)
+
+# -----------------------------------------------------
+# PANEL Y MÉTRICAS
+# -----------------------------------------------------
+@bp.route('/')
+@bp.route('/dashboard')
+def dashboard():
+    return render_template('dashboard.html', user=current_user, Inventario=Inventario)
+
+@bp.route('/metrics')
+def metrics():
+    return Response(metricas_sql.exportar() + cache_codigos.exportar('yosyfood_cache_codigos') + cache_fragmentos.exportar('yosyfood_cache_fragmentos')
+                    + cache_analisis.exportar('yosyfood_cache_analisis'), mimetype='text/plain; version=0.0.4')
+
+# -----------------------------------------------------
+# COMANDOS: CASINOS Y ARCHIVO
+# -----------------------------------------------------
+@bp.cli.command('crear-casino')
+@click.argument('nombre')
+def crear_casino(nombre):
+    """Da de alta un casino (las vistas lo muestran sin tocar plantillas)."""
+    nombre = nombre.strip()
+    if not nombre or len(nombre) > 20: raise click.BadParameter('El nombre debe tener entre 1 y 20 caracteres.')
+    if Casino.query.filter_by(nombre=nombre).first():
+        click.echo(f'ℹ️ {nombre} ya existe.'); return
+    db.session.add(Casino(nombre=nombre))
+    db.session.flush()
+    if venta_particionada(db.session.connection()): crear_particiones_venta(db.session.connection())
+    db.session.commit()
+    click.echo(f'✅ {nombre} creado.')
+
+@bp.cli.command('archivar-meses')
+@click.option('--meses-activos', type=int, default=None, help='Meses (además del actual) que se quedan en la base. Por defecto ARCHIVO_MESES_ACTIVOS.')
+@click.option('--casino', default=None, help='Solo este casino.')
+def archivar_meses(meses_activos, casino):
+    """Archiva en ARCHIVO_DIR las ventas y compras de los meses cerrados."""
+    meses_activos = current_app.config['ARCHIVO_MESES_ACTIVOS'] if meses_activos is None else meses_activos
+    hoy = date.today()
+    indice = hoy.year * 12 + hoy.month - 1 - meses_activos
+    corte = date(indice // 12, indice % 12 + 1, 1)  # primer mes que se conserva
+    pendientes = reconciliar_archivos()
+    if pendientes: click.echo(f'🔧 {pendientes} segmentos de un archivado interrumpido reconciliados.')
+    for entidad, (cabecera, *_) in ARCHIVABLES.items():
+        for nombre in ([casino] if casino else nombres_casinos()):
+            primera = db.session.query(func.min(cabecera.fecha)).filter(cabecera.casino == nombre, cabecera.fecha < datetime.combine(corte, datetime.min.time())).scalar()
+            if primera is None: continue
+            mes = date(primera.year, primera.month, 1)
+            while mes < corte:
+                archivados = archivar_mes(entidad, nombre, mes)
+                if archivados: click.echo(f'📦 {entidad} {nombre} {mes:%Y-%m}: {archivados} recibos archivados.')
+                mes = mes_siguiente(mes)
+    click.echo(f'✅ Meses anteriores a {corte:%Y-%m} archivados en {current_app.config["ARCHIVO_DIR"]}.')
@@ -0,0 +1,92 @@
+import json
+import os
+import signal
+
+import click
+from flask import Blueprint, abort, current_app, flash, jsonify, redirect, render_template, request, send_file, url_for
+
+from ..extensions import db
+from ..models import Tarea
+from ..tareas import ESTADOS_ACTIVOS, TAREAS, PoolTareas, encolar_tarea, programa_tareas
+
+bp = Blueprint('tareas', __name__, cli_group=None)
+
+
+# -----------------------------------------------------
+# TAREAS EN SEGUNDO PLANO: RUTAS Y COMANDOS
+# -----------------------------------------------------
+# La cola, el pool de hilos y las tareas disponibles están en app/tareas.py.
+def tarea_a_dict(t):
+    return {'id': t.uuid, 'tipo': t.tipo, 'parametros': json.loads(t.parametros or '{}'), 'estado': t.estado,
+            'progreso': round(t.progreso or 0, 3), 'mensaje': t.mensaje, 'intentos': t.intentos, 'programa': t.programa,
+            'creada': t.creada.isoformat(), 'iniciada': t.iniciada.isoformat() if t.iniciada else None,
+            'terminada': t.terminada.isoformat() if t.terminada else None,
+            'resultado': json.loads(t.resultado) if t.resultado else None,
+            'error': t.error.strip().splitlines()[-1] if t.error else None,
+            'url': url_for('tareas.api_tarea', tarea_uuid=t.uuid),
+            'descarga': url_for('tareas.tarea_descarga', tarea_uuid=t.uuid) if t.archivo and t.estado == 'terminada' else None}
+
+# --- Rutas ---
+@bp.route('/tareas', methods=['GET', 'POST'])
+def tareas():
+    if request.method == 'POST':
+        es_json = request.is_json
+        datos = (request.get_json(silent=True) or {}) if es_json else request.form
+        parametros = (datos.get('parametros') or {}) if es_json else {k: v for k, v in datos.items() if k != 'tipo'}
+        try:
+            nueva = encolar_tarea(datos.get('tipo'), parametros)
+        except ValueError as e:
+            if es_json: return jsonify({'error': str(e)}), 400
+            flash(f'❌ {e}', 'danger'); return redirect(url_for('tareas.tareas'))
+        respuesta = tarea_a_dict(nueva)  # antes del commit: después habría que releer la fila
+        db.session.commit()
+        if es_json: return jsonify(respuesta), 202
+        flash(f'⏳ Tarea "{nueva.tipo}" en cola. La ejecuta `flask trabajador`.', 'info')
+        return redirect(url_for('tareas.tareas'))
+    recientes = Tarea.query.order_by(Tarea.id.desc()).limit(50).all()
+    return render_template('tareas.html', tareas=recientes, tipos=TAREAS, activos=ESTADOS_ACTIVOS)
+
+@bp.route('/api/tareas/<tarea_uuid>')
+def api_tarea(tarea_uuid):
+    return jsonify(tarea_a_dict(Tarea.query.filter_by(uuid=tarea_uuid).first_or_404()))
+
+@bp.route('/tareas/<tarea_uuid>/descarga')
+def tarea_descarga(tarea_uuid):
+    t = Tarea.query.filter_by(uuid=tarea_uuid).first_or_404()
+    if t.estado != 'terminada' or not t.archivo or not os.path.isfile(t.archivo): abort(404)
+    return send_file(t.archivo, as_attachment=True, download_name=os.path.basename(t.archivo),
+                     mimetype='application/gzip' if t.archivo.endswith('.gz') else None)
+
+@bp.cli.command('trabajador')
+@click.option('--hilos', type=int, default=None, help='Tareas en paralelo (por defecto TAREAS_HILOS).')
+@click.option('--sin-programa', is_flag=True, help='No crear las tareas programadas de TAREAS_PROGRAMA.')
+@click.option('--una-vez', is_flag=True, help='Ejecutar las tareas pendientes y salir.')
+def trabajador(hilos, sin_programa, una_vez):
+    """Ejecuta las tareas en segundo plano hasta Ctrl+C o SIGTERM (las que estén en curso terminan antes de salir)."""
+    try: programa = [] if sin_programa or una_vez else programa_tareas()
+    except ValueError as e: raise click.UsageError(str(e))
+    pool = PoolTareas(current_app._get_current_object(), hilos or current_app.config['TAREAS_HILOS'], programa)
+    if una_vez:
+        pool.iniciar(hasta_vaciar=True); pool.esperar()
+        click.echo(f'✅ {pool.ejecutadas} tareas ejecutadas.')
+        return
+    signal.signal(signal.SIGTERM, lambda *_: pool.parar.set())
+    pool.iniciar()
+    click.echo(f'👷 Trabajador {pool.nombre}: {pool.hilos} hilo(s).')
+    for tipo, expresion, _ in programa: click.echo(f'   ⏰ {tipo}: {expresion} (UTC)')
+    try:
+        while not pool.parar.wait(1): pass
+    except KeyboardInterrupt:
+        pool.parar.set()
+    click.echo('⏹️ Deteniendo: esperando las tareas en curso...')
+    pool.esperar()
+
+@bp.cli.command('encolar-tarea')
+@click.argument('tipo')
+@click.argument('parametros', nargs=-1)
+def encolar_tarea_cli(tipo, parametros):
+    """Encola una tarea: flask encolar-tarea exportar entidad=ventas casino="Casino 1"."""
+    try: nueva = encolar_tarea(tipo, dict(p.partition('=')[::2] for p in parametros))
+    except ValueError as e: raise click.UsageError(str(e))
+    db.session.commit()
+    click.echo(f'⏳ Tarea {nueva.uuid} ({tipo}) en cola.')
@@ -0,0 +1,250 @@
+import json
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+import click
+from flask import Blueprint, flash, g, jsonify, redirect, render_template, request, url_for
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+
+from ..extensions import db
+from ..idempotencia import es_uuid, guardar_respuesta_idempotente, idempotente, nuevo_recibo_id, purgar_claves_idempotencia, respuesta_previa
+from ..models import (Casino, ClaveIdempotencia, ContadorVersion, Inventario, MovimientoStock, ProductoEliminado, Recibo, ResumenDiario, Venta,
+                      cargar_casinos, casino_por_defecto)
+from ..paginacion import paginar_recibos
+from ..particiones import crear_particiones_venta, particionar_venta, venta_particionada
+from ..resumenes import acumular_resumen, acumular_resumenes
+from ..stock import StockInsuficiente, aplicar_movimientos_stock, calcular_venta, cargar_productos, registrar_asientos
+
+bp = Blueprint('ventas', __name__, cli_group=None)
+
+
+# -----------------------------------------------------
+# VENTAS
+# -----------------------------------------------------
+@bp.route('/ventas')
+def venta_list():
+    casino = request.args.get('casino', casino_por_defecto())
+    # Las líneas de los recibos visibles se cargan en una sola consulta adicional
+    query = Recibo.query.options(selectinload(Recibo.lineas).joinedload(Venta.producto)).filter(Recibo.casino == casino)
+    recibos, cursor_anterior, cursor_siguiente = paginar_recibos(query, Recibo, request.args.get('cursor'), request.args.get('dir', 'next'))
+    return render_template('ventas_list.html', recibos=recibos, casino=casino, cursor_anterior=cursor_anterior, cursor_siguiente=cursor_siguiente)
+@bp.route('/ventas/registrar')
+def venta_registrar():
+    # Los productos llegan por /api/catalogo y se guardan en el navegador
+    casino = request.args.get('casino', casino_por_defecto())
+    return render_template('ventas_form.html', casino=casino)
+def _costo_de_lineas(lineas, costos):
+    """Costo de ventas de las líneas; las de productos sin costo conocido (None) no suman."""
+    return sum(l['cantidad'] * costos[l['producto_id']] for l in lineas if costos[l['producto_id']] is not None)
+@bp.route('/ventas/registrar_multiple', methods=['POST'])
+@idempotente
+def venta_registrar_multiple():
+    data = request.get_json(); carrito = data.get('carrito'); pago = float(data.get('pago')); vendedor = data.get('vendedor'); casino = data.get('casino')
+    if not all([carrito, pago is not None, vendedor, casino]): return jsonify({'error': 'Faltan datos en la solicitud.'}), 400
+    try:
+        with db.session.begin_nested():
+            productos = cargar_productos(item['id'] for item in carrito)
+            disponible = {pid: p.cantidad for pid, p in productos.items()}
+            lineas, salidas, total_general, cambio = calcular_venta(carrito, pago, productos, disponible)
+            recibo = Recibo(uuid=nuevo_recibo_id(), fecha=datetime.utcnow(), total=total_general, pago=pago, cambio=cambio, vendedor=vendedor, casino=casino)
+            costos = aplicar_movimientos_stock(productos, salidas, 'venta', recibo.uuid)
+            db.session.add(recibo); db.session.flush()
+            db.session.execute(insert(Venta), [dict(linea, recibo_id=recibo.id, casino=recibo.casino, fecha=recibo.fecha, costo_unitario=costos[linea['producto_id']]) for linea in lineas])
+            acumular_resumen(casino, recibo.fecha, ingresos=total_general, costo_ventas=_costo_de_lineas(lineas, costos))
+            cuerpo = guardar_respuesta_idempotente({'mensaje': f'Venta registrada. Cambio: ${cambio:.2f}', 'cambio': cambio, 'recibo_id': recibo.uuid})
+        db.session.commit()
+        return jsonify(cuerpo), 200
+    except ValueError as e: db.session.rollback(); return jsonify({'error': str(e)}), 400
+    except IntegrityError:
+        db.session.rollback()
+        # Otro intento con la misma clave pudo terminar primero
+        previa = respuesta_previa(g.clave_idempotencia) if g.get('clave_idempotencia') else None
+        return previa if previa is not None else (jsonify({'error': 'Error al guardar la venta.'}), 500)
+
+# --- Sincronización de recibos acumulados sin conexión ---
+MAX_RECIBOS_POR_LOTE = 200
+
+def _fecha_cliente(valor, ahora):
+    try: fecha = datetime.fromisoformat(str(valor).replace('Z', '+00:00'))
+    except ValueError: return ahora
+    if fecha.tzinfo: fecha = fecha.astimezone(timezone.utc).replace(tzinfo=None)
+    return min(fecha, ahora)
+
+def procesar_lote_ventas(casino, recibos):
+    claves = [str(r.get('clave') or '') if isinstance(r, dict) else '' for r in recibos]
+    existentes = {c for (c,) in db.session.query(ClaveIdempotencia.clave).filter(ClaveIdempotencia.clave.in_([c for c in claves if c]))}
+    ids = [item.get('id') for r in recibos if isinstance(r, dict) for item in (r.get('carrito') or []) if isinstance(item, dict) and str(item.get('id', '')).isdigit()]
+    productos = cargar_productos(ids)
+    disponible = {pid: p.cantidad for pid, p in productos.items()}
+    ahora = datetime.utcnow(); salidas = defaultdict(float); asientos = []
+    cabeceras = []; lineas_por_recibo = []; filas_clave = []; resultados = []; vistas = set()
+    for recibo, clave in zip(recibos, claves):
+        if not es_uuid(clave):
+            resultados.append({'clave': clave, 'estado': 'rechazado', 'mensaje': 'Clave de recibo inválida.'}); continue
+        if clave in existentes or clave in vistas:
+            resultados.append({'clave': clave, 'estado': 'duplicado', 'mensaje': 'El recibo ya estaba registrado.'}); continue
+        vistas.add(clave)
+        try:
+            if not recibo.get('carrito') or not recibo.get('vendedor'): raise ValueError('Faltan datos en el recibo.')
+            lineas, salidas_recibo, total, cambio = calcular_venta(recibo['carrito'], float(recibo.get('pago')), productos, disponible)
+        except StockInsuficiente as e:
+            resultados.append({'clave': clave, 'estado': 'rechazado_stock', 'mensaje': str(e)}); continue
+        except (ValueError, TypeError, KeyError) as e:
+            resultados.append({'clave': clave, 'estado': 'rechazado', 'mensaje': str(e)}); continue
+        fecha = _fecha_cliente(recibo.get('fecha'), ahora); pago = float(recibo['pago'])
+        for producto_id, delta in salidas_recibo.items(): salidas[producto_id] += delta
+        asientos.append((salidas_recibo, clave))
+        cabeceras.append({'uuid': clave, 'fecha': fecha, 'total': total, 'pago': pago, 'cambio': cambio, 'vendedor': recibo['vendedor'], 'casino': casino}); lineas_por_recibo.append(lineas)
+        cuerpo = {'mensaje': f'Venta registrada. Cambio: ${cambio:.2f}', 'cambio': cambio, 'recibo_id': clave}
+        filas_clave.append({'clave': clave, 'endpoint': 'ventas.venta_registrar_multiple', 'estado': 200, 'respuesta': json.dumps(cuerpo), 'creada': ahora})
+        resultados.append(dict(cuerpo, clave=clave, estado='aceptado'))
+    # Un solo paso de stock y una inserción masiva por tabla (cabeceras, líneas, libro, claves y resúmenes) para todo el lote.
+    # Todo el lote sale al mismo costo unitario por producto (en fifo, el de las capas que consume en conjunto).
+    costos = aplicar_movimientos_stock(productos, salidas, None)
+    registrar_asientos(asientos, 'venta')
+    resumen_por_dia = defaultdict(lambda: {'ingresos': 0.0, 'costo_ventas': 0.0})
+    if cabeceras:
+        db.session.execute(insert(Recibo), cabeceras)
+        recibo_ids = dict(db.session.query(Recibo.uuid, Recibo.id).filter(Recibo.uuid.in_([c['uuid'] for c in cabeceras])))
+        db.session.execute(insert(Venta), [dict(linea, recibo_id=recibo_ids[cabecera['uuid']], casino=casino, fecha=cabecera['fecha'], costo_unitario=costos[linea['producto_id']])
+                                           for cabecera, lineas in zip(cabeceras, lineas_por_recibo) for linea in lineas])
+        for cabecera, lineas in zip(cabeceras, lineas_por_recibo):
+            resumen = resumen_por_dia[cabecera['fecha'].date()]
+            resumen['ingresos'] += cabecera['total']; resumen['costo_ventas'] += _costo_de_lineas(lineas, costos)
+    if filas_clave: db.session.execute(insert(ClaveIdempotencia), filas_clave)
+    acumular_resumenes(casino, resumen_por_dia)
+    return resultados
+@bp.route('/ventas/sync_batch', methods=['POST'])
+def venta_sync_batch():
+    """Registra en una sola transacción los recibos que el POS acumuló sin conexión.
+
+    Cuerpo: {"casino": ..., "recibos": [{"clave": uuid, "carrito": [...], "pago": ..., "vendedor": ..., "fecha": iso}]}.
+    Devuelve un resultado por recibo: aceptado, rechazado_stock, rechazado o duplicado.
+    """
+    data = request.get_json(silent=True) or {}
+    casino = data.get('casino'); recibos = data.get('recibos')
+    if not casino or not isinstance(recibos, list) or not recibos: return jsonify({'error': 'Faltan datos en la solicitud.'}), 400
+    if len(recibos) > MAX_RECIBOS_POR_LOTE: return jsonify({'error': f'Máximo {MAX_RECIBOS_POR_LOTE} recibos por lote.'}), 400
+    for _ in range(2):
+        try:
+            with db.session.begin_nested():
+                resultados = procesar_lote_ventas(casino, recibos)
+            db.session.commit()
+            return jsonify({'resultados': resultados}), 200
+        except StockInsuficiente:
+            # Una venta en línea tomó stock entre la lectura y el UPDATE: se recalcula el lote
+            db.session.rollback()
+    return jsonify({'error': 'El stock cambió durante la sincronización. Reintente.'}), 409
+@bp.route('/ventas/eliminar/<recibo_id>', methods=['POST'])
+def venta_eliminar_recibo(recibo_id):
+    recibo = Recibo.query.options(selectinload(Recibo.lineas)).filter_by(uuid=recibo_id).first_or_404()
+    casino = recibo.casino
+    with db.session.begin_nested():
+        # Devolver al inventario lo vendido en el recibo, al costo con que salió
+        entradas = defaultdict(float); importes = defaultdict(float)
+        for venta in recibo.lineas:
+            entradas[venta.producto_id] += venta.cantidad
+            if venta.costo_unitario is not None: importes[venta.producto_id] += venta.cantidad * venta.costo_unitario
+        costos = {pid: importe / entradas[pid] for pid, importe in importes.items() if entradas[pid]}
+        aplicar_movimientos_stock(cargar_productos(entradas), entradas, 'venta_anulada', recibo.uuid, costos)
+        acumular_resumen(casino, recibo.fecha, ingresos=-recibo.total, costo_ventas=-sum(importes.values()))
+        db.session.delete(recibo)
+    db.session.commit()
+    flash('⚠️ Recibo de venta eliminado. El stock ha sido restaurado.', 'warning')
+    return redirect(url_for('ventas.venta_list', casino=casino))
+
+# -----------------------------------------------------
+# COMANDOS DE VENTAS Y PRUEBAS DE CARGA
+# -----------------------------------------------------
+@bp.cli.command('purgar-idempotencia')
+@click.option('--horas', type=int, default=None, help='Antigüedad mínima (por defecto IDEMPOTENCIA_TTL_HORAS).')
+def purgar_idempotencia(horas):
+    """Elimina las claves de idempotencia vencidas (la programa `flask trabajador`)."""
+    click.echo(f'🧹 {purgar_claves_idempotencia(horas)} claves de idempotencia eliminadas.')
+
+def _crear_casino_de_prueba(nombre):
+    if not Casino.query.filter_by(nombre=nombre).first():
+        db.session.add(Casino(nombre=nombre)); db.session.commit()
+    return nombre
+
+def _borrar_casino_de_prueba(nombre):
+    """Borra el casino de prueba con sus productos, ventas, resúmenes y versiones."""
+    productos = select(Inventario.id).where(Inventario.casino == nombre)
+    Venta.query.filter(Venta.recibo_id.in_(select(Recibo.id).where(Recibo.casino == nombre))).delete(synchronize_session=False)
+    Recibo.query.filter_by(casino=nombre).delete()
+    ResumenDiario.query.filter_by(casino=nombre).delete()
+    MovimientoStock.query.filter(MovimientoStock.producto_id.in_(productos)).delete(synchronize_session=False)
+    Inventario.query.filter_by(casino=nombre).delete()
+    ContadorVersion.query.filter_by(casino=nombre).delete()
+    ProductoEliminado.query.filter_by(casino=nombre).delete()
+    Casino.query.filter_by(nombre=nombre).delete()  # borrado en bloque: no pasa por el flush
+    db.session.commit()
+    cargar_casinos()
+
+@bp.cli.command('medir-rendimiento')
+@click.option('--url', default='http://127.0.0.1:8000', show_default=True, help='Servidor en marcha sobre la misma base (p. ej. gunicorn -c gunicorn.conf.py wsgi:app).')
+@click.option('--segundos', default=20.0, show_default=True, help='Duración de cada escenario.')
+@click.option('--clientes', default=8, show_default=True, help='Conexiones keep-alive en paralelo.')
+@click.option('--productos', default=200, show_default=True, help='Tamaño del catálogo de prueba.')
+def medir_rendimiento(url, segundos, clientes, productos):
+    """Peticiones por segundo de lectura (catálogo) y escritura (ventas) contra un servidor en marcha."""
+    from http.client import HTTPConnection
+    from urllib.parse import urlsplit, quote
+    import random
+
+    casino = _crear_casino_de_prueba('__bench__')
+    db.session.add_all([Inventario(nombre=f'__bench_{i}__', cantidad=10 ** 9, unidad='pza', precio=1, casino=casino) for i in range(productos)])
+    db.session.commit()
+    ids = [i for (i,) in db.session.query(Inventario.id).filter(Inventario.casino == casino)]
+    db.session.commit()  # sin lecturas abiertas: en SQLite el borrado final no choca con las ventas del servidor
+    destino = urlsplit(url)
+    venta = lambda: json.dumps({'carrito': [{'id': random.choice(ids), 'cantidad': 1, 'nombre': 'bench'}], 'pago': 1, 'vendedor': 'bench', 'casino': casino})
+    escenarios = [('lectura', 'GET', f'/api/catalogo?casino={quote(casino)}', None),
+                  ('escritura', 'POST', '/ventas/registrar_multiple', venta)]
+    try:
+        for nombre, metodo, ruta, cuerpo in escenarios:
+            latencias = []; errores = Counter(); lock = threading.Lock(); fin = time.perf_counter() + segundos
+
+            def cliente():
+                conn = HTTPConnection(destino.hostname, destino.port or 80, timeout=30); propias = []
+                while time.perf_counter() < fin:
+                    inicio = time.perf_counter()
+                    try:
+                        conn.request(metodo, ruta, body=cuerpo() if cuerpo else None, headers={'Content-Type': 'application/json'} if cuerpo else {})
+                        r = conn.getresponse(); r.read()
+                        if r.status < 400: propias.append(time.perf_counter() - inicio)
+                        else: errores[r.status] += 1
+                    except Exception as e:  # conexión cerrada por el servidor: se reabre
+                        errores[type(e).__name__] += 1
+                        conn.close(); conn = HTTPConnection(destino.hostname, destino.port or 80, timeout=30)
+                conn.close()
+                with lock: latencias.extend(propias)
+
+            hilos = [threading.Thread(target=cliente) for _ in range(clientes)]
+            for t in hilos: t.start()
+            for t in hilos: t.join()
+            latencias.sort(); n = len(latencias)
+            if not n: raise click.ClickException(f'❌ {nombre}: ninguna respuesta correcta ({dict(errores)}).')
+            click.echo(f'{nombre}: {n / segundos:.1f} req/s | p50 {latencias[n // 2] * 1000:.1f} ms | p95 {latencias[int(n * 0.95)] * 1000:.1f} ms | errores {dict(errores)}')
+    finally:
+        _borrar_casino_de_prueba(casino)
+
+@bp.cli.command('particionar-ventas')
+@click.option('--meses-adelante', default=3, show_default=True, help='Meses futuros con partición ya creada.')
+def particionar_ventas(meses_adelante):
+    """PostgreSQL: particiona venta por casino y mes, o crea las particiones que falten."""
+    conn = db.session.connection()
+    if conn.dialect.name != 'postgresql':
+        click.echo('ℹ️ El particionado solo aplica a PostgreSQL; en este motor bastan los índices (casino_id, fecha).'); return
+    if venta_particionada(conn):
+        revisadas = crear_particiones_venta(conn, meses_adelante)
+        db.session.commit()
+        click.echo(f'✅ Particiones de venta al día ({revisadas} revisadas).')
+    else:
+        particionar_venta(conn, meses_adelante)
+        db.session.commit()
+        click.echo('✅ venta particionada por casino y mes.')
@@ -5,7 +5,116 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+# -----------------------------------------------------
+# PERFILES DE EJECUCIÓN (PERFIL=dev|prod|bench)
+# -----------------------------------------------------
+# Cada perfil fija el pool de conexiones de SQLAlchemy, la caché de sentencias
+# compiladas y los PRAGMA que se aplican a cada conexión SQLite nueva. Las
+# opciones de la aplicación (al final de Config) son las mismas en todos los
+# perfiles y se leen de variables de entorno.
+#
+# gunicorn.conf.py arranca con PERFIL=prod y trae las mediciones de cada perfil.
 class Config:
-SECRET_KEY = os.getenv('SECRET_KEY', 'cambia_esta_clave')
-SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
-SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SECRET_KEY = os.getenv('SECRET_KEY', 'dev_secret_key')
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///yosyfood.db')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_RECORD_QUERIES = False
+
+    # Pool (se ignora con SQLite en memoria, que usa una sola conexión)
+    POOL_SIZE = 5
+    POOL_MAX_OVERFLOW = 10
+    POOL_PRE_PING = False
+    POOL_RECYCLE = -1
+    POOL_TIMEOUT = 30
+    # Sentencias compiladas que guarda SQLAlchemy por motor, y sentencias preparadas por conexión del driver
+    QUERY_CACHE_SIZE = 500
+    SQLITE_CACHED_STATEMENTS = 128
+    PG_PREPARE_THRESHOLD = 5
+
+    # PRAGMA por conexión; journal_mode=WAL queda guardado en el archivo, el resto vale por conexión
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'cache_size': -16000,  # negativo = KiB (16 MB)
+    }
+
+    # --- Opciones de la aplicación (las mismas en todos los perfiles) ---
+    # Con SQL_QUERY_HEADER=1 cada respuesta incluye X-Query-Count y X-DB-Time-ms
+    SQL_QUERY_HEADER = os.getenv("SQL_QUERY_HEADER") == "1"
+    CACHE_CODIGOS_MAX = int(os.getenv("CACHE_CODIGOS_MAX", 5000))
+    CACHE_CODIGOS_TTL = float(os.getenv("CACHE_CODIGOS_TTL", 30))
+    CACHE_FRAGMENTOS_MAX = int(os.getenv("CACHE_FRAGMENTOS_MAX", 200))
+    CACHE_VERSIONES_TTL = float(os.getenv("CACHE_VERSIONES_TTL", 2))
+    CASINOS_TTL = float(os.getenv("CASINOS_TTL", 30))
+    IDEMPOTENCIA_TTL_HORAS = int(os.getenv("IDEMPOTENCIA_TTL_HORAS", 48))
+    STOCK_STREAM_INTERVALO = float(os.getenv("STOCK_STREAM_INTERVALO", 1.0))
+    STOCK_STREAM_MAX_CONEXIONES = int(os.getenv("STOCK_STREAM_MAX_CONEXIONES", 200))
+    PRONOSTICO_DIAS_HISTORIA = int(os.getenv("PRONOSTICO_DIAS_HISTORIA", 90))
+    PRONOSTICO_DIAS_ENTREGA = int(os.getenv("PRONOSTICO_DIAS_ENTREGA", 2))
+    PRONOSTICO_DIAS_COBERTURA = int(os.getenv("PRONOSTICO_DIAS_COBERTURA", 7))
+    PRONOSTICO_ALFA = float(os.getenv("PRONOSTICO_ALFA", 0.3))
+    PRONOSTICO_Z = float(os.getenv("PRONOSTICO_Z", 1.65))
+    ARCHIVO_DIR = os.getenv("ARCHIVO_DIR")  # por defecto <instance>/archivo
+    ARCHIVO_MESES_ACTIVOS = int(os.getenv("ARCHIVO_MESES_ACTIVOS", 12))
+    COSTO_METODO = os.getenv("COSTO_METODO", "promedio").lower()  # promedio | fifo
+    ANALISIS_CACHE_MAX = int(os.getenv("ANALISIS_CACHE_MAX", 100))
+    ANALISIS_CACHE_TTL = float(os.getenv("ANALISIS_CACHE_TTL", 300))
+    ANALISIS_TOP = int(os.getenv("ANALISIS_TOP", 10))
+    ANALISIS_UTC_OFFSET = int(os.getenv("ANALISIS_UTC_OFFSET", 0))  # horas de la hora local respecto de UTC (mapa de calor)
+    TAREAS_DIR = os.getenv("TAREAS_DIR")  # por defecto <instance>/tareas
+    TAREAS_HILOS = int(os.getenv("TAREAS_HILOS", 2))
+    TAREAS_INTERVALO = float(os.getenv("TAREAS_INTERVALO", 2))  # segundos entre consultas de la cola vacía
+    TAREAS_LATIDO_MAX = int(os.getenv("TAREAS_LATIDO_MAX", 300))  # segundos sin latido para dar por muerto al trabajador
+    TAREAS_RETENCION_DIAS = int(os.getenv("TAREAS_RETENCION_DIAS", 7))
+    TAREAS_PROGRAMA = os.getenv("TAREAS_PROGRAMA", "snapshot-stock=15 0 * * *; pronosticar-stock=30 0 * * *; purgar-idempotencia=0 4 * * *; purgar-tareas=30 4 * * *")
+
+    @classmethod
+    def opciones_motor(cls, uri):
+        """SQLALCHEMY_ENGINE_OPTIONS para la URL de base de datos dada."""
+        opciones = {'query_cache_size': cls.QUERY_CACHE_SIZE}
+        if uri.startswith('sqlite'):
+            opciones['connect_args'] = {'cached_statements': cls.SQLITE_CACHED_STATEMENTS, 'timeout': cls.SQLITE_PRAGMAS.get('busy_timeout', 5000) / 1000}
+            if uri in ('sqlite://', 'sqlite:///:memory:'): return opciones
+        elif uri.startswith('postgresql+psycopg'):
+            opciones['connect_args'] = {'prepare_threshold': cls.PG_PREPARE_THRESHOLD}
+        opciones.update(pool_size=cls.POOL_SIZE, max_overflow=cls.POOL_MAX_OVERFLOW, pool_pre_ping=cls.POOL_PRE_PING,
+                        pool_recycle=cls.POOL_RECYCLE, pool_timeout=cls.POOL_TIMEOUT)
+        return opciones
+
+
+class DevConfig(Config):
+    # Un solo proceso con el servidor de Flask: pool chico y escrituras seguras ante cortes
+    POOL_SIZE = 2
+    POOL_MAX_OVERFLOW = 5
+    SQLITE_PRAGMAS = dict(Config.SQLITE_PRAGMAS, synchronous='FULL')
+
+
+class ProdConfig(Config):
+    # gunicorn con gthread: cada hilo puede tener una conexión, más margen para picos.
+    # pre_ping y recycle evitan usar conexiones que MySQL/PostgreSQL ya cerraron por inactividad.
+    POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    POOL_MAX_OVERFLOW = int(os.getenv('DB_POOL_MAX_OVERFLOW', 10))
+    POOL_PRE_PING = True
+    POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    POOL_TIMEOUT = 10
+    QUERY_CACHE_SIZE = 1000
+    SQLITE_CACHED_STATEMENTS = 256
+    SQLITE_PRAGMAS = dict(Config.SQLITE_PRAGMAS, cache_size=-64000, mmap_size=268435456, temp_store='MEMORY')
+
+
+class BenchConfig(ProdConfig):
+    # Mediciones: sin pre_ping (una consulta extra por checkout) y sin fsync por commit
+    POOL_PRE_PING = False
+    POOL_RECYCLE = -1
+    SQLITE_PRAGMAS = dict(ProdConfig.SQLITE_PRAGMAS, synchronous='OFF')
+
+
+PERFILES = {'dev': DevConfig, 'prod': ProdConfig, 'bench': BenchConfig}
+
+
+def perfil_activo():
+    nombre = os.getenv('PERFIL', 'dev')
+    if nombre not in PERFILES:
+        raise RuntimeError(f"PERFIL desconocido: {nombre!r} (usa {', '.join(PERFILES)})")
+    return PERFILES[nombre]
@@ -0,0 +1,80 @@
+# Configuración de gunicorn: gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Workers gthread: el stock en vivo (/stream/stock) mantiene abierta una
+# respuesta por caja, y con workers sync cada caja bloquearía un proceso entero.
+# Cada conexión SSE ocupa un hilo, así que se reservan hilos para las demás
+# peticiones y el tope de conexiones SSE por worker se deriva de ahí.
+#
+# Rendimiento medido con `flask medir-rendimiento` contra este archivo (1 núcleo,
+# 3 workers x 16 hilos, SQLite en disco con WAL, 8 clientes keep-alive, 20 s por
+# escenario; lectura = GET /api/catalogo de 200 productos, escritura = POST
+# /ventas/registrar_multiple de 1 línea):
+#
+#   PERFIL   lectura req/s (p95)   escritura req/s (p95)
+#   dev      119.5 (135 ms)        135.8 (244 ms)
+#   prod     124.5 (161 ms)        149.8 (192 ms)
+#   bench    136.4 (109 ms)        124.0 (249 ms)
+#
+# Sin BEGIN IMMEDIATE en las peticiones de escritura (antes de los perfiles), la
+# misma prueba daba 15.2 ventas/s correctas y 2492 respuestas 500 "database is
+# locked" en 20 s. Con un solo núcleo el cliente compite con el servidor: las
+# diferencias entre perfiles están dentro del ruido; en producción conviene
+# repetir la medición en la máquina real.
+#
+# preload_app (GUNICORN_PRELOAD=1, por defecto): el maestro llama una vez a
+# create_app(), compila las plantillas y configura los mapeos del ORM, y los
+# workers lo heredan por fork. Para que esas páginas sigan compartidas, el
+# recolector de basura queda apagado mientras se carga la app y gc.freeze()
+# saca del recolector los objetos ya creados: si no, la primera pasada del gc en
+# cada worker escribe en todos ellos y el kernel los copia. La contra: un
+# cambio de código exige reiniciar el maestro (kill -HUP no basta).
+#
+# Memoria medida con PERFIL=prod, 3 workers x 4 hilos y SQLite, tras 60 vueltas
+# por /, /inventario, /api/catalogo y /analisis (PSS = RSS repartiendo las
+# páginas compartidas; arranque = mediana de `python -c "import wsgi"`):
+#
+#                                 arranque  1.ª respuesta  RSS/worker  privada/worker  PSS total
+#   app.py único, sin preload      842 ms     1802 ms        72.9 MB     55.8 MB        196.6 MB
+#   app.py único, con preload      842 ms      977 ms        69.3 MB     40.2 MB        189.7 MB
+#   create_app(), sin preload      714 ms     1895 ms        63.4 MB     46.3 MB        168.0 MB
+#   create_app(), preload + freeze 714 ms     1043 ms        59.5 MB     18.3 MB        116.0 MB
+import gc
+import multiprocessing
+import os
+
+os.environ.setdefault('PERFIL', 'prod')
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+worker_class = 'gthread'
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 16))
+HILOS_RESERVADOS = 4  # hilos por worker que nunca toma el stream SSE
+os.environ.setdefault('STOCK_STREAM_MAX_CONEXIONES', str(max(threads - HILOS_RESERVADOS, 1)))
+
+# Una conexión de la BD por hilo: sin streams abiertos todos los hilos pueden estar en una consulta
+os.environ.setdefault('DB_POOL_SIZE', str(threads))
+
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+if preload_app: gc.disable()  # hasta when_ready: ni pasadas durante la carga ni objetos movidos antes del freeze
+
+timeout = 60           # los streams SSE no cuentan: en gthread el latido del worker no depende de las peticiones
+graceful_timeout = 30
+keepalive = 5
+max_requests = 5000    # recicla workers para acotar la memoria
+max_requests_jitter = 500
+accesslog = os.getenv('GUNICORN_ACCESSLOG', '-') or None  # vacío: sin log de accesos
+
+def when_ready(server):
+    # Maestro, con la app ya cargada y antes del primer fork
+    if not preload_app: return
+    from app import precargar
+    precargar(server.app.wsgi())
+    gc.freeze()
+    gc.enable()
+
+def post_fork(server, worker):
+    # Las conexiones que hubiera abierto el maestro no se comparten: cada worker abre las suyas
+    if not preload_app: return
+    from app.extensions import db
+    with server.app.wsgi().app_context():
+        db.engine.dispose(close=False)
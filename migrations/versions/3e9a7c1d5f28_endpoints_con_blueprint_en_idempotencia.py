@@ -0,0 +1,37 @@
+"""Claves de idempotencia: endpoints con el prefijo de su blueprint
+
+Revision ID: 3e9a7c1d5f28
+Revises: f08243b5c5b9
+Create Date: 2026-10-18 02:40:12.118604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e9a7c1d5f28'
+down_revision = 'f08243b5c5b9'
+branch_labels = None
+depends_on = None
+
+# request.endpoint antes y después de separar las vistas en blueprints; sin
+# esto un reintento del POS con una clave ya guardada respondería 422.
+ENDPOINTS = {
+    'venta_registrar_multiple': 'ventas.venta_registrar_multiple',
+    'compra_registrar_multiple': 'compras.compra_registrar_multiple',
+}
+
+
+def _renombrar(pares):
+    clave = sa.table('clave_idempotencia', sa.column('endpoint', sa.String))
+    for viejo, nuevo in pares:
+        op.execute(clave.update().where(clave.c.endpoint == viejo).values(endpoint=nuevo))
+
+
+def upgrade():
+    _renombrar(ENDPOINTS.items())
+
+
+def downgrade():
+    _renombrar((nuevo, viejo) for viejo, nuevo in ENDPOINTS.items())
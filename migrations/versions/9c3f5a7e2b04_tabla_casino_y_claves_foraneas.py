@@ -0,0 +1,178 @@
+"""Tabla casino y casino_id en todas las tablas
+
+Revision ID: 9c3f5a7e2b04
+Revises: 7e4b2d9c1a63
+Create Date: 2026-10-18 00:21:37.480125
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c3f5a7e2b04'
+down_revision = '7e4b2d9c1a63'
+branch_labels = None
+depends_on = None
+
+CASINOS_INICIALES = ['Casino 1', 'Casino 2']
+
+# tabla -> (índices [(nombre, columnas)], restricciones únicas [(nombre, columnas)]); 'casino' se reemplaza por casino_id
+TABLAS = {
+    'inventario': ([('ix_inventario_casino_version', ['casino', 'version']),
+                    ('ix_inventario_casino_nombre_busqueda', ['casino', 'nombre_busqueda'])],
+                   [('uq_inventario_codigo_casino', ['codigo_barras', 'casino'])]),
+    'recibo': ([('ix_recibo_casino_fecha', ['casino', 'fecha'])], []),
+    'recibo_compra': ([('ix_recibo_compra_casino_fecha', ['casino', 'fecha'])], []),
+    'inversion': ([], []),
+    'gasto': ([], []),
+    'consumo_refrigerio': ([], []),
+    'receta_refrigerio': ([], [('uq_receta_refrigerio_nombre_casino', ['nombre', 'casino'])]),
+    'resumen_diario': ([], [('uq_resumen_diario_casino_dia', ['casino', 'dia'])]),
+    'producto_eliminado': ([('ix_producto_eliminado_casino_version', ['casino', 'version'])], []),
+}
+# Índices (casino_id, fecha) nuevos
+INDICES_FECHA = ['inversion', 'gasto', 'consumo_refrigerio']
+# Líneas que copian casino y fecha de su cabecera
+LINEAS = [('venta', 'recibo_id', 'recibo'), ('compra', 'recibo_compra_id', 'recibo_compra')]
+
+
+def _fts_sqlite(columna):
+    # Mismo índice que SQL_INDICE_BUSQUEDA en app.py; la columna del casino cambia de nombre
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS inventario_fts USING fts5(nombre_busqueda, {columna} UNINDEXED, content='inventario', content_rowid='id', tokenize='trigram')",
+        "CREATE TRIGGER IF NOT EXISTS inventario_fts_ai AFTER INSERT ON inventario BEGIN "
+        f"INSERT INTO inventario_fts(rowid, nombre_busqueda, {columna}) VALUES (new.id, new.nombre_busqueda, new.{columna}); END",
+        "CREATE TRIGGER IF NOT EXISTS inventario_fts_ad AFTER DELETE ON inventario BEGIN "
+        f"INSERT INTO inventario_fts(inventario_fts, rowid, nombre_busqueda, {columna}) VALUES ('delete', old.id, old.nombre_busqueda, old.{columna}); END",
+        f"CREATE TRIGGER IF NOT EXISTS inventario_fts_au AFTER UPDATE OF nombre_busqueda, {columna} ON inventario BEGIN "
+        f"INSERT INTO inventario_fts(inventario_fts, rowid, nombre_busqueda, {columna}) VALUES ('delete', old.id, old.nombre_busqueda, old.{columna}); "
+        f"INSERT INTO inventario_fts(rowid, nombre_busqueda, {columna}) VALUES (new.id, new.nombre_busqueda, new.{columna}); END",
+        "INSERT INTO inventario_fts(inventario_fts) VALUES ('rebuild')",
+    ]
+
+
+def _quitar_fts():
+    for sentencia in ["DROP TRIGGER IF EXISTS inventario_fts_ai", "DROP TRIGGER IF EXISTS inventario_fts_ad",
+                      "DROP TRIGGER IF EXISTS inventario_fts_au", "DROP TABLE IF EXISTS inventario_fts"]:
+        op.execute(sentencia)
+
+
+def _con(columnas, casino):
+    return [casino if c == 'casino' else c for c in columnas]
+
+
+def upgrade():
+    conn = op.get_bind()
+    sqlite = conn.dialect.name == 'sqlite'
+    op.create_table('casino',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nombre', sa.String(length=20), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('nombre')
+    )
+    nombres = set()
+    for tabla in list(TABLAS) + ['contador_version']:
+        nombres.update(n for (n,) in conn.execute(sa.text(f"SELECT DISTINCT casino FROM {tabla}")))
+    casino = sa.table('casino', sa.column('nombre', sa.String))
+    op.bulk_insert(casino, [{'nombre': n} for n in CASINOS_INICIALES + sorted(nombres - set(CASINOS_INICIALES))])
+
+    if sqlite: _quitar_fts()  # el índice FTS lee inventario.casino y la tabla se va a reconstruir
+    for tabla, (indices, unicos) in TABLAS.items():
+        op.add_column(tabla, sa.Column('casino_id', sa.Integer(), nullable=True))
+        op.execute(f"UPDATE {tabla} SET casino_id = (SELECT casino.id FROM casino WHERE casino.nombre = {tabla}.casino)")
+        for nombre, _ in indices:
+            op.drop_index(nombre, table_name=tabla)
+        if unicos:
+            with op.batch_alter_table(tabla, schema=None) as batch_op:
+                for nombre, _ in unicos:
+                    batch_op.drop_constraint(nombre, type_='unique')
+        with op.batch_alter_table(tabla, schema=None) as batch_op:
+            batch_op.drop_column('casino')
+            batch_op.alter_column('casino_id', existing_type=sa.Integer(), nullable=False)
+        with op.batch_alter_table(tabla, schema=None) as batch_op:
+            batch_op.create_foreign_key(f'fk_{tabla}_casino_id_casino', 'casino', ['casino_id'], ['id'])
+            for nombre, columnas in unicos:
+                batch_op.create_unique_constraint(nombre, _con(columnas, 'casino_id'))
+        for nombre, columnas in indices:
+            op.create_index(nombre, tabla, _con(columnas, 'casino_id'), unique=False)
+    for tabla in INDICES_FECHA:
+        op.create_index(f'ix_{tabla}_casino_fecha', tabla, ['casino_id', 'fecha'], unique=False)
+
+    # contador_version: la clave primaria pasa a (tabla, casino_id)
+    op.create_table('contador_version_nuevo',
+    sa.Column('tabla', sa.String(length=30), nullable=False),
+    sa.Column('casino_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['casino_id'], ['casino.id'], name='fk_contador_version_casino_id_casino'),
+    sa.PrimaryKeyConstraint('tabla', 'casino_id')
+    )
+    op.execute("INSERT INTO contador_version_nuevo (tabla, casino_id, version) "
+               "SELECT cv.tabla, c.id, cv.version FROM contador_version cv JOIN casino c ON c.nombre = cv.casino")
+    op.drop_table('contador_version')
+    op.rename_table('contador_version_nuevo', 'contador_version')
+
+    for lineas, columna, cabecera in LINEAS:
+        op.add_column(lineas, sa.Column('casino_id', sa.Integer(), nullable=True))
+        op.add_column(lineas, sa.Column('fecha', sa.DateTime(), nullable=True))
+        for destino in ('casino_id', 'fecha'):
+            op.execute(f"UPDATE {lineas} SET {destino} = (SELECT {cabecera}.{destino} FROM {cabecera} WHERE {cabecera}.id = {lineas}.{columna})")
+        with op.batch_alter_table(lineas, schema=None) as batch_op:
+            batch_op.alter_column('casino_id', existing_type=sa.Integer(), nullable=False)
+            batch_op.alter_column('fecha', existing_type=sa.DateTime(), nullable=False)
+        with op.batch_alter_table(lineas, schema=None) as batch_op:
+            batch_op.create_foreign_key(f'fk_{lineas}_casino_id_casino', 'casino', ['casino_id'], ['id'])
+        op.create_index(f'ix_{lineas}_casino_fecha', lineas, ['casino_id', 'fecha'], unique=False)
+
+    if sqlite:
+        for sentencia in _fts_sqlite('casino_id'):
+            op.execute(sentencia)
+
+
+def downgrade():
+    conn = op.get_bind()
+    sqlite = conn.dialect.name == 'sqlite'
+    if sqlite: _quitar_fts()
+
+    for lineas, _, _ in LINEAS:
+        op.drop_index(f'ix_{lineas}_casino_fecha', table_name=lineas)
+        with op.batch_alter_table(lineas, schema=None) as batch_op:
+            batch_op.drop_constraint(f'fk_{lineas}_casino_id_casino', type_='foreignkey')
+            batch_op.drop_column('fecha')
+            batch_op.drop_column('casino_id')
+
+    op.create_table('contador_version_anterior',
+    sa.Column('tabla', sa.String(length=30), nullable=False),
+    sa.Column('casino', sa.String(length=20), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('tabla', 'casino')
+    )
+    op.execute("INSERT INTO contador_version_anterior (tabla, casino, version) "
+               "SELECT cv.tabla, c.nombre, cv.version FROM contador_version cv JOIN casino c ON c.id = cv.casino_id")
+    op.drop_table('contador_version')
+    op.rename_table('contador_version_anterior', 'contador_version')
+
+    for tabla in INDICES_FECHA:
+        op.drop_index(f'ix_{tabla}_casino_fecha', table_name=tabla)
+    for tabla, (indices, unicos) in TABLAS.items():
+        op.add_column(tabla, sa.Column('casino', sa.String(length=20), nullable=True))
+        op.execute(f"UPDATE {tabla} SET casino = (SELECT casino.nombre FROM casino WHERE casino.id = {tabla}.casino_id)")
+        for nombre, _ in indices:
+            op.drop_index(nombre, table_name=tabla)
+        with op.batch_alter_table(tabla, schema=None) as batch_op:
+            for nombre, _ in unicos:
+                batch_op.drop_constraint(nombre, type_='unique')
+            batch_op.drop_constraint(f'fk_{tabla}_casino_id_casino', type_='foreignkey')
+        with op.batch_alter_table(tabla, schema=None) as batch_op:
+            batch_op.drop_column('casino_id')
+            batch_op.alter_column('casino', existing_type=sa.String(length=20), nullable=False)
+        with op.batch_alter_table(tabla, schema=None) as batch_op:
+            for nombre, columnas in unicos:
+                batch_op.create_unique_constraint(nombre, columnas)
+        for nombre, columnas in indices:
+            op.create_index(nombre, tabla, columnas, unique=False)
+
+    op.drop_table('casino')
+    if sqlite:
+        for sentencia in _fts_sqlite('casino'):
+            op.execute(sentencia)
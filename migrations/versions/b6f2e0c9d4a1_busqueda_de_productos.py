@@ -0,0 +1,69 @@
+"""Busqueda de productos sin acentos
+
+Revision ID: b6f2e0c9d4a1
+Revises: 0a9d6e3c5b18
+Create Date: 2026-10-17 22:31:05.174820
+
+"""
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6f2e0c9d4a1'
+down_revision = '0a9d6e3c5b18'
+branch_labels = None
+depends_on = None
+
+# Mismo índice que crea `flask reindexar-busqueda` (SQL_INDICE_BUSQUEDA en app.py)
+SQLITE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS inventario_fts USING fts5(nombre_busqueda, casino UNINDEXED, content='inventario', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS inventario_fts_ai AFTER INSERT ON inventario BEGIN "
+    "INSERT INTO inventario_fts(rowid, nombre_busqueda, casino) VALUES (new.id, new.nombre_busqueda, new.casino); END",
+    "CREATE TRIGGER IF NOT EXISTS inventario_fts_ad AFTER DELETE ON inventario BEGIN "
+    "INSERT INTO inventario_fts(inventario_fts, rowid, nombre_busqueda, casino) VALUES ('delete', old.id, old.nombre_busqueda, old.casino); END",
+    "CREATE TRIGGER IF NOT EXISTS inventario_fts_au AFTER UPDATE OF nombre_busqueda, casino ON inventario BEGIN "
+    "INSERT INTO inventario_fts(inventario_fts, rowid, nombre_busqueda, casino) VALUES ('delete', old.id, old.nombre_busqueda, old.casino); "
+    "INSERT INTO inventario_fts(rowid, nombre_busqueda, casino) VALUES (new.id, new.nombre_busqueda, new.casino); END",
+    "INSERT INTO inventario_fts(inventario_fts) VALUES ('rebuild')",
+]
+POSTGRESQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_inventario_nombre_busqueda_trgm ON inventario USING gin (nombre_busqueda gin_trgm_ops)",
+]
+
+
+def _normalizar(texto):
+    texto = unicodedata.normalize('NFKD', texto or '')
+    return ' '.join(''.join(c for c in texto if not unicodedata.combining(c)).lower().split())
+
+
+def upgrade():
+    with op.batch_alter_table('inventario', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('nombre_busqueda', sa.String(length=100), server_default='', nullable=False))
+        batch_op.create_index('ix_inventario_casino_nombre_busqueda', ['casino', 'nombre_busqueda'], unique=False)
+
+    conexion = op.get_bind()
+    inventario = sa.table('inventario', sa.column('id', sa.Integer), sa.column('nombre', sa.String), sa.column('nombre_busqueda', sa.String))
+    filas = [{'b_id': pid, 'b_n': _normalizar(nombre)} for pid, nombre in conexion.execute(sa.select(inventario.c.id, inventario.c.nombre))]
+    if filas:
+        conexion.execute(inventario.update().where(inventario.c.id == sa.bindparam('b_id')).values(nombre_busqueda=sa.bindparam('b_n')), filas)
+
+    for sentencia in {'sqlite': SQLITE, 'postgresql': POSTGRESQL}.get(conexion.dialect.name, []):
+        op.execute(sentencia)
+
+
+def downgrade():
+    dialecto = op.get_bind().dialect.name
+    if dialecto == 'sqlite':
+        for trigger in ('inventario_fts_ai', 'inventario_fts_ad', 'inventario_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS inventario_fts")
+    elif dialecto == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_inventario_nombre_busqueda_trgm")
+
+    op.drop_index('ix_inventario_casino_nombre_busqueda', table_name='inventario')
+    with op.batch_alter_table('inventario', schema=None) as batch_op:
+        batch_op.drop_column('nombre_busqueda')
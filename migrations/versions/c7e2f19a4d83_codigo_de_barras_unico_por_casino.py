@@ -0,0 +1,39 @@
+"""Codigo de barras unico por casino
+
+Revision ID: c7e2f19a4d83
+Revises: 5be0d3f8c2a6
+Create Date: 2026-10-17 14:02:51.660417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e2f19a4d83'
+down_revision = '5be0d3f8c2a6'
+branch_labels = None
+depends_on = None
+
+# SQLite no guarda nombre para la restricción original: se le asigna uno en modo batch
+NAMING_CONVENTION = {'uq': 'uq_%(table_name)s_%(column_0_name)s'}
+
+
+def _nombre_unique_codigo():
+    for uq in sa.inspect(op.get_bind()).get_unique_constraints('inventario'):
+        if uq['column_names'] == ['codigo_barras'] and uq['name']:
+            return uq['name']
+    return 'uq_inventario_codigo_barras'
+
+
+def upgrade():
+    nombre = _nombre_unique_codigo()
+    with op.batch_alter_table('inventario', schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.drop_constraint(nombre, type_='unique')
+        batch_op.create_unique_constraint('uq_inventario_codigo_casino', ['codigo_barras', 'casino'])
+
+
+def downgrade():
+    with op.batch_alter_table('inventario', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_inventario_codigo_casino', type_='unique')
+        batch_op.create_unique_constraint('uq_inventario_codigo_barras', ['codigo_barras'])
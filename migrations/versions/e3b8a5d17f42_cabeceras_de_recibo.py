@@ -0,0 +1,99 @@
+"""Cabeceras de recibo para ventas y compras
+
+Revision ID: e3b8a5d17f42
+Revises: c7e2f19a4d83
+Create Date: 2026-10-17 16:40:12.518230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b8a5d17f42'
+down_revision = 'c7e2f19a4d83'
+branch_labels = None
+depends_on = None
+
+# (tabla de líneas, columna del recibo, tabla de cabecera, columnas de cabecera y cómo agregarlas desde las líneas)
+VENTA = ('venta', 'recibo_id', 'recibo', [
+    ('pago', sa.Float(), 'MAX(pago)'),
+    ('cambio', sa.Float(), 'MAX(cambio)'),
+    ('vendedor', sa.String(length=100), 'MAX(vendedor)'),
+    ('casino', sa.String(length=20), 'MAX(casino)'),
+], 'SUM(total)')
+COMPRA = ('compra', 'recibo_compra_id', 'recibo_compra', [
+    ('proveedor', sa.String(length=100), 'MAX(proveedor)'),
+    ('comprador', sa.String(length=100), 'MAX(comprador)'),
+    ('casino', sa.String(length=20), 'MAX(casino)'),
+], 'SUM(cantidad * costo_unitario)')
+
+
+def _crear_cabecera(lineas, columna, cabecera, campos, total):
+    op.create_table(cabecera,
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('uuid', sa.String(length=50), nullable=False),
+    sa.Column('fecha', sa.DateTime(), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    *[sa.Column(nombre, tipo, nullable=False) for nombre, tipo, _ in campos],
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('uuid')
+    )
+    with op.batch_alter_table(cabecera, schema=None) as batch_op:
+        batch_op.create_index(f'ix_{cabecera}_casino_fecha', ['casino', 'fecha'], unique=False)
+
+    # Un recibo por cada grupo de líneas existente
+    nombres = ', '.join(nombre for nombre, _, _ in campos)
+    agregados = ', '.join(expr for _, _, expr in campos)
+    op.execute(f"INSERT INTO {cabecera} (uuid, fecha, total, {nombres}) "
+               f"SELECT {columna}, COALESCE(MIN(fecha), CURRENT_TIMESTAMP), {total}, {agregados} FROM {lineas} GROUP BY {columna}")
+
+    op.add_column(lineas, sa.Column('cabecera_id', sa.Integer(), nullable=True))
+    op.execute(f"UPDATE {lineas} SET cabecera_id = (SELECT {cabecera}.id FROM {cabecera} WHERE {cabecera}.uuid = {lineas}.{columna})")
+
+    op.drop_index(f'ix_{lineas}_{columna}', table_name=lineas)
+    with op.batch_alter_table(lineas, schema=None) as batch_op:
+        batch_op.drop_column(columna)
+        batch_op.drop_column('fecha')
+        for nombre, _, _ in campos:
+            batch_op.drop_column(nombre)
+    with op.batch_alter_table(lineas, schema=None) as batch_op:
+        batch_op.alter_column('cabecera_id', new_column_name=columna, existing_type=sa.Integer(), nullable=False)
+    with op.batch_alter_table(lineas, schema=None) as batch_op:
+        batch_op.create_foreign_key(f'fk_{lineas}_{columna}_{cabecera}', cabecera, [columna], ['id'])
+        batch_op.create_index(f'ix_{lineas}_{columna}', [columna], unique=False)
+
+
+def _eliminar_cabecera(lineas, columna, cabecera, campos, total):
+    # Se vuelven a copiar en cada línea los datos de su recibo
+    op.add_column(lineas, sa.Column('recibo_uuid', sa.String(length=50), nullable=True))
+    op.add_column(lineas, sa.Column('fecha', sa.DateTime(), nullable=True))
+    for nombre, tipo, _ in campos:
+        op.add_column(lineas, sa.Column(nombre, tipo, nullable=True))
+    for nombre in ['uuid', 'fecha'] + [nombre for nombre, _, _ in campos]:
+        destino = 'recibo_uuid' if nombre == 'uuid' else nombre
+        op.execute(f"UPDATE {lineas} SET {destino} = (SELECT {cabecera}.{nombre} FROM {cabecera} WHERE {cabecera}.id = {lineas}.{columna})")
+
+    op.drop_index(f'ix_{lineas}_{columna}', table_name=lineas)
+    with op.batch_alter_table(lineas, schema=None) as batch_op:
+        batch_op.drop_constraint(f'fk_{lineas}_{columna}_{cabecera}', type_='foreignkey')
+        batch_op.drop_column(columna)
+    with op.batch_alter_table(lineas, schema=None) as batch_op:
+        batch_op.alter_column('recibo_uuid', new_column_name=columna, existing_type=sa.String(length=50), nullable=False)
+        for nombre, tipo, _ in campos:
+            batch_op.alter_column(nombre, existing_type=tipo, nullable=False)
+    op.create_index(f'ix_{lineas}_{columna}', lineas, [columna], unique=False)
+
+    with op.batch_alter_table(cabecera, schema=None) as batch_op:
+        batch_op.drop_index(f'ix_{cabecera}_casino_fecha')
+    op.drop_table(cabecera)
+
+
+def upgrade():
+    _crear_cabecera(*VENTA)
+    _crear_cabecera(*COMPRA)
+
+
+def downgrade():
+    _eliminar_cabecera(*COMPRA)
+    _eliminar_cabecera(*VENTA)
@@ -1,12 +0,0 @@
-from app import db
-
-class Producto(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    nombre = db.Column(db.String(100), nullable=False)
-    categoria = db.Column(db.String(50), nullable=False)
-    cantidad = db.Column(db.Float, nullable=False)
-    unidad = db.Column(db.String(20), nullable=False)  # Ejemplo: "kg", "litros", "porciones"
-    costo_unitario = db.Column(db.Float, nullable=False)
-
-    def __repr__(self):
-        return f"<Producto {self.nombre}>"
@@ -1,22 +0,0 @@
-from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
-from app import db
-
-
-class User(UserMixin, db.Model):
-id = db.Column(db.Integer, primary_key=True)
-username = db.Column(db.String(80), unique=True, nullable=False)
-password_hash = db.Column(db.String(128), nullable=False)
-rol = db.Column(db.String(20), default='cajero')
-
-
-def set_password(self, password):
-self.password_hash = generate_password_hash(password)
-
-
-def check_password(self, password):
-return check_password_hash(self.password_hash, password)
-
-
-def __repr__(self):
-return f'<User {self.username}>'
\ No newline at end of file
@@ -0,0 +1,62 @@
+// Copia local del catálogo de productos de cada casino (localStorage).
+// Al abrir un formulario se pide a /api/catalogo solo lo que cambió desde la
+// versión guardada (If-None-Match + ?since=N) y se aplican altas, cambios y
+// bajas. Sin conexión se sigue trabajando con la última copia.
+const CatalogoLocal = (function () {
+    function clave(casino) { return `yosyfood-catalogo:${casino}`; }
+
+    function leer(casino) {
+        try { return JSON.parse(localStorage.getItem(clave(casino))); }
+        catch (error) { return null; }
+    }
+
+    function guardar(casino, catalogo) {
+        try { localStorage.setItem(clave(casino), JSON.stringify(catalogo)); }
+        catch (error) { /* sin espacio: el catálogo queda solo en memoria */ }
+    }
+
+    async function sincronizar(casino) {
+        const local = leer(casino);
+        const params = new URLSearchParams({ casino });
+        const headers = {};
+        if (local) {
+            params.set('since', local.version);
+            headers['If-None-Match'] = `"${local.version}"`;
+        }
+        let response;
+        try {
+            response = await fetch(`/api/catalogo?${params}`, { headers, cache: 'no-store' });
+        } catch (error) {
+            if (local) return local;
+            throw new Error('Sin conexión y sin copia local del catálogo.');
+        }
+        if (response.status === 304 && local) return local;
+        if (!response.ok) {
+            if (local) return local;
+            throw new Error('No se pudo cargar el catálogo de productos.');
+        }
+        return aplicar(casino, await response.json()) || leer(casino);
+    }
+
+    // Aplica un cambio con el formato de /api/catalogo (o del stream de stock).
+    // Devuelve null si no encaja con la copia local y hace falta sincronizar.
+    function aplicar(casino, datos) {
+        const local = leer(casino);
+        if (!datos.completo) {
+            if (!local || (datos.desde !== undefined && local.version < datos.desde)) return null;
+            if (datos.version <= local.version) return local;
+        }
+        const productos = (datos.completo || !local) ? {} : local.productos;
+        datos.eliminados.forEach(id => { delete productos[id]; });
+        datos.productos.forEach(p => { productos[p.id] = p; });
+        const catalogo = { version: datos.version, productos };
+        guardar(casino, catalogo);
+        return catalogo;
+    }
+
+    function ordenados(catalogo) {
+        return Object.values(catalogo ? catalogo.productos : {}).sort((a, b) => a.nombre.localeCompare(b.nombre));
+    }
+
+    return { leer, sincronizar, aplicar, ordenados };
+})();
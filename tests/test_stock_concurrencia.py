@@ -0,0 +1,92 @@
+"""Ventas concurrentes de las últimas unidades contra una base SQLite en archivo."""
+import threading
+
+import pytest
+from flask import g
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
+
+from app import create_app
+from app.extensions import db
+from app.models import Casino, Inventario, MovimientoStock, cargar_casinos
+from app.stock import StockInsuficiente, aplicar_movimientos_stock, cargar_productos, registrar_movimientos
+
+CAJAS = 16
+INTENTOS = 4
+STOCK = 25  # menos que CAJAS x INTENTOS: la mayoría de los intentos llega sin stock
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "stock.db"}', 'TAREAS_DIR': str(tmp_path / 'tareas'), 'ARCHIVO_DIR': str(tmp_path / 'archivo')})
+    with app.app_context():
+        db.create_all()
+        db.session.add(Casino(nombre='Casino 1')); db.session.commit()
+        cargar_casinos()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def producto_id(app):
+    producto = Inventario(nombre='Último', cantidad=STOCK, unidad='pza', precio=1, casino='Casino 1')
+    db.session.add(producto); db.session.flush()
+    registrar_movimientos({producto.id: STOCK}, 'alta')
+    db.session.commit()
+    return producto.id
+
+
+def test_ventas_concurrentes_no_sobrevenden(app, producto_id):
+    barrera = threading.Barrier(CAJAS); lock = threading.Lock()
+    resultados = {'vendidas': 0, 'sin_stock': 0, 'errores': []}
+
+    def caja(numero):
+        with app.app_context():
+            g.tarea_escribe = True  # BEGIN IMMEDIATE, como un POST
+            barrera.wait()
+            for intento in range(INTENTOS):
+                try:
+                    productos = cargar_productos([producto_id])
+                    aplicar_movimientos_stock(productos, {producto_id: -1}, 'venta', f'caja-{numero}-{intento}')
+                    db.session.commit()
+                    resultado = 'vendidas'
+                except StockInsuficiente:
+                    db.session.rollback(); resultado = 'sin_stock'
+                except OperationalError as e:
+                    db.session.rollback(); resultado = e
+                with lock:
+                    if isinstance(resultado, Exception): resultados['errores'].append(resultado)
+                    else: resultados[resultado] += 1
+            db.session.remove()
+
+    cajas = [threading.Thread(target=caja, args=(i,)) for i in range(CAJAS)]
+    for t in cajas: t.start()
+    for t in cajas: t.join()
+
+    db.session.expire_all()
+    cantidad = db.session.get(Inventario, producto_id).cantidad
+    libro = db.session.query(func.sum(MovimientoStock.delta)).filter(MovimientoStock.producto_id == producto_id).scalar()
+    assert resultados['errores'] == []
+    assert cantidad >= 0
+    assert cantidad == libro
+    assert resultados['vendidas'] == STOCK - cantidad == STOCK
+    assert resultados['sin_stock'] == CAJAS * INTENTOS - STOCK
+
+
+def test_salida_con_stock_leido_antes_de_otra_venta(app, producto_id):
+    # La caja leyó el stock antes de que otra vendiera todo: el UPDATE condicional la rechaza
+    producto = db.session.get(Inventario, producto_id); assert producto.cantidad == STOCK
+    db.session.expunge(producto); db.session.commit()
+
+    def otra_caja():
+        with app.app_context():
+            aplicar_movimientos_stock(cargar_productos([producto_id]), {producto_id: -STOCK}, 'venta', 'otra')
+            db.session.commit(); db.session.remove()
+    t = threading.Thread(target=otra_caja); t.start(); t.join()
+
+    with pytest.raises(StockInsuficiente):
+        aplicar_movimientos_stock({producto_id: producto}, {producto_id: -1}, 'venta', 'tarde')
+    db.session.rollback()
+    assert db.session.get(Inventario, producto_id).cantidad == 0
+    assert db.session.query(func.sum(MovimientoStock.delta)).filter(MovimientoStock.producto_id == producto_id).scalar() == 0